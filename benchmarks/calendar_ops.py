@@ -0,0 +1,137 @@
+"""
+Hot-path benchmarks for google_calendar.py, run against the in-process fake
+Calendar backend (calendar_core.fake_calendar) instead of a live account.
+
+For every scale (calendars x events) a synthetic fixture is loaded into a
+fresh FakeCalendar and installed with use_service(), with event stores in a
+temporary directory. Reports, per operation:
+  - first ms:    the first call (builds whatever index the operation uses)
+  - median ms:   median of --runs further calls
+  - round trips: backend round trips per further call
+Operations:
+  - initial sync:    refresh every event store from scratch (first call only)
+  - list_events:     the next 7 days across every calendar
+  - get_next_event:  the soonest upcoming event
+  - conflict check:  create_new_event on an occupied slot, all calendars (no write happens)
+  - find_free_slots: one week, 60-minute slots, via freebusy
+  - fuzzy lookup:    search_events for a misspelled summary near a time
+
+--latency-ms adds that much delay to every backend round trip (a batch is
+one round trip), so network-bound and CPU-bound paths can both be seen.
+
+Usage:
+    python benchmarks/calendar_ops.py [--calendars 1,10,100] [--events 100,1000,10000,100000]
+                                      [--latency-ms 0] [--runs 5]
+    python benchmarks/calendar_ops.py --fixture recorded.json    # replay a recorded fixture
+    python benchmarks/calendar_ops.py --record recorded.json     # record one from your account
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import google_calendar  # noqa: E402
+from calendar_core.fake_calendar import FakeCalendar, record_fixture, synthetic  # noqa: E402
+
+ANCHOR_SUMMARY = "Benchmark anchor"
+
+
+def add_anchor(fixture, start):
+    """Put a known one-hour event on the first calendar, for conflict checks and lookups."""
+    fixture["calendars"][0]["events"].append({
+        "id": "benchmarkanchor",
+        "summary": ANCHOR_SUMMARY,
+        "start": {"dateTime": start.isoformat()},
+        "end": {"dateTime": (start + timedelta(hours=1)).isoformat()},
+    })
+
+
+def operations(now, anchor):
+    week = (now + timedelta(days=7)).isoformat()
+    conflict_end = (anchor + timedelta(minutes=30)).isoformat()
+    return {
+        "list_events": lambda: google_calendar.list_events(start_str=now.isoformat(), end_str=week,
+                                                           max_results=250),
+        "get_next_event": google_calendar.get_next_event,
+        "conflict check": lambda: google_calendar.create_new_event(
+            "primary", "Overlap", anchor.isoformat(), conflict_end, check_all_calendars=True),
+        "find_free_slots": lambda: google_calendar.find_free_slots(now.isoformat(), week),
+        "fuzzy lookup": lambda: google_calendar.search_events("benchmrk anchor", near_ts=anchor.timestamp(),
+                                                              limit=5),
+    }
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    fn()
+    return (time.perf_counter() - t0) * 1000
+
+
+def run_scale(fixture, latency, runs):
+    """[(operation, first_ms, median_ms, round_trips_per_call)] for one fixture."""
+    now = datetime.now(timezone.utc)
+    anchor = (now + timedelta(days=1)).replace(hour=15, minute=0, second=0, microsecond=0)
+    add_anchor(fixture, anchor)
+    fake = FakeCalendar.from_fixture(fixture, latency=latency, tz=google_calendar.TIMEZONE)
+
+    rows = []
+    with tempfile.TemporaryDirectory() as store_dir:
+        google_calendar.EVENT_STORE_CONFIG["path"] = store_dir
+        google_calendar.use_service(fake)
+        calendar_ids = [c["id"] for c in google_calendar.get_calendars()]
+        trips = fake.round_trips
+        first = timed(lambda: google_calendar.refresh_event_stores(calendar_ids))
+        rows.append(("initial sync", first, None, fake.round_trips - trips))
+
+        for name, fn in operations(now, anchor).items():
+            first = timed(fn)
+            trips = fake.round_trips
+            samples = [timed(fn) for _ in range(runs)]
+            rows.append((name, first, statistics.median(samples), (fake.round_trips - trips) / runs))
+    return rows
+
+
+def print_rows(label, rows):
+    for name, first, median, trips in rows:
+        median = f"{median:>10.2f}" if median is not None else f"{'—':>10}"
+        print(f"{label:<16}{name:<17}{first:>10.2f}{median}{trips:>13.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calendars", default="1,10,100", help="comma-separated calendar counts")
+    parser.add_argument("--events", default="100,1000,10000,100000", help="comma-separated total event counts")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="delay per backend round trip")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fixture", help="replay this recorded fixture instead of synthetic ones")
+    parser.add_argument("--record", metavar="PATH", help="record a fixture from your account and exit")
+    args = parser.parse_args()
+
+    if args.record:
+        fixture = record_fixture(google_calendar.get_service(), args.record)
+        total = sum(len(c["events"]) for c in fixture["calendars"])
+        print(f"Recorded {len(fixture['calendars'])} calendars, {total} events to {args.record}")
+        return
+
+    latency = args.latency_ms / 1000
+    print(f"{'scale':<16}{'operation':<17}{'first ms':>10}{'median ms':>10}{'round trips':>13}")
+    if args.fixture:
+        fixture = FakeCalendar.from_fixture(args.fixture).to_fixture()
+        print_rows(os.path.basename(args.fixture)[:15], run_scale(fixture, latency, args.runs))
+        return
+    for n_calendars in (int(n) for n in args.calendars.split(",")):
+        for n_events in (int(n) for n in args.events.split(",")):
+            fixture = synthetic(n_calendars, n_events, seed=args.seed, tz=google_calendar.TIMEZONE)
+            print_rows(f"{n_calendars}x{n_events}", run_scale(fixture, latency, args.runs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Startup-time benchmark for google_calendar.py.
+
+Each measurement runs in a fresh interpreter so module caches don't hide the
+cost. Reports:
+  - import:          `import google_calendar` (what every importer pays now)
+  - import + service: import followed by get_service(), i.e. what a bare
+                     import used to cost when init_service() ran eagerly
+                     (needs a token.json in the repo root)
+  - build (fetched): build("calendar", "v3") the way init_service() used to,
+                     i.e. discovery lookup + parse on every cold start
+  - build (bundled): build_from_document() on the bundled discovery copy,
+                     which is what get_service() pays on first use
+
+Usage:
+    python benchmarks/startup.py [--runs 5]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SNIPPETS = {
+    "import": "import google_calendar",
+    "import + service": "import google_calendar\ngoogle_calendar.get_service()",
+    "build (fetched)": (
+        "import httplib2\n"
+        "from googleapiclient.discovery import build\n"
+        "build('calendar', 'v3', http=httplib2.Http())"
+    ),
+    "build (bundled)": (
+        "import httplib2\n"
+        "from googleapiclient.discovery import build_from_document\n"
+        "with open('calendar_core/discovery/calendar.v3.json') as f:\n"
+        "    build_from_document(f.read(), http=httplib2.Http())"
+    ),
+}
+
+TIMER = (
+    "import time\n"
+    "t0 = time.perf_counter()\n"
+    "{code}\n"
+    "print(time.perf_counter() - t0)\n"
+)
+
+
+def time_snippet(code, runs):
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", TIMER.format(code=code)],
+            cwd=ROOT, capture_output=True, text=True,
+        )
+        if out.returncode != 0:
+            raise RuntimeError(out.stderr.strip().splitlines()[-1])
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'stage':<18}{'median ms':>12}{'min ms':>10}")
+    for name, code in SNIPPETS.items():
+        try:
+            samples = time_snippet(code, args.runs)
+        except RuntimeError as e:
+            print(f"{name:<18}  failed: {e}")
+            continue
+        print(f"{name:<18}{statistics.median(samples) * 1000:>12.1f}{min(samples) * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Async Calendar transport — sends googleapiclient requests over httpx.
+
+googleapiclient builds each request (URI, method, headers, body) and knows
+how to decode the response, but it only sends through blocking httplib2.
+AsyncTransport takes those same HttpRequest objects and sends them through a
+shared httpx.AsyncClient. An async caller then awaits the network instead of
+parking a worker thread on it, so concurrent commands are limited by
+connections rather than by thread count.
+
+Requests are paced and retried by the same RequestScheduler as the blocking
+path (`send_async()`: asyncio.sleep instead of time.sleep). Responses go
+through the request's own postproc, so results and HttpErrors look exactly
+as they do from execute(). Requests that carry an `execute_async()` of their
+own, like calendar_core.fake_calendar's, are awaited directly.
+
+Use it as the executor for calendar_core.steps.run_async:
+
+    transport = AsyncTransport(lambda: credentials, scheduler)
+    await steps.run_async(routine, transport.execute, transport.fan_out)
+"""
+
+import asyncio
+
+import httplib2
+import httpx
+from google.auth.transport.requests import Request
+from googleapiclient.errors import HttpError
+
+from calendar_core.tracing import span
+
+
+class AsyncTransport:
+    def __init__(self, credentials=None, scheduler=None, user_agent=None, timeout=30.0, max_connections=20):
+        self.credentials = credentials      # () -> google.auth credentials, or None to send unauthenticated
+        self.scheduler = scheduler
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._client = None
+        self._loop = None
+
+    def client(self):
+        """The shared httpx client, created on first use in the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout, limits=httpx.Limits(max_connections=self.max_connections))
+            self._loop = loop
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def execute(self, request):
+        """Send one request and return its decoded result; raises HttpError on a non-2xx response."""
+        execute_async = getattr(request, "execute_async", None)
+        if execute_async is not None:
+            return await execute_async()
+
+        method = (getattr(request, "methodId", None) or "unknown").removeprefix("calendar.")
+        with span("calendar_api", method=method):
+            headers = dict(request.headers)
+            if self.user_agent:
+                # As googleapiclient's set_user_agent does, ahead of the request's own "(gzip)"
+                headers["user-agent"] = f"{self.user_agent} {headers.get('user-agent', '')}".strip()
+            await self._authorize(headers)
+
+            def send():
+                return self._send(request.method, request.uri, request.body, headers)
+
+            resp, content = await (self.scheduler.send_async(send) if self.scheduler else send())
+        if resp.status >= 300:
+            raise HttpError(resp, content, uri=request.uri)
+        return request.postproc(resp, content)
+
+    async def fan_out(self, step):
+        """Send a calendar_core.steps.FanOut concurrently. Returns (results, errors) keyed like its requests."""
+        keys = list(step.requests)
+        outcomes = await asyncio.gather(*(self.execute(step.requests[key]) for key in keys),
+                                        return_exceptions=True)
+        results, errors = {}, {}
+        for key, outcome in zip(keys, outcomes):
+            if isinstance(outcome, BaseException):
+                errors[key] = outcome
+            else:
+                results[key] = outcome
+        return results, errors
+
+    async def _authorize(self, headers):
+        credentials = self.credentials() if self.credentials else None
+        if credentials is None:
+            return
+        if not credentials.valid:
+            # Token refresh is a rare blocking call; keep it off the event loop
+            await asyncio.to_thread(credentials.refresh, Request())
+        credentials.apply(headers)
+
+    async def _send(self, method, uri, body, headers):
+        response = await self.client().request(method, uri, content=body, headers=headers)
+        info = dict(response.headers)
+        info["status"] = str(response.status_code)
+        # httpx has already decompressed the body
+        info.pop("content-encoding", None)
+        return httplib2.Response(info), response.content
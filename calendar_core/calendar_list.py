@@ -0,0 +1,65 @@
+"""
+Calendar metadata cache — keeps the result of calendarList().list() around.
+
+Within `ttl` seconds the cached list is returned without touching the network.
+After that the list is revalidated with If-None-Match against the ETag of the
+last response, so an unchanged list costs a bodiless 304 instead of a full
+download. `invalidate()` forces the next read to go back to the API.
+"""
+
+import threading
+import time
+
+from googleapiclient.errors import HttpError
+
+from calendar_core import steps
+
+
+class CalendarListCache:
+    def __init__(self, ttl=300, fields=None):
+        self.ttl = ttl
+        self.fields = fields
+        self.items = None
+        self.etag = None
+        self.fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, service):
+        """Return the calendarList items, refreshing or revalidating as needed."""
+        return steps.run(self.get_steps(service))
+
+    def get_steps(self, service):
+        """get() as a calendar_core.steps routine, for callers that run it async."""
+        if self.items is not None and time.time() - self.fetched_at < self.ttl:
+            return self.items
+
+        request = service.calendarList().list(fields=self.fields)
+        if self.items is not None and self.etag:
+            request.headers["If-None-Match"] = self.etag
+        try:
+            result = yield request
+        except HttpError as e:
+            if e.resp.status != 304:
+                raise
+            # Not modified — the cached list is still current
+            self.fetched_at = time.time()
+            return self.items
+
+        items = result.get("items", [])
+        page_token = result.get("nextPageToken")
+        while page_token:
+            page = yield service.calendarList().list(pageToken=page_token, fields=self.fields)
+            items.extend(page.get("items", []))
+            page_token = page.get("nextPageToken")
+
+        with self._lock:
+            self.items = items
+            self.etag = result.get("etag")
+            self.fetched_at = time.time()
+        return items
+
+    def invalidate(self):
+        with self._lock:
+            self.items = None
+            self.etag = None
+            self.fetched_at = 0.0
@@ -0,0 +1,90 @@
+"""
+Event — the compact record google_calendar.py passes around internally.
+
+Listings used to copy every event into a ten-key dict, including its full
+description, attendee list and recurrence lines, and the copies were copied
+again on their way out. An Event instead keeps only its ID, calendar, summary
+and epoch-second bounds in slots. Calendar IDs are interned, so a year of
+events across a dozen calendars shares a handful of ID strings. Everything
+else is read on demand from the API resource the Event wraps, which the
+event store or the response page already holds.
+
+That trims the working set of a single call (a listing, a bulk selection),
+not what stays resident: the event store, summary index and upcoming queue
+keep the raw resources, because syncing and persistence need every field.
+
+`to_dict()` builds the familiar record. Call it only at the API boundary,
+when a result is about to be returned or serialized.
+"""
+
+import sys
+
+from calendar_core.event_store import event_bounds
+
+
+class Event:
+    __slots__ = ("id", "calendar_id", "summary", "start_ts", "end_ts", "_resource")
+
+    def __init__(self, calendar_id, resource, start_ts, end_ts):
+        self.id = resource["id"]
+        self.calendar_id = sys.intern(calendar_id)
+        self.summary = resource.get("summary", "(No title)")
+        self.start_ts = int(start_ts)
+        self.end_ts = int(end_ts)
+        self._resource = resource
+
+    @classmethod
+    def from_resource(cls, calendar_id, resource, tz="UTC"):
+        return cls(calendar_id, resource, *event_bounds(resource, tz))
+
+    def __repr__(self):
+        return f"Event({self.calendar_id!r}, {self.id!r}, {self.summary!r}, {self.start})"
+
+    @property
+    def all_day(self):
+        return "date" in self._resource["start"]
+
+    @property
+    def start(self):
+        """Start as the API gave it: a dateTime string, or a date for all-day events."""
+        when = self._resource["start"]
+        return when.get("dateTime", when.get("date"))
+
+    @property
+    def end(self):
+        when = self._resource["end"]
+        return when.get("dateTime", when.get("date"))
+
+    @property
+    def location(self):
+        return self._resource.get("location", "")
+
+    @property
+    def description(self):
+        return self._resource.get("description", "")
+
+    @property
+    def attendees(self):
+        return [a.get("email") for a in self._resource.get("attendees", [])]
+
+    @property
+    def recurrence(self):
+        return self._resource.get("recurrence", [])
+
+    @property
+    def hangout_link(self):
+        return self._resource.get("hangoutLink", "")
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "calendar_id": self.calendar_id,
+            "summary": self.summary,
+            "start": self.start,
+            "end": self.end,
+            "location": self.location,
+            "description": self.description,
+            "attendees": self.attendees,
+            "recurrence": self.recurrence,
+            "hangoutLink": self.hangout_link,
+        }
@@ -0,0 +1,96 @@
+"""
+Event search — fuzzy summary lookup over every stored event at once.
+
+Summaries of all synced events (recurring series expanded over the store's
+range) are kept normalized in one flat list next to NumPy arrays of their
+calendar, start and end times, so "find my dentist
+appointment" is a single rapidfuzz cdist call plus a few array masks instead
+of a Python loop per event per calendar. The snapshot is rebuilt only when a
+store's version changes.
+
+Matches must clear `min_score`; among those, ranking subtracts a penalty for
+distance from a target time (one point per hour, capped), so "gym tomorrow"
+prefers tomorrow's session over a slightly better-named one next month.
+"""
+
+import threading
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+from calendar_core.tracing import span
+
+
+def normalize(text):
+    return " ".join((text or "").lower().split())
+
+
+def rank(query, summaries, starts, near_ts=None, min_score=60, hour_penalty=1.0, max_penalty=20.0):
+    """Indices into `summaries` scoring above `min_score`, best first, and the raw scores.
+
+    An empty query matches everything. Ties go to the earlier start.
+    """
+    query = normalize(query)
+    if not len(summaries):
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    if query:
+        with span("fuzzy_match") as info:
+            info["candidates"] = len(summaries)
+            scores = process.cdist([query], summaries, scorer=fuzz.partial_ratio,
+                                   processor=None, workers=-1)[0].astype(np.float64)
+    else:
+        scores = np.full(len(summaries), 100.0)
+    hits = np.flatnonzero(scores > min_score)
+    combined = scores[hits]
+    if near_ts is not None:
+        combined = combined - np.minimum(np.abs(starts[hits] - near_ts) / 3600 * hour_penalty, max_penalty)
+    return hits[np.lexsort((starts[hits], -combined))], scores
+
+
+class SummaryIndex:
+    """Normalized summaries and bounds of every event in a set of EventStores."""
+
+    def __init__(self):
+        self._versions = None
+        self._lock = threading.Lock()
+        self._snapshot = ([], [], [], np.empty(0, dtype=np.int32), np.empty(0), np.empty(0))
+
+    def refresh(self, stores):
+        """Rebuild from `stores` unless none of them changed since the last build."""
+        versions = {store.calendar_id: store.version for store in stores}
+        with self._lock:
+            if versions == self._versions:
+                return
+            calendar_ids, events, summaries, owners, bounds = [], [], [], [], []
+            for owner, store in enumerate(stores):
+                calendar_ids.append(store.calendar_id)
+                for start, end, event in store.entries():
+                    events.append(event)
+                    summaries.append(normalize(event.get("summary")))
+                    owners.append(owner)
+                    bounds.append((start, end))
+            bounds = np.asarray(bounds, dtype=np.float64).reshape(-1, 2)
+            self._snapshot = (calendar_ids, events, summaries,
+                              np.asarray(owners, dtype=np.int32), bounds[:, 0].copy(), bounds[:, 1].copy())
+            self._versions = versions
+
+    def search(self, query, calendar_ids=None, start_ts=None, end_ts=None, near_ts=None,
+               limit=None, min_score=60):
+        """Ranked [(calendar_id, event, score)] for events overlapping [start_ts, end_ts)."""
+        cal_list, events, summaries, owners, starts, ends = self._snapshot
+        mask = np.ones(len(events), dtype=bool)
+        if calendar_ids is not None:
+            calendar_ids = set(calendar_ids)
+            wanted = [owner for owner, cal_id in enumerate(cal_list) if cal_id in calendar_ids]
+            mask &= np.isin(owners, wanted)
+        if start_ts is not None:
+            # Same rule as IntervalIndex: zero-length events count when inside the window
+            mask &= (ends > start_ts) | ((starts == ends) & (starts >= start_ts))
+        if end_ts is not None:
+            mask &= starts < end_ts
+        candidates = np.flatnonzero(mask)
+
+        order, scores = rank(query, [summaries[i] for i in candidates], starts[candidates],
+                             near_ts=near_ts, min_score=min_score)
+        return [(cal_list[owners[candidates[i]]], events[candidates[i]], float(scores[i]))
+                for i in order[:limit]]
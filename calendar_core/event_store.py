@@ -0,0 +1,386 @@
+"""
+Local event store — a persistent, per-calendar copy of Google Calendar events.
+
+The first sync for a calendar pulls every event from `past_days` ago onward.
+The API hands back a nextSyncToken with that result, and every later sync
+sends the token and applies only what changed (new, edited and cancelled
+events, including single instances of recurring series). When Google expires
+the token (HTTP 410) the store is wiped and fully re-synced.
+
+Recurring series are synced unexpanded: one master event plus its
+exceptions (moved, edited or cancelled instances), rather than hundreds of
+server-expanded instances per series. Masters are expanded locally with
+calendar_core.recurrence for whatever window a read asks for, and the
+expansions are cached per window until the store changes.
+
+Reads (`entries_between`, `events_between`, `next_event`) are served from
+memory, so a caller only pays a network round trip when the store is older
+than `sync_interval`.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+from googleapiclient.errors import HttpError
+
+from calendar_core import persist, steps
+from calendar_core.interval_index import IntervalIndex
+from calendar_core.recurrence import Series, instance_start, original_start
+
+# Bumped when the on-disk layout or sync parameters change; older files are
+# ignored and re-synced (their sync tokens belong to different parameters)
+STORE_FORMAT = 2
+
+# Expansions are cached per day-aligned window
+WINDOW_CACHE_SIZE = 64
+
+
+def event_bounds(event, tz):
+    """Return (start_ts, end_ts) epoch seconds for an event resource.
+
+    All-day events (`date` instead of `dateTime`) are pinned to midnight in `tz`.
+    """
+    return _to_ts(event.get("start", {}), tz), _to_ts(event.get("end", {}), tz)
+
+
+def _to_ts(when, tz):
+    if "dateTime" in when:
+        dt = datetime.fromisoformat(when["dateTime"].replace("Z", "+00:00"))
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=ZoneInfo(when.get("timeZone") or tz))
+        return dt.timestamp()
+    if "date" in when:
+        dt = datetime.fromisoformat(when["date"]).replace(tzinfo=ZoneInfo(tz))
+        return dt.timestamp()
+    return 0.0
+
+
+class EventStore:
+    """Synced copy of one calendar's events, persisted as JSON on disk."""
+
+    def __init__(self, calendar_id, path, tz="UTC", past_days=30, sync_interval=60, fields=None,
+                 horizon_days=365):
+        self.calendar_id = calendar_id
+        self.fields = fields    # partial-response mask for sync pages
+        self.tz = tz
+        self.past_days = past_days
+        self.horizon_days = horizon_days    # how far open-ended reads expand series
+        self.sync_interval = sync_interval
+        self.sync_token = None
+        self.last_sync = 0.0
+        self.watched_until = 0.0        # push channel expiry; see calendar_core.watch
+        self.watched_sync_interval = 3600
+        self.events = {}        # event id -> event resource (singles, masters, exceptions)
+        self.index = IntervalIndex()        # singles and live exceptions
+        self.series = {}        # master id -> Series
+        self.overrides = {}     # master id -> {original start ts: exception id}
+        self._windows = OrderedDict()       # (lo, hi) -> expanded master instances
+        self._windows_version = None
+        self.version = 0        # bumped on every change, so derived indexes know to rebuild
+        self.syncing = False
+        self._resync = False
+        self._sync_done = None      # resolved when the running sync finishes
+        self._lock = threading.RLock()
+
+        digest = hashlib.sha1(calendar_id.encode()).hexdigest()[:16]
+        self.file = os.path.join(path, f"{digest}.json") if path else None
+        self._load()
+
+    # --- Persistence ---
+
+    def _load(self):
+        if not self.file or not os.path.exists(self.file):
+            return
+        try:
+            with open(self.file) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("calendar_id") != self.calendar_id or data.get("format") != STORE_FORMAT:
+            return
+        self.sync_token = data.get("sync_token")
+        for event in data.get("events", []):
+            self._put(event)
+
+    def save(self):
+        """Queue the store for writing; serialization and I/O happen on calendar_core.persist's thread."""
+        if not self.file:
+            return
+        with self._lock:
+            # Snapshot and queue under the lock, so a later save can't be overtaken by this one
+            persist.write_later(self.file, {
+                "format": STORE_FORMAT,
+                "calendar_id": self.calendar_id,
+                "sync_token": self.sync_token,
+                "events": list(self.events.values()),
+            })
+
+    # --- Syncing ---
+
+    def is_stale(self):
+        interval = self.sync_interval
+        if time.time() < self.watched_until:
+            # Push notifications trigger syncs; polling is only a safety net for missed ones
+            interval = max(interval, self.watched_sync_interval)
+        return self.sync_token is None or time.time() - self.last_sync >= interval
+
+    def refresh(self, service, force=False):
+        """Sync with the API if the store is stale (or `force` is set)."""
+        if force or self.is_stale():
+            self.sync(service)
+
+    def sync_request(self, service, page_token=None):
+        """Build the events().list request for the next sync page.
+
+        Exposed so several stores can send their first page in one batch and
+        hand the response back to `sync(service, first_page=...)`.
+        """
+        # Series come back as master + exceptions; see calendar_core.recurrence
+        kwargs = {"calendarId": self.calendar_id, "singleEvents": False, "maxResults": 2500}
+        if self.sync_token:
+            kwargs["syncToken"] = self.sync_token
+        else:
+            time_min = datetime.now(timezone.utc).timestamp() - self.past_days * 86400
+            kwargs["timeMin"] = datetime.fromtimestamp(time_min, timezone.utc).isoformat()
+        if page_token:
+            kwargs["pageToken"] = page_token
+        if self.fields:
+            kwargs["fields"] = self.fields
+        return service.events().list(**kwargs)
+
+    def sync(self, service, first_page=None):
+        """Pull changes since the last sync; falls back to a full sync on 410."""
+        return steps.run(self.sync_steps(service, first_page))
+
+    def sync_steps(self, service, first_page=None):
+        """sync() as a calendar_core.steps routine, for callers that run it async.
+
+        Every page is fetched before any is applied, so readers never see a
+        half-synced store and no lock is held while waiting on the network.
+        Only one sync runs at a time. A sync asked for while another is in
+        flight returns 0 at once, and the running one goes round again so
+        whatever prompted the second (say, a push notification) isn't missed.
+        While the first sync is in flight there is no copy to serve yet, so
+        the second waits for it instead (and syncs itself if it failed).
+        """
+        while True:
+            with self._lock:
+                if not self.syncing:
+                    self.syncing = True
+                    done = self._sync_done = Future()
+                    break
+                if self.sync_token is not None:
+                    self._resync = True
+                    return 0
+                running = self._sync_done
+            yield steps.Wait(running)
+            with self._lock:
+                if self.sync_token is not None:
+                    return 0
+        changed = 0
+        try:
+            while True:
+                changed += yield from self._sync_once(service, first_page)
+                first_page = None
+                with self._lock:
+                    if not self._resync:
+                        self.syncing = False
+                        return changed
+                    self._resync = False
+        except BaseException:
+            with self._lock:
+                self.syncing = self._resync = False
+            raise
+        finally:
+            done.set_result(None)
+
+    def _sync_once(self, service, first_page=None):
+        full = self.sync_token is None
+        try:
+            pages = yield from self._fetch_pages(service, first_page)
+        except HttpError as e:
+            if e.resp.status != 410:
+                raise
+            # Sync token expired — start over from a clean slate
+            self.sync_token = None
+            full = True
+            pages = yield from self._fetch_pages(service)
+        with self._lock:
+            changed = self._apply_pages(pages, full)
+            self.last_sync = time.time()
+        if changed or full:
+            self.save()
+        return changed
+
+    def _fetch_pages(self, service, first_page=None):
+        pages, result, page_token = [], first_page, None
+        while True:
+            if result is None:
+                result = yield self.sync_request(service, page_token)
+            pages.append(result)
+            page_token = result.get("nextPageToken")
+            if not page_token:
+                return pages
+            result = None
+
+    def _apply_pages(self, pages, full):
+        if full:
+            self.events.clear()
+            self.index.clear()
+            self.series.clear()
+            self.overrides.clear()
+            self.version += 1
+
+        changed = 0
+        for result in pages:
+            for item in result.get("items", []):
+                self.apply(item)
+                changed += 1
+        self.sync_token = pages[-1].get("nextSyncToken")
+        return changed
+
+    # --- Mutations ---
+
+    def apply(self, event):
+        """Insert, replace or drop (status=cancelled) a single event resource."""
+        with self._lock:
+            if event.get("status") != "cancelled":
+                self._put(event)
+            elif event.get("recurringEventId"):
+                # A cancelled instance stays on record so expansion leaves it out
+                self._put(event)
+            else:
+                self._drop_with_exceptions(event["id"])
+
+    def remove(self, event_id):
+        """Forget a deleted event; deleting one instance of a series cancels just that instance."""
+        with self._lock:
+            event = self.events.get(event_id)
+            if event is not None and not event.get("recurringEventId"):
+                self._drop_with_exceptions(event_id)
+                return
+            master_id = event["recurringEventId"] if event else event_id.rpartition("_")[0]
+            series = self.series.get(master_id)
+            if series is None:
+                self._drop(event_id)
+                return
+            original = dict(event["originalStartTime"]) if event else self._instance_original(series, event_id)
+            if original is not None:
+                self._put({"id": event_id, "status": "cancelled",
+                           "recurringEventId": master_id, "originalStartTime": original})
+
+    def _drop_with_exceptions(self, event_id):
+        self._drop(event_id)
+        # A series master takes all of its exceptions with it
+        for exception_id in [eid for eid, ev in self.events.items() if ev.get("recurringEventId") == event_id]:
+            self._drop(exception_id)
+
+    def _instance_original(self, series, event_id):
+        ts = instance_start(event_id, self.tz)
+        if ts is None:
+            return None
+        for _, _, instance in series.between(ts, ts + 1):
+            if instance["id"] == event_id:
+                return instance["originalStartTime"]
+        return None
+
+    def _put(self, event):
+        event_id = event["id"]
+        if event_id in self.events:
+            self._drop(event_id)
+        if event.get("recurrence"):
+            try:
+                self.series[event_id] = Series(event, self.tz)
+            except (ValueError, KeyError, TypeError):
+                return
+        else:
+            if event.get("recurringEventId"):
+                original = original_start(event, self.tz)
+                if original is None:
+                    return
+                self.overrides.setdefault(event["recurringEventId"], {})[original] = event_id
+            if event.get("status") != "cancelled":
+                try:
+                    bounds = event_bounds(event, self.tz)
+                except (ValueError, KeyError):
+                    return
+                self.index.add(event_id, *bounds)
+        self.events[event_id] = event
+        self.version += 1
+
+    def _drop(self, event_id):
+        event = self.events.pop(event_id, None)
+        if event is None:
+            return
+        self.index.remove(event_id)
+        self.series.pop(event_id, None)
+        master_id = event.get("recurringEventId")
+        if master_id:
+            overrides = self.overrides.get(master_id, {})
+            original = original_start(event, self.tz)
+            if overrides.get(original) == event_id:
+                del overrides[original]
+        self.version += 1
+
+    # --- Reads ---
+
+    def _expand(self, lo, hi):
+        """Master instances overlapping [lo, hi), cached per day-aligned window."""
+        if self._windows_version != self.version:
+            self._windows.clear()
+            self._windows_version = self.version
+        key = (lo // 86400 * 86400, -(-hi // 86400) * 86400)
+        expanded = self._windows.get(key)
+        if expanded is None:
+            expanded = []
+            for master_id, series in self.series.items():
+                expanded.extend(series.between(key[0], key[1], skip=self.overrides.get(master_id, {})))
+            self._windows[key] = expanded
+            if len(self._windows) > WINDOW_CACHE_SIZE:
+                self._windows.popitem(last=False)
+        else:
+            self._windows.move_to_end(key)
+        return [(s, e, ev) for s, e, ev in expanded
+                if s < hi and (e > lo or (s == e and s >= lo))]
+
+    def entries_between(self, start_ts, end_ts=None):
+        """[(start_ts, end_ts, event)] overlapping [start_ts, end_ts), sorted by start time.
+
+        Open-ended reads include every stored single event, but expand series
+        only up to `horizon_days` ahead.
+        """
+        with self._lock:
+            entries = [(*self.index.bounds(k), self.events[k]) for k in self.index.overlapping(start_ts, end_ts)]
+            if end_ts is None:
+                end_ts = max(start_ts, time.time()) + self.horizon_days * 86400
+            entries.extend(self._expand(start_ts, end_ts))
+            entries.sort(key=lambda entry: (entry[0], entry[2]["id"]))
+            return entries
+
+    def entries(self):
+        """Everything the store covers from `past_days` ago (series up to `horizon_days` ahead)."""
+        return self.entries_between(time.time() - self.past_days * 86400)
+
+    def events_between(self, start_ts, end_ts=None, limit=None):
+        """Events overlapping [start_ts, end_ts), sorted by start time."""
+        return [event for _, _, event in self.entries_between(start_ts, end_ts)[:limit]]
+
+    def next_event(self, now_ts):
+        """Earliest-starting event that hasn't ended by `now_ts`, or None."""
+        with self._lock:
+            best = None
+            key = self.index.first(now_ts)
+            if key:
+                best = (self.index.bounds(key)[0], key, self.events[key])
+            for master_id, series in self.series.items():
+                hit = series.first_after(now_ts, skip=self.overrides.get(master_id, {}))
+                if hit and (best is None or (hit[0], hit[2]["id"]) < best[:2]):
+                    best = (hit[0], hit[2]["id"], hit[2])
+            return best[2] if best else None
@@ -0,0 +1,496 @@
+"""
+Fake Calendar backend — an in-process stand-in for the Calendar v3 client.
+
+FakeCalendar answers the calls this project makes, with the same request
+objects and response shapes as the googleapiclient service:
+calendarList().list, events().list/get/insert/update/patch/delete,
+freebusy().query and new_batch_http_request(). That makes the hot paths in
+google_calendar.py measurable and testable without a Google account:
+
+    google_calendar.use_service(FakeCalendar.from_fixture(synthetic(10, 5000)))
+
+Behaviour that matters to callers is modelled: syncToken incremental lists
+(deletions come back as cancelled tombstones; an unknown token is a 410),
+singleEvents expansion of recurring masters with their exceptions,
+timeMin/timeMax/orderBy/paging, privateExtendedProperty lookups, calendar
+list ETags (304 on If-None-Match), "primary" as an alias for the calendar
+flagged primary, and HttpErrors for missing events.
+`fields=` masks are accepted and ignored.
+
+Every round trip sleeps for `latency` seconds (a number, or a callable
+returning one for jitter); requests awaited on the async path
+(calendar_core.async_http) sleep with asyncio instead. A batch costs one round trip no matter how many
+parts it has. `round_trips` and `calls` count what was sent.
+
+Fixtures are plain JSON, {"calendars": [{"id", "summary", ..., "events": [...]}]}.
+`synthetic()` generates one, `record_fixture()` captures one from a real
+account, and `save_fixture()` writes the fake's current state back out.
+"""
+
+import asyncio
+import itertools
+import json
+import random
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from calendar_core.event_store import event_bounds
+from calendar_core.recurrence import Series, instance_start, original_start
+from calendar_core.tracing import span
+
+DEFAULT_PAGE_SIZE = 250
+MAX_PAGE_SIZE = 2500
+
+# Open-ended singleEvents lists expand series this far past timeMin
+EXPANSION_HORIZON = 366 * 86400
+
+
+class FakeCalendar:
+    def __init__(self, calendars=(), latency=0.0, tz="UTC"):
+        self.tz = tz
+        self.latency = latency
+        self.calendars = {}         # calendar id -> calendarList entry
+        self.resources = {}         # calendar id -> {event id: resource}
+        self.changes = {}           # calendar id -> {event id: change sequence}
+        self.round_trips = 0
+        self.calls = Counter()      # "events.list" etc. -> count
+        self._seq = itertools.count(1)
+        self._cursors = {}          # page token -> (items, offset, sync token)
+        self._lock = threading.RLock()
+        for calendar in calendars:
+            self.add_calendar(calendar)
+
+    @classmethod
+    def from_fixture(cls, fixture, **kwargs):
+        """A fake seeded from a fixture dict or the path of a fixture JSON file."""
+        if isinstance(fixture, str):
+            with open(fixture) as f:
+                fixture = json.load(f)
+        return cls(fixture.get("calendars", []), **kwargs)
+
+    def add_calendar(self, calendar):
+        calendar = dict(calendar)
+        events = calendar.pop("events", [])
+        calendar.setdefault("summary", calendar["id"])
+        calendar.setdefault("accessRole", "owner")
+        calendar.setdefault("timeZone", self.tz)
+        with self._lock:
+            self.calendars[calendar["id"]] = calendar
+            self.resources.setdefault(calendar["id"], {})
+            self.changes.setdefault(calendar["id"], {})
+            for event in events:
+                self._store(calendar["id"], dict(event))
+
+    def resolve(self, calendar_id):
+        """The real ID behind "primary" (the calendar flagged primary), as the API treats it."""
+        if calendar_id == "primary":
+            with self._lock:
+                for cal_id, meta in self.calendars.items():
+                    if meta.get("primary"):
+                        return cal_id
+        return calendar_id
+
+    def to_fixture(self):
+        with self._lock:
+            return {"calendars": [dict(meta, events=[e for e in self.resources[cal_id].values()
+                                                     if e.get("status") != "cancelled"])
+                                  for cal_id, meta in self.calendars.items()]}
+
+    # --- Service surface ---
+
+    def calendarList(self):
+        return _Resource(self, "calendarList", list=self._calendar_list)
+
+    def events(self):
+        return _Resource(self, "events", list=self._list, get=self._get, insert=self._insert,
+                         update=self._update, patch=self._patch, delete=self._delete)
+
+    def freebusy(self):
+        return _Resource(self, "freebusy", query=self._freebusy)
+
+    def new_batch_http_request(self, callback=None):
+        return _Batch(self, callback)
+
+    # --- Round trips ---
+
+    def _round_trip(self):
+        delay = self.latency() if callable(self.latency) else self.latency
+        if delay:
+            time.sleep(delay)
+        with self._lock:
+            self.round_trips += 1
+
+    async def _round_trip_async(self):
+        delay = self.latency() if callable(self.latency) else self.latency
+        if delay:
+            await asyncio.sleep(delay)
+        with self._lock:
+            self.round_trips += 1
+
+    def _run(self, request):
+        with self._lock:
+            self.calls[request.method_id] += 1
+            return request.fn(request)
+
+    # --- calendarList ---
+
+    def _calendar_list(self, request, pageToken=None, maxResults=None, fields=None, **_):
+        with self._lock:
+            items = _clone(list(self.calendars.values()))
+        etag = '"%08x"' % zlib.crc32(json.dumps(items, sort_keys=True).encode())
+        if request.headers.get("If-None-Match") == etag:
+            raise _error(304, "Not Modified")
+        return {"etag": etag, "items": items}
+
+    # --- events ---
+
+    def _events_of(self, calendar_id):
+        events = self.resources.get(calendar_id)
+        if events is None:
+            raise _error(404, "Not Found")
+        return events
+
+    def _store(self, calendar_id, event):
+        event.setdefault("id", uuid.uuid4().hex)
+        event.setdefault("status", "confirmed")
+        event["updated"] = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+        event["etag"] = '"%d"' % next(self._seq)
+        self.resources[calendar_id][event["id"]] = event
+        self.changes[calendar_id][event["id"]] = int(event["etag"].strip('"'))
+        return event
+
+    def _list(self, request, calendarId, timeMin=None, timeMax=None, singleEvents=False,
+              orderBy=None, maxResults=None, pageToken=None, syncToken=None,
+              privateExtendedProperty=None, showDeleted=False, fields=None, **_):
+        if pageToken:
+            return self._page(pageToken, maxResults)
+        events = self._events_of(calendarId)
+        latest = max(self.changes[calendarId].values(), default=0)
+        if syncToken:
+            cal_id, _, seq = syncToken.rpartition(":")
+            if cal_id != calendarId or not seq.isdigit() or int(seq) > latest:
+                raise _error(410, "Sync token is no longer valid, a full sync is required.")
+            changed = self.changes[calendarId]
+            items = [event for event_id, event in events.items() if changed[event_id] > int(seq)]
+        else:
+            items = [event for event in events.values()
+                     if showDeleted or event.get("status") != "cancelled"
+                     or (event.get("recurringEventId") and not singleEvents)]
+        if privateExtendedProperty:
+            key, _, value = privateExtendedProperty.partition("=")
+            items = [e for e in items if e.get("extendedProperties", {}).get("private", {}).get(key) == value]
+
+        lo = _parse_ts(timeMin) if timeMin else None
+        hi = _parse_ts(timeMax) if timeMax else None
+        if singleEvents:
+            entries = self._expand(calendarId, items, lo, hi)
+        else:
+            # Masters match if the series could reach the window; their bounds are the first occurrence
+            entries = [(*event_bounds(e, self.tz), e) for e in items if e.get("status") != "cancelled"]
+            entries = [(s, t, e) for s, t, e in entries
+                       if e.get("recurrence") or _in_window(s, t, lo, hi)]
+            entries += [(0, 0, e) for e in items if e.get("status") == "cancelled"]
+        if orderBy == "startTime":
+            entries.sort(key=lambda entry: (entry[0], entry[2]["id"]))
+        items = _clone([e for _, _, e in entries])
+        return self._page(None, maxResults, items=items, sync_token=f"{calendarId}:{latest}")
+
+    def _expand(self, calendar_id, items, lo, hi):
+        lo = lo if lo is not None else 0
+        hi = hi if hi is not None else lo + EXPANSION_HORIZON
+        masters = {event["id"]: event for event in items if event.get("recurrence")}
+        skip, entries = {}, []
+        for event in self.resources[calendar_id].values():
+            # Exceptions (moved, edited or cancelled) replace their occurrence
+            if event.get("recurringEventId") in masters:
+                skip.setdefault(event["recurringEventId"], set()).add(original_start(event, self.tz))
+        for event in items:
+            if event.get("status") == "cancelled" or event.get("recurrence"):
+                continue
+            start, end = event_bounds(event, self.tz)
+            if _in_window(start, end, lo, hi):
+                entries.append((start, end, event))
+        for master_id, master in masters.items():
+            if master.get("status") == "cancelled":
+                continue
+            entries.extend(Series(master, self.tz).between(lo, hi, skip=skip.get(master_id, ())))
+        return entries
+
+    def _page(self, token, max_results, items=None, sync_token=None):
+        size = min(max_results or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+        if token is not None:
+            try:
+                items, offset, sync_token = self._cursors.pop(token)
+            except KeyError:
+                raise _error(400, "Invalid page token")
+        else:
+            offset = 0
+        page = {"items": items[offset:offset + size]}
+        if offset + size < len(items):
+            page["nextPageToken"] = uuid.uuid4().hex
+            self._cursors[page["nextPageToken"]] = (items, offset + size, sync_token)
+        else:
+            page["nextSyncToken"] = sync_token
+        return page
+
+    def _lookup(self, calendar_id, event_id):
+        """The stored resource for `event_id`, materializing a recurring instance if needed."""
+        events = self._events_of(calendar_id)
+        event = events.get(event_id)
+        if event is not None:
+            if event.get("status") == "cancelled" and not event.get("recurringEventId"):
+                raise _error(410, "Resource has been deleted")
+            return event
+        master_id, _, _ = event_id.rpartition("_")
+        master = events.get(master_id)
+        ts = instance_start(event_id, self.tz)
+        if master and master.get("recurrence") and ts is not None:
+            for _, _, instance in Series(master, self.tz).between(ts, ts + 1):
+                if instance["id"] == event_id:
+                    return instance
+        raise _error(404, "Not Found")
+
+    def _get(self, request, calendarId, eventId, fields=None, **_):
+        return _clone(self._lookup(calendarId, eventId))
+
+    def _insert(self, request, calendarId, body, conferenceDataVersion=0, sendUpdates=None, **_):
+        self._events_of(calendarId)
+        event = _clone(body)
+        event.pop("id", None)
+        create = event.get("conferenceData", {}).get("createRequest")
+        if create and conferenceDataVersion:
+            event["hangoutLink"] = "https://meet.google.com/" + uuid.uuid4().hex[:10]
+        event = self._store(calendarId, event)
+        event["htmlLink"] = f"https://calendar.google.com/event?eid={event['id']}"
+        return _clone(event)
+
+    def _update(self, request, calendarId, eventId, body, **_):
+        current = self._lookup(calendarId, eventId)
+        event = _clone(body)
+        event["id"] = eventId
+        for key in ("recurringEventId", "originalStartTime", "htmlLink"):
+            if key in current:
+                event.setdefault(key, current[key])
+        return _clone(self._store(calendarId, event))
+
+    def _patch(self, request, calendarId, eventId, body, **_):
+        event = _clone(self._lookup(calendarId, eventId))
+        event.update(_clone(body))
+        return _clone(self._store(calendarId, event))
+
+    def _delete(self, request, calendarId, eventId, **_):
+        event = self._lookup(calendarId, eventId)
+        tombstone = {"id": eventId, "status": "cancelled"}
+        if event.get("recurringEventId"):
+            # Deleting one instance leaves a cancelled exception behind
+            tombstone.update(recurringEventId=event["recurringEventId"],
+                             originalStartTime=event["originalStartTime"])
+        else:
+            for other in list(self.resources[calendarId].values()):
+                if other.get("recurringEventId") == eventId:
+                    self._store(calendarId, {"id": other["id"], "status": "cancelled",
+                                             "recurringEventId": eventId,
+                                             "originalStartTime": other["originalStartTime"]})
+        self._store(calendarId, tombstone)
+        return ""
+
+    # --- freebusy ---
+
+    def _freebusy(self, request, body, fields=None, **_):
+        lo, hi = _parse_ts(body["timeMin"]), _parse_ts(body["timeMax"])
+        calendars = {}
+        for item in body.get("items", []):
+            # Answered under the ID that was asked for, even when that's "primary"
+            key, cal_id = item["id"], self.resolve(item["id"])
+            if cal_id not in self.resources:
+                calendars[key] = {"busy": [], "errors": [{"domain": "global", "reason": "notFound"}]}
+                continue
+            busy = sorted((max(s, lo), min(e, hi))
+                          for s, e, event in self._expand(cal_id, list(self.resources[cal_id].values()), lo, hi)
+                          if event.get("transparency") != "transparent" and e > s)
+            calendars[key] = {"busy": [{"start": _rfc3339(s), "end": _rfc3339(e)} for s, e in _merge(busy)]}
+        return {"kind": "calendar#freeBusy", "timeMin": body["timeMin"], "timeMax": body["timeMax"],
+                "calendars": calendars}
+
+
+class _Resource:
+    def __init__(self, fake, name, **methods):
+        self._fake = fake
+        self._name = name
+        self._methods = methods
+
+    def __getattr__(self, method):
+        fn = self._methods.get(method)
+        if fn is None:
+            raise AttributeError(f"FakeCalendar has no {self._name}().{method}()")
+
+        def build(**kwargs):
+            if "calendarId" in kwargs:
+                kwargs["calendarId"] = self._fake.resolve(kwargs["calendarId"])
+            return _Request(self._fake, f"{self._name}.{method}", lambda request: fn(request, **kwargs))
+
+        return build
+
+
+class _Request:
+    """Mirrors googleapiclient's HttpRequest: `execute()` and a `headers` dict.
+
+    `execute_async()` is what calendar_core.async_http awaits instead of
+    sending HTTP, so the async path sees the same latency without blocking.
+    """
+
+    def __init__(self, fake, method_id, fn):
+        self.fake = fake
+        self.method_id = method_id
+        self.fn = fn
+        self.headers = {}
+
+    def execute(self, http=None, num_retries=0):
+        with span("calendar_api", method=self.method_id):
+            self.fake._round_trip()
+            return self.fake._run(self)
+
+    async def execute_async(self):
+        with span("calendar_api", method=self.method_id):
+            await self.fake._round_trip_async()
+            return self.fake._run(self)
+
+
+class _Batch:
+    def __init__(self, fake, callback):
+        self.fake = fake
+        self.callback = callback
+        self.parts = []
+
+    def add(self, request, callback=None, request_id=None):
+        self.parts.append((request_id or str(len(self.parts)), request, callback))
+
+    def execute(self, http=None):
+        self.fake._round_trip()
+        for request_id, request, callback in self.parts:
+            try:
+                response, exception = self.fake._run(request), None
+            except HttpError as e:
+                response, exception = None, e
+            (callback or self.callback)(request_id, response, exception)
+
+
+# --- Fixtures ---
+
+WORDS = ("Standup", "Lecture", "Lab", "Office hours", "Gym", "Dentist", "Lunch with Sam", "1:1",
+         "Project sync", "Design review", "Study group", "Dinner", "Flight", "Haircut", "Interview",
+         "Planning", "Recital", "Seminar", "Exam", "Soccer practice")
+
+
+def synthetic(n_calendars=1, n_events=100, days=90, past_days=30, recurring=0.02, all_day=0.05,
+              seed=0, tz="UTC", start=None):
+    """A fixture with `n_events` spread across `n_calendars` over roughly [-past_days, +days].
+
+    A `recurring` share of the events are weekly series and an `all_day`
+    share are all-day events; the rest are 15 to 180 minute timed events on
+    quarter-hour boundaries between 7am and 9pm.
+    """
+    rng = random.Random(seed)
+    base = (start or datetime.now(timezone.utc)).replace(hour=0, minute=0, second=0, microsecond=0)
+    calendars = [{"id": "owner@example.com" if i == 0 else f"cal{i:03d}@group.calendar.google.com",
+                  "summary": "Personal" if i == 0 else f"Calendar {i}", "primary": i == 0,
+                  "accessRole": "owner", "timeZone": tz, "events": []}
+                 for i in range(max(1, n_calendars))]
+    for i in range(n_events):
+        day = base + timedelta(days=rng.randint(-past_days, days))
+        summary = rng.choice(WORDS)
+        event = {"id": f"evt{i:06d}", "summary": summary, "status": "confirmed"}
+        roll = rng.random()
+        if roll < all_day:
+            event["start"] = {"date": day.date().isoformat()}
+            event["end"] = {"date": (day + timedelta(days=1)).date().isoformat()}
+        else:
+            begin = day + timedelta(minutes=rng.randrange(7 * 60, 21 * 60, 15))
+            end = begin + timedelta(minutes=rng.choice((15, 30, 45, 60, 90, 120, 180)))
+            event["start"] = {"dateTime": begin.isoformat(), "timeZone": tz}
+            event["end"] = {"dateTime": end.isoformat(), "timeZone": tz}
+            if roll < all_day + recurring:
+                event["recurrence"] = [f"RRULE:FREQ=WEEKLY;COUNT={rng.randint(4, 16)}"]
+        if rng.random() < 0.3:
+            event["location"] = f"Room {rng.randint(100, 400)}"
+        if rng.random() < 0.2:
+            event["description"] = f"{summary} notes " * rng.randint(5, 40)
+        calendars[rng.randrange(len(calendars))]["events"].append(event)
+    return {"calendars": calendars}
+
+
+def record_fixture(service, path, calendar_ids=None, past_days=30, days=365):
+    """Capture calendars and their unexpanded events from a real service into a fixture file."""
+    calendars = service.calendarList().list().execute().get("items", [])
+    if calendar_ids is not None:
+        calendars = [c for c in calendars if c["id"] in calendar_ids]
+    now = datetime.now(timezone.utc)
+    time_min = _rfc3339((now - timedelta(days=past_days)).timestamp())
+    time_max = _rfc3339((now + timedelta(days=days)).timestamp())
+    fixture = {"calendars": []}
+    for calendar in calendars:
+        events, page_token = [], None
+        while True:
+            page = service.events().list(calendarId=calendar["id"], timeMin=time_min, timeMax=time_max,
+                                          singleEvents=False, maxResults=MAX_PAGE_SIZE,
+                                          pageToken=page_token).execute()
+            events.extend(page.get("items", []))
+            page_token = page.get("nextPageToken")
+            if not page_token:
+                break
+        keep = ("id", "summary", "primary", "accessRole", "timeZone")
+        fixture["calendars"].append(dict({k: calendar[k] for k in keep if k in calendar}, events=events))
+    save_fixture(fixture, path)
+    return fixture
+
+
+def save_fixture(fixture, path):
+    if isinstance(fixture, FakeCalendar):
+        fixture = fixture.to_fixture()
+    with open(path, "w") as f:
+        json.dump(fixture, f)
+
+
+# --- Helpers ---
+
+def _clone(obj):
+    # Responses are decoded JSON on the real client too; nothing handed out aliases our state
+    return json.loads(json.dumps(obj))
+
+
+def _error(status, message):
+    content = json.dumps({"error": {"code": status, "message": message,
+                                    "errors": [{"reason": "notFound" if status == 404 else "invalid",
+                                                "message": message}]}}).encode()
+    return HttpError(httplib2.Response({"status": status}), content)
+
+
+def _parse_ts(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+def _rfc3339(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _in_window(start, end, lo, hi):
+    if hi is not None and start >= hi:
+        return False
+    return lo is None or end > lo or (start == end and start >= lo)
+
+
+def _merge(periods):
+    merged = []
+    for start, end in periods:
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
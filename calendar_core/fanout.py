@@ -0,0 +1,145 @@
+"""
+Fan-out helpers for running one Calendar API request per calendar.
+
+Requests are passed in as {key: HttpRequest} and come back as two dicts,
+(results, errors), keyed the same way, so a failure on one calendar is
+reported next to the others instead of aborting the whole read.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from calendar_core.tracing import span
+
+
+def execute_serial(requests):
+    """Execute each request in turn (one round trip per request)."""
+    results, errors = {}, {}
+    for key, request in requests.items():
+        try:
+            results[key] = request.execute()
+        except Exception as e:
+            errors[key] = e
+    return results, errors
+
+
+def execute_batched(service, requests, batch_size=50, scheduler=None):
+    """Send requests as multipart batch calls of up to `batch_size` parts each.
+
+    The Calendar API accepts at most 50 requests per batch. With a
+    `scheduler`, each batch is charged one quota token per part, and parts
+    that come back rate-limited or with a transient server error are sent
+    again in a later batch after a backoff.
+    """
+    results, errors = {}, {}
+    keys = list(requests)
+
+    def callback(request_id, response, exception):
+        key = keys[int(request_id)]
+        if exception is not None:
+            errors[key] = exception
+        else:
+            results[key] = response
+
+    batch_size = max(1, min(batch_size, 50))
+    pending = list(range(len(keys)))
+    started, attempt = time.monotonic(), 0
+    while pending:
+        for offset in range(0, len(pending), batch_size):
+            chunk = pending[offset:offset + batch_size]
+            batch = service.new_batch_http_request(callback=callback)
+            for idx in chunk:
+                batch.add(requests[keys[idx]], request_id=str(idx))
+            try:
+                with span("calendar_api", method="batch") as info:
+                    info["parts"] = len(chunk)
+                    if scheduler is not None:
+                        with scheduler.cost(len(chunk)):
+                            batch.execute()
+                    else:
+                        batch.execute()
+            except Exception as e:
+                # The whole multipart call failed; charge it to every part in it
+                for idx in chunk:
+                    if keys[idx] not in results:
+                        errors.setdefault(keys[idx], e)
+
+        if scheduler is None:
+            break
+        retry = [idx for idx in pending if _retry_kind(scheduler, errors.get(keys[idx]))]
+        for idx in retry:
+            scheduler.count(_retry_kind(scheduler, errors[keys[idx]]))
+        delay = scheduler.backoff(attempt)
+        if not retry or attempt >= scheduler.max_retries or time.monotonic() - started + delay > scheduler.deadline:
+            if retry:
+                scheduler.count("gave_up", len(retry))
+            break
+        scheduler.count("retries", len(retry))
+        time.sleep(delay)
+        for idx in retry:
+            del errors[keys[idx]]
+        pending, attempt = retry, attempt + 1
+    return results, errors
+
+
+def _retry_kind(scheduler, error):
+    resp = getattr(error, "resp", None)
+    if resp is None:
+        return None
+    return scheduler.retryable(resp.status, getattr(error, "content", b""))
+
+
+class ParallelExecutor:
+    """Runs requests on a bounded thread pool, one authorized Http per thread.
+
+    httplib2.Http isn't thread-safe, so each worker builds its own through
+    `http_factory` and passes it to `request.execute(http=...)` rather than
+    sharing the one behind the module-level service. `deadline` bounds how
+    long a fan-out waits; calls still running after it are reported as
+    TimeoutError.
+    """
+
+    def __init__(self, http_factory, max_workers=8, deadline=30):
+        self.http_factory = http_factory
+        self.max_workers = max_workers
+        self.deadline = deadline
+        self._local = threading.local()
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def http(self):
+        """The calling thread's own authorized Http object."""
+        http = getattr(self._local, "http", None)
+        if http is None:
+            http = self._local.http = self.http_factory()
+        return http
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix="calendar-fanout")
+            return self._pool
+
+    def map(self, fn, keys):
+        """Call fn(key, http) for every key concurrently. Returns (results, errors)."""
+        pool = self._get_pool()
+        futures = {pool.submit(lambda k=key: fn(k, self.http())): key for key in keys}
+        done, pending = wait(futures, timeout=self.deadline)
+
+        results, errors = {}, {}
+        for future in done:
+            key = futures[future]
+            try:
+                results[key] = future.result()
+            except Exception as e:
+                errors[key] = e
+        for future in pending:
+            future.cancel()
+            errors[futures[future]] = TimeoutError(f"No response within {self.deadline}s")
+        return results, errors
+
+    def execute(self, requests):
+        """Execute {key: HttpRequest} concurrently. Returns (results, errors)."""
+        return self.map(lambda key, http: requests[key].execute(http=http), list(requests))
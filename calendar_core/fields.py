@@ -0,0 +1,25 @@
+"""
+Partial-response profiles — `fields=` masks for the Calendar reads we make.
+
+A full event resource carries descriptions, attendee lists, conference data,
+links and more, but most read paths only look at a few of those. Each path
+names the profile matching what it actually reads, so the API leaves the
+rest out of the response, which saves both transfer and JSON decode time.
+(Responses are gzip-compressed on top of that.)
+"""
+
+EVENT_BOUNDS = "id,status,summary,start,end"
+EVENT_RECORD = EVENT_BOUNDS + ",location,description,attendees/email,recurrence,recurringEventId,hangoutLink"
+
+PROFILES = {
+    # Next-event and conflict checks: what an event is called and when it is
+    "bounds": f"nextPageToken,items({EVENT_BOUNDS})",
+    # Listings and lookups that build full event records
+    "records": f"nextPageToken,items({EVENT_RECORD})",
+    # Local store syncs: records plus what series expansion needs, and the sync token
+    "sync": f"nextPageToken,nextSyncToken,items({EVENT_RECORD},originalStartTime)",
+    # Upsert lookups by external ID
+    "external_id": "items(id,extendedProperties/private)",
+    "calendars": "etag,nextPageToken,items(id,summary,primary,accessRole,timeZone)",
+    "freebusy": "calendars",
+}
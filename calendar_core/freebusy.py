@@ -0,0 +1,63 @@
+"""
+FreeBusy planner — splits one availability question into API-sized queries.
+
+freebusy().query() caps how many calendars a request may list and how long
+its time window may be, so a semester-long question across every calendar
+is cut into a grid of (calendar group x time window) chunks. Busy periods
+from all chunks are stitched back together as epoch-second pairs; periods
+cut at a window boundary touch and are re-joined by intervals.merge().
+"""
+
+from datetime import datetime, timezone
+
+
+def plan(calendar_ids, lo, hi, max_calendars=50, max_window_days=60):
+    """Split [lo, hi) over `calendar_ids` into [(ids, chunk_lo, chunk_hi), ...]."""
+    max_calendars = max(1, max_calendars)
+    step = max(1, int(max_window_days * 86400))
+    groups = [calendar_ids[i:i + max_calendars] for i in range(0, len(calendar_ids), max_calendars)]
+    chunks = []
+    for group in groups:
+        chunk_lo = lo
+        while chunk_lo < hi:
+            chunk_hi = min(chunk_lo + step, hi)
+            chunks.append((group, chunk_lo, chunk_hi))
+            chunk_lo = chunk_hi
+    return chunks
+
+
+def build_requests(service, chunks, fields=None):
+    """One freebusy().query() request per chunk, keyed by chunk index."""
+    requests = {}
+    for idx, (ids, chunk_lo, chunk_hi) in enumerate(chunks):
+        body = {
+            "timeMin": _rfc3339(chunk_lo),
+            "timeMax": _rfc3339(chunk_hi),
+            "items": [{"id": cal_id} for cal_id in ids],
+        }
+        requests[idx] = service.freebusy().query(body=body, fields=fields)
+    return requests
+
+
+def collect_busy(responses):
+    """Stitch busy periods from chunk responses.
+
+    Returns (busy, errors): busy is [(start_ts, end_ts), ...] and errors maps
+    calendar IDs to the reasons the API reported for them.
+    """
+    busy, errors = [], {}
+    for response in responses:
+        for cal_id, cal_data in response.get("calendars", {}).items():
+            if cal_data.get("errors"):
+                errors[cal_id] = ", ".join(e.get("reason", "unknown") for e in cal_data["errors"])
+            for period in cal_data.get("busy", []):
+                busy.append((_ts(period["start"]), _ts(period["end"])))
+    return busy, errors
+
+
+def _rfc3339(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _ts(value):
+    return int(datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp())
@@ -0,0 +1,90 @@
+"""
+Interval index — answers "which events overlap [start, end)?" in O(log n + k).
+
+Entries are split by length. Short ones (at most `long_threshold` seconds,
+which is nearly every event) live in a start-sorted list: anything that can
+overlap a window must start within `long_threshold` before it, so a bisect
+bounds the scan. The few long ones (multi-day trips, all-week blocks) are
+kept aside and checked directly. Adds and removes are incremental, so the
+index stays current on every write without re-sorting.
+"""
+
+import bisect
+
+
+class IntervalIndex:
+    def __init__(self, long_threshold=86400):
+        self.long_threshold = long_threshold
+        self._short = []      # sorted [(start, end, key)]
+        self._long = {}       # key -> (start, end)
+        self._bounds = {}     # key -> (start, end)
+
+    def __len__(self):
+        return len(self._bounds)
+
+    def __contains__(self, key):
+        return key in self._bounds
+
+    def bounds(self, key):
+        return self._bounds[key]
+
+    def add(self, key, start, end):
+        """Insert or move `key` to [start, end)."""
+        self.remove(key)
+        self._bounds[key] = (start, end)
+        if end - start > self.long_threshold:
+            self._long[key] = (start, end)
+        else:
+            bisect.insort(self._short, (start, end, key))
+
+    def remove(self, key):
+        bounds = self._bounds.pop(key, None)
+        if bounds is None:
+            return
+        if self._long.pop(key, None) is None:
+            idx = bisect.bisect_left(self._short, (bounds[0], bounds[1], key))
+            if idx < len(self._short) and self._short[idx][2] == key:
+                del self._short[idx]
+
+    def clear(self):
+        self._short.clear()
+        self._long.clear()
+        self._bounds.clear()
+
+    def overlapping(self, start, end=None):
+        """Keys overlapping [start, end), sorted by (start, key).
+
+        `end=None` means open-ended. Zero-length entries (deadlines) count when
+        they sit inside the window.
+        """
+        hits = []
+        lo = bisect.bisect_left(self._short, (start - self.long_threshold,))
+        for idx in range(lo, len(self._short)):
+            s, e, key = self._short[idx]
+            if end is not None and s >= end:
+                break
+            if _overlaps(s, e, start):
+                hits.append((s, key))
+        for key, (s, e) in self._long.items():
+            if (end is None or s < end) and _overlaps(s, e, start):
+                hits.append((s, key))
+        hits.sort()
+        return [key for _, key in hits]
+
+    def first(self, start):
+        """Key of the earliest-starting entry that hasn't ended by `start`, or None."""
+        best = None
+        lo = bisect.bisect_left(self._short, (start - self.long_threshold,))
+        for idx in range(lo, len(self._short)):
+            s, e, key = self._short[idx]
+            if _overlaps(s, e, start):
+                best = (s, key)
+                break
+        for key, (s, e) in self._long.items():
+            if _overlaps(s, e, start) and (best is None or (s, key) < best):
+                best = (s, key)
+        return best[1] if best else None
+
+
+def _overlaps(s, e, start):
+    return e > start or (s == e and s >= start)
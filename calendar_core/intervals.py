@@ -0,0 +1,92 @@
+"""
+Busy/free interval engine on NumPy int64 epoch-second arrays.
+
+Intervals are passed around as two parallel arrays, `starts` and `ends`.
+Everything here is vectorized, so merging and gap-finding over a semester of
+busy blocks across every calendar stays a handful of array operations instead
+of a Python loop per interval.
+"""
+
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+
+def to_arrays(intervals):
+    """[(start_ts, end_ts), ...] -> (starts, ends) int64 arrays."""
+    if not intervals:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    arr = np.asarray(intervals, dtype=np.int64).reshape(-1, 2)
+    return arr[:, 0].copy(), arr[:, 1].copy()
+
+
+def merge(starts, ends):
+    """Sort and merge overlapping or touching intervals."""
+    if len(starts) == 0:
+        return starts, ends
+    order = np.argsort(starts, kind="stable")
+    starts, ends = starts[order], ends[order]
+    reach = np.maximum.accumulate(ends)
+    # A new block begins wherever an interval starts after everything before it ended
+    first = np.flatnonzero(np.r_[True, starts[1:] > reach[:-1]])
+    last = np.r_[first[1:] - 1, len(starts) - 1]
+    return starts[first], reach[last]
+
+
+def gaps(starts, ends, lo, hi):
+    """Free gaps inside [lo, hi) around already-merged busy intervals."""
+    gap_starts = np.maximum(np.r_[lo, ends], lo)
+    gap_ends = np.minimum(np.r_[starts, hi], hi)
+    keep = gap_ends > gap_starts
+    return gap_starts[keep], gap_ends[keep]
+
+
+def at_least(starts, ends, min_seconds):
+    """Drop intervals shorter than `min_seconds`."""
+    keep = (ends - starts) >= min_seconds
+    return starts[keep], ends[keep]
+
+
+def off_hours(lo, hi, tz, day_start_hour=0, day_end_hour=24, weekdays=None):
+    """Intervals in [lo, hi) that fall outside working hours, as (starts, ends).
+
+    Working hours are [day_start_hour, day_end_hour) local time in `tz`; days
+    whose weekday (Mon=0) isn't in `weekdays` are blocked entirely. Feed the
+    result in as extra busy time to restrict gaps to working hours.
+    """
+    zone = ZoneInfo(tz)
+    day = datetime.fromtimestamp(lo, zone).replace(hour=0, minute=0, second=0, microsecond=0)
+    last_day = datetime.fromtimestamp(hi, zone).date()
+
+    blocked = []
+    while day.date() <= last_day:
+        midnight = int(day.timestamp())
+        # Step via the calendar date so DST days come out 23h/25h long
+        next_day = datetime.combine(day.date() + timedelta(days=1), datetime.min.time(), zone)
+        next_midnight = int(next_day.timestamp())
+        if weekdays is not None and day.weekday() not in weekdays:
+            blocked.append((midnight, next_midnight))
+        else:
+            open_ts = int(day.replace(hour=min(day_start_hour, 23)).timestamp())
+            close_ts = next_midnight if day_end_hour >= 24 else int(day.replace(hour=day_end_hour).timestamp())
+            if open_ts > midnight:
+                blocked.append((midnight, open_ts))
+            if close_ts < next_midnight:
+                blocked.append((close_ts, next_midnight))
+        day = next_day
+
+    starts, ends = to_arrays(blocked)
+    starts, ends = np.maximum(starts, lo), np.minimum(ends, hi)
+    keep = ends > starts
+    return starts[keep], ends[keep]
+
+
+def free_intervals(busy_starts, busy_ends, lo, hi, min_seconds=0, blocked=None):
+    """Merge busy time (plus optional `blocked` off-hours) and return free gaps."""
+    if blocked is not None:
+        busy_starts = np.concatenate([busy_starts, blocked[0]])
+        busy_ends = np.concatenate([busy_ends, blocked[1]])
+    starts, ends = merge(busy_starts, busy_ends)
+    starts, ends = gaps(starts, ends, lo, hi)
+    return at_least(starts, ends, min_seconds)
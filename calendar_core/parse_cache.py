@@ -0,0 +1,134 @@
+"""
+Parse cache — remembers which tool call Gemini made of a command.
+
+The web UI and the CLI send the same commands over and over ("what do I have
+tomorrow?"). A parse is keyed by the normalized command (case, spacing and
+trailing punctuation don't matter) plus a context string. The caller builds
+that string from the local date the prompt was written for and a fingerprint
+of everything else that shapes the answer: the prompt text with its
+calendars, contacts and duration defaults, the tool declarations, and the
+model. A repeat on the same day under the same config is then answered here
+with no LLM round trip. Relative dates ("tomorrow", "next Tuesday") resolve
+against the date in the key, so each new day starts with fresh parses.
+Phrasing that depends on the time of day ("in 20 minutes", "right now") is
+never cached, and neither is a parse whose start or end lands within a few
+hours of the moment it was made ("what's left today", "the next free hour"):
+the model resolved those from the clock, so replaying them later in the day
+would answer for the wrong time.
+
+Entries expire after `ttl` seconds. Past `max_entries`, the least recently
+used ones are evicted. With a `path`, the cache is saved as JSON (in the
+background, see calendar_core.persist) after every write so it survives
+restarts.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from calendar_core import persist
+from calendar_core.timeparse import parse_datetime
+
+# Commands that resolve against the clock rather than just the date
+CLOCK_RELATIVE = re.compile(
+    r"\b(now|later today|next hour"
+    r"|in (a|an|a few|half an|\d+(\.\d+)?) (min|mins|minutes?|hrs?|hours?)"
+    r"|(minutes?|hours?) from now)\b")
+
+# Tool arguments holding a time: start_str, end_str, new_start_str, start_str_search, ...
+TIME_ARG = re.compile(r"(^|_)(start|end)_str($|_)")
+
+
+def normalize_command(text):
+    return re.sub(r"\s+", " ", text).strip().rstrip("?!.").strip().casefold()
+
+
+def fingerprint(*parts):
+    """Short stable hash of JSON-able context (prompt text, tool declarations, model name)."""
+    blob = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()[:16]
+
+
+def near_clock(args, now, window_seconds):
+    """True if any start/end argument falls within `window_seconds` of `now`, either side."""
+    for name, value in args.items():
+        if not isinstance(value, str) or not TIME_ARG.search(name):
+            continue
+        when = parse_datetime(value)
+        if when is not None and abs(when.timestamp() - now.timestamp()) < window_seconds:
+            return True
+    return False
+
+
+class ParseCache:
+    def __init__(self, path=None, ttl=86400, max_entries=1000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()        # key -> [stored_at, JSON of [tool_name, args]], oldest use first
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def key(command, context):
+        """Cache key for `command` under `context`, or None if it mustn't be cached."""
+        text = normalize_command(command)
+        if not text or CLOCK_RELATIVE.search(text):
+            return None
+        return f"{context}\n{text}"
+
+    def get(self, key):
+        """The cached (tool_name, args), as a fresh copy the caller may modify, or None."""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry[0] >= self.ttl:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+        tool_name, args = json.loads(entry[1])
+        return tool_name, args
+
+    def put(self, key, tool_name, args):
+        blob = json.dumps([tool_name, args], default=str)
+        with self._lock:
+            self.entries[key] = [time.time(), blob]
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        self.save()
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+        self.save()
+
+    # --- Persistence ---
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        # Saved oldest-use first, so the LRU order carries over
+        for key, (stored_at, blob) in entries:
+            if now - stored_at < self.ttl:
+                self.entries[key] = [stored_at, blob]
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            # Written in the background by calendar_core.persist; best-effort, like the cache itself
+            persist.write_later(self.path, list(self.entries.items()))
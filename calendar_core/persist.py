@@ -0,0 +1,72 @@
+"""
+Background JSON writes — keeps saving to disk off the caller's thread.
+
+The event store, parse cache and upsert index save themselves after every
+change. On the web server those changes happen on the event loop, where
+serializing and writing a year of events would stall every other request.
+`write_later()` takes a snapshot (plain lists and dicts) and returns at once;
+a single writer thread turns it into JSON and writes it atomically (temp file
+and rename).
+
+Saves to the same path coalesce: if a file is saved again before its last
+snapshot was written, only the newest one is. Queued writes are flushed at
+interpreter exit, and `flush()` waits for them (e.g. before re-reading a file
+in a test). Writing is best-effort, as the in-memory copy stays authoritative
+and a lost file only means a fuller sync or a cold cache after a restart.
+"""
+
+import atexit
+import json
+import os
+import threading
+
+_pending = {}       # path -> newest snapshot not yet written
+_writing = False
+_cond = threading.Condition()
+_writer = None
+
+
+def write_later(path, data):
+    """Queue `data` to be written to `path` as JSON; returns without touching the disk."""
+    global _writer
+    with _cond:
+        _pending[path] = data
+        if _writer is None:
+            _writer = threading.Thread(target=_write_loop, name="json-writer", daemon=True)
+            _writer.start()
+        _cond.notify_all()
+
+
+def flush():
+    """Block until every queued write has reached the disk."""
+    with _cond:
+        _cond.wait_for(lambda: not _pending and not _writing)
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _write_loop():
+    global _writing
+    while True:
+        with _cond:
+            _cond.wait_for(lambda: _pending)
+            path, data = next(iter(_pending.items()))
+            del _pending[path]
+            _writing = True
+        try:
+            write_json(path, data)
+        except (OSError, TypeError, ValueError):
+            pass    # best-effort; see the module docstring
+        finally:
+            with _cond:
+                _writing = False
+                _cond.notify_all()
+
+
+atexit.register(flush)
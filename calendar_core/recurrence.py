@@ -0,0 +1,164 @@
+"""
+Recurrence engine — expands a recurring event's master locally.
+
+The event store syncs series as one master event (with RRULE/EXRULE/RDATE/
+EXDATE lines) plus its exceptions, instead of asking the API to expand every
+instance. `Series` turns a master back into instances for any window on
+demand.
+
+Rules are evaluated in wall-clock time in the event's own timezone, as
+RFC 5545 requires, so a 9am class stays at 9am across DST changes. Each
+occurrence is then pinned to an absolute time. Instances are shaped like the
+API's own expanded instances: the ID is `<masterId>_<UTC start>` (or
+`_<date>` for all-day events), with `recurringEventId` and
+`originalStartTime` set. An exception the API sends for an instance carries
+the same ID, so it replaces that occurrence exactly.
+"""
+
+import re
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from dateutil.rrule import rruleset, rrulestr
+
+UNTIL_RE = re.compile(r"UNTIL=(\d{8})(T\d{6})?(Z)?", re.IGNORECASE)
+
+# Upper bound on occurrences scanned when looking for the next one
+MAX_SCAN = 5000
+
+
+class Series:
+    """A recurring master event, ready to expand."""
+
+    def __init__(self, master, tz="UTC"):
+        self.master = master
+        start, end = master["start"], master["end"]
+        self.all_day = "date" in start
+        if self.all_day:
+            self.zone = ZoneInfo(tz)
+            self.dtstart = datetime.fromisoformat(start["date"])
+            self.duration = datetime.fromisoformat(end["date"]) - self.dtstart
+        else:
+            self.zone = ZoneInfo(start.get("timeZone") or tz)
+            first = _aware(start, self.zone)
+            self.dtstart = first.astimezone(self.zone).replace(tzinfo=None)
+            self.duration = _aware(end, self.zone) - first
+        self.rules = self._ruleset(master.get("recurrence", []))
+        self._template = {k: v for k, v in master.items() if k not in ("id", "start", "end", "recurrence")}
+
+    def _ruleset(self, lines):
+        rules = rruleset()
+        for line in lines:
+            name, _, value = line.partition(":")
+            kind, *params = name.split(";")
+            kind = kind.upper()
+            if kind in ("RRULE", "EXRULE"):
+                rule = rrulestr(UNTIL_RE.sub(self._naive_until, value), dtstart=self.dtstart)
+                (rules.rrule if kind == "RRULE" else rules.exrule)(rule)
+            elif kind in ("RDATE", "EXDATE"):
+                for dt in self._dates(value, params):
+                    (rules.rdate if kind == "RDATE" else rules.exdate)(dt)
+        return rules
+
+    def _naive_until(self, match):
+        """Rewrite UNTIL as naive wall-clock time in the series' zone."""
+        day, clock, utc = match.groups()
+        if clock is None:
+            # A bare date includes that whole day
+            until = datetime.strptime(day, "%Y%m%d") + (timedelta(0) if self.all_day else timedelta(days=1, seconds=-1))
+        else:
+            until = datetime.strptime(day + clock, "%Y%m%dT%H%M%S")
+            if utc:
+                until = until.replace(tzinfo=timezone.utc).astimezone(self.zone).replace(tzinfo=None)
+        return "UNTIL=" + until.strftime("%Y%m%dT%H%M%S")
+
+    def _dates(self, value, params):
+        zone = self.zone
+        for param in params:
+            if param.upper().startswith("TZID="):
+                zone = ZoneInfo(param.split("=", 1)[1])
+        for item in value.split(","):
+            item = item.strip()
+            if len(item) == 8:
+                # VALUE=DATE; on a timed series it means that day's occurrence
+                yield datetime.combine(datetime.strptime(item, "%Y%m%d").date(), self.dtstart.time())
+            elif item.endswith("Z"):
+                dt = datetime.strptime(item, "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+                yield dt.astimezone(self.zone).replace(tzinfo=None)
+            elif item:
+                dt = datetime.strptime(item, "%Y%m%dT%H%M%S").replace(tzinfo=zone)
+                yield dt.astimezone(self.zone).replace(tzinfo=None)
+
+    def _occurrence(self, wall):
+        """(start_ts, end_ts, instance) for the occurrence starting at naive wall time `wall`."""
+        start_dt = wall.replace(tzinfo=self.zone)
+        start_ts = start_dt.timestamp()
+        if self.all_day:
+            end_ts = (wall + self.duration).replace(tzinfo=self.zone).timestamp()
+            start = {"date": wall.date().isoformat()}
+            end = {"date": (wall + self.duration).date().isoformat()}
+            suffix = wall.strftime("%Y%m%d")
+        else:
+            end_ts = start_ts + self.duration.total_seconds()
+            zone_name = self.zone.key
+            start = {"dateTime": start_dt.isoformat(), "timeZone": zone_name}
+            end = {"dateTime": datetime.fromtimestamp(end_ts, self.zone).isoformat(), "timeZone": zone_name}
+            suffix = start_dt.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        instance = dict(self._template, id=f"{self.master['id']}_{suffix}", start=start, end=end,
+                        recurringEventId=self.master["id"], originalStartTime=dict(start))
+        return start_ts, end_ts, instance
+
+    def _wall(self, ts):
+        return datetime.fromtimestamp(ts, self.zone).replace(tzinfo=None)
+
+    def between(self, lo, hi, skip=()):
+        """[(start_ts, end_ts, instance)] overlapping [lo, hi), in start order.
+
+        `skip` holds original start timestamps (rounded) of occurrences that
+        exceptions replace or cancel.
+        """
+        hits = []
+        for wall in self.rules.between(self._wall(lo) - self.duration, self._wall(hi), inc=True):
+            start_ts, end_ts, instance = self._occurrence(wall)
+            if start_ts >= hi or round(start_ts) in skip:
+                continue
+            if end_ts > lo or (start_ts == end_ts and start_ts >= lo):
+                hits.append((start_ts, end_ts, instance))
+        return hits
+
+    def first_after(self, ts, skip=()):
+        """The earliest occurrence that hasn't ended by `ts`, or None."""
+        occurrences = self.rules.xafter(self._wall(ts) - self.duration, count=MAX_SCAN, inc=True)
+        for wall in occurrences:
+            start_ts, end_ts, instance = self._occurrence(wall)
+            if round(start_ts) in skip:
+                continue
+            if end_ts > ts or (start_ts == end_ts and start_ts >= ts):
+                return start_ts, end_ts, instance
+        return None
+
+
+def original_start(event, tz="UTC"):
+    """Rounded epoch seconds of an exception's originalStartTime, or None."""
+    when = event.get("originalStartTime")
+    if not when:
+        return None
+    if "date" in when:
+        return round(datetime.fromisoformat(when["date"]).replace(tzinfo=ZoneInfo(tz)).timestamp())
+    return round(_aware(when, ZoneInfo(when.get("timeZone") or tz)).timestamp())
+
+
+def instance_start(event_id, tz="UTC"):
+    """Rounded original start encoded in an instance ID (`<master>_<suffix>`), or None."""
+    _, _, suffix = event_id.rpartition("_")
+    try:
+        if len(suffix) == 8:
+            return round(datetime.strptime(suffix, "%Y%m%d").replace(tzinfo=ZoneInfo(tz)).timestamp())
+        return round(datetime.strptime(suffix, "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc).timestamp())
+    except ValueError:
+        return None
+
+
+def _aware(when, zone):
+    dt = datetime.fromisoformat(when["dateTime"].replace("Z", "+00:00"))
+    return dt if dt.tzinfo else dt.replace(tzinfo=zone)
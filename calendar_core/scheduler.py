@@ -0,0 +1,215 @@
+"""
+Request scheduler — one place that paces, retries and counts API traffic.
+
+Every Calendar request goes out through an Http wrapped by `wrap()` (or, on
+the async path, through `send_async()`), so the scheduler sees it whichever
+code path built it:
+
+- A token bucket holds traffic to `rate` requests per second, with bursts up
+  to `burst`, which keeps us under the per-user quota rather than finding it
+  with errors.
+- Responses that mean "slow down" (429, 403 rateLimitExceeded /
+  userRateLimitExceeded) or a transient server failure (500/502/503/504) are
+  retried with exponential backoff and full jitter.
+- A request never spends more than `deadline` seconds in total, including
+  waiting for tokens and sleeping between attempts. If it can't get a token
+  in time it raises TimeoutError. If retries run out, the last error response
+  is passed through and becomes an HttpError as usual.
+
+Parts of a batch call succeed or fail one by one inside a 200 response, so
+fanout.execute_batched retries those parts itself using `retryable()` and
+`backoff()`.
+"""
+
+import asyncio
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded"}
+SERVER_ERRORS = {500, 502, 503, 504}
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _fill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, cost=1):
+        """Take `cost` tokens if they're there and return 0, else return how long until they are."""
+        need = min(cost, self.capacity)
+        with self._lock:
+            self._fill()
+            if self.tokens >= need:
+                self.tokens -= cost
+                return 0.0
+            return (need - self.tokens) / self.rate
+
+    def acquire(self, cost=1, timeout=None):
+        """Take `cost` tokens, waiting up to `timeout` seconds. Returns the wait, or None on timeout.
+
+        A cost larger than the bucket (a full batch) waits for a full bucket and
+        goes into debt, which later callers pay off.
+        """
+        waited = 0.0
+        while True:
+            wait = self.take(cost)
+            if not wait:
+                return waited
+            if timeout is not None and waited + wait > timeout:
+                return None
+            time.sleep(wait)
+            waited += wait
+
+    async def acquire_async(self, cost=1, timeout=None):
+        """acquire() that sleeps with asyncio instead of blocking the thread."""
+        waited = 0.0
+        while True:
+            wait = self.take(cost)
+            if not wait:
+                return waited
+            if timeout is not None and waited + wait > timeout:
+                return None
+            await asyncio.sleep(wait)
+            waited += wait
+
+
+class RequestScheduler:
+    def __init__(self, rate=10.0, burst=50, max_retries=5, base_delay=0.5, max_delay=32.0, deadline=30.0):
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.counters = {
+            "requests": 0,          # HTTP round trips sent
+            "throttled": 0,         # 429 / 403 rate-limit responses
+            "server_errors": 0,     # retryable 5xx responses
+            "retries": 0,
+            "gave_up": 0,           # retryable failures returned after the last attempt
+            "deadline_exceeded": 0,
+            "token_wait_seconds": 0.0,
+        }
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    # --- Bookkeeping ---
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters)
+
+    # --- Policy ---
+
+    def retryable(self, status, content=b""):
+        """"throttled" or "server_errors" if a response should be retried, else None."""
+        if status == 429 or (status == 403 and _reason(content) in RATE_LIMIT_REASONS):
+            return "throttled"
+        if status in SERVER_ERRORS:
+            return "server_errors"
+        return None
+
+    def backoff(self, attempt):
+        """Full-jitter delay before retry number `attempt` (0-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def acquire(self, cost=1, deadline_at=None):
+        timeout = None if deadline_at is None else max(0.0, deadline_at - time.monotonic())
+        self._charged(self.bucket.acquire(cost, timeout))
+
+    async def acquire_async(self, cost=1, deadline_at=None):
+        timeout = None if deadline_at is None else max(0.0, deadline_at - time.monotonic())
+        self._charged(await self.bucket.acquire_async(cost, timeout))
+
+    def _charged(self, waited):
+        if waited is None:
+            self.count("deadline_exceeded")
+            raise TimeoutError("Request deadline passed while waiting for rate-limit quota")
+        if waited:
+            self.count("token_wait_seconds", waited)
+
+    @contextmanager
+    def cost(self, n):
+        """Charge the next request on this thread as `n` (e.g. the parts of a batch)."""
+        self._local.cost = n
+        try:
+            yield
+        finally:
+            self._local.cost = 1
+
+    # --- Transport ---
+
+    def wrap(self, http):
+        """Route every request made through `http` via this scheduler."""
+        request_orig = http.request
+
+        def request(uri, method="GET", body=None, headers=None, *args, **kwargs):
+            deadline_at = time.monotonic() + self.deadline
+            cost, self._local.cost = getattr(self._local, "cost", 1), 1
+            self.acquire(cost, deadline_at)
+            attempt = 0
+            while True:
+                self.count("requests")
+                resp, content = request_orig(uri, method, body, headers, *args, **kwargs)
+                kind = self.retryable(resp.status, content)
+                if kind is None:
+                    return resp, content
+                self.count(kind)
+                delay = self.backoff(attempt)
+                if attempt >= self.max_retries or time.monotonic() + delay > deadline_at:
+                    self.count("gave_up")
+                    return resp, content
+                self.count("retries")
+                time.sleep(delay)
+                attempt += 1
+                self.acquire(1, deadline_at)
+
+        http.request = request
+        return http
+
+    async def send_async(self, send):
+        """The wrap() policy for an async transport: `send()` is awaited once per attempt.
+
+        Like a wrapped Http's request(), `send()` returns (resp, content) with
+        an httplib2-style `resp.status`, and the last attempt's pair is returned.
+        """
+        deadline_at = time.monotonic() + self.deadline
+        await self.acquire_async(1, deadline_at)
+        attempt = 0
+        while True:
+            self.count("requests")
+            resp, content = await send()
+            kind = self.retryable(resp.status, content)
+            if kind is None:
+                return resp, content
+            self.count(kind)
+            delay = self.backoff(attempt)
+            if attempt >= self.max_retries or time.monotonic() + delay > deadline_at:
+                self.count("gave_up")
+                return resp, content
+            self.count("retries")
+            await asyncio.sleep(delay)
+            attempt += 1
+            await self.acquire_async(1, deadline_at)
+
+
+def _reason(content):
+    try:
+        error = json.loads(content)["error"]
+        return error.get("errors", [{}])[0].get("reason") or error.get("status")
+    except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+        return None
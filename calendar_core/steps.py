@@ -0,0 +1,95 @@
+"""
+I/O steps — write a Calendar routine once, run it blocking or async.
+
+A routine is a generator that yields the requests it needs and is sent their
+results back: `page = yield request`. A failed request is thrown back in at
+the yield, so ordinary try/except works around it. Several requests go out
+together by yielding `FanOut({key: request})`, which is answered with
+(results, errors) like the calendar_core.fanout helpers. Routines compose
+with `yield from`, and whatever a routine returns is the driver's result.
+A routine that has to wait on work another routine is driving yields
+`Wait(future)` with a concurrent.futures.Future that the other one resolves.
+
+`run()` drives a routine with blocking calls, which is what the CLI and the
+sync API use. `run_async()` drives the same generator with awaitable
+executors (see calendar_core.async_http), so an async server awaits the
+network instead of holding a thread for it. The routine itself never knows
+which driver it is running under.
+"""
+
+import asyncio
+
+
+class FanOut:
+    """Several requests at once, as {key: request}; `mode` picks a fanout strategy (see google_calendar)."""
+
+    __slots__ = ("requests", "mode")
+
+    def __init__(self, requests, mode=None):
+        self.requests = requests
+        self.mode = mode
+
+
+class Wait:
+    """Block until a concurrent.futures.Future resolved elsewhere is done; answered with its result."""
+
+    __slots__ = ("future",)
+
+    def __init__(self, future):
+        self.future = future
+
+
+def run(steps, execute=None, fan_out=None):
+    """Drive a routine to completion with blocking calls and return its result.
+
+    `execute(request)` defaults to `request.execute()`; `fan_out(FanOut)`
+    defaults to executing the requests one by one.
+    """
+    execute = execute or _execute
+    fan_out = fan_out or _serial
+    value = error = None
+    while True:
+        try:
+            step = steps.throw(error) if error is not None else steps.send(value)
+        except StopIteration as done:
+            return done.value
+        value = error = None
+        try:
+            if isinstance(step, Wait):
+                value = step.future.result()
+            else:
+                value = fan_out(step) if isinstance(step, FanOut) else execute(step)
+        except Exception as e:
+            error = e
+
+
+async def run_async(steps, execute, fan_out):
+    """Drive a routine with awaitable `execute(request)` and `fan_out(FanOut)` and return its result."""
+    value = error = None
+    while True:
+        try:
+            step = steps.throw(error) if error is not None else steps.send(value)
+        except StopIteration as done:
+            return done.value
+        value = error = None
+        try:
+            if isinstance(step, Wait):
+                value = await asyncio.wrap_future(step.future)
+            else:
+                value = await (fan_out(step) if isinstance(step, FanOut) else execute(step))
+        except Exception as e:
+            error = e
+
+
+def _execute(request):
+    return request.execute()
+
+
+def _serial(step):
+    results, errors = {}, {}
+    for key, request in step.requests.items():
+        try:
+            results[key] = request.execute()
+        except Exception as e:
+            errors[key] = e
+    return results, errors
@@ -0,0 +1,71 @@
+"""
+Time parsing layer — a caching, fast-path front for dateparser.parse.
+
+Gemini and the Calendar API hand us ISO 8601 / RFC 3339 strings almost all
+the time, and datetime.fromisoformat parses those in about a microsecond.
+dateparser (which costs milliseconds per call, and a few hundred ms just to
+import) is only loaded and used for natural language like "tomorrow at 3pm".
+
+Results are kept in a bounded LRU keyed by (text, settings, reference-date
+bucket). ISO strings don't depend on "now", so they share one bucket;
+natural-language results are only reused within the same minute, so
+relative phrases never go stale.
+"""
+
+import re
+import time
+from datetime import datetime
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+from calendar_core.tracing import span
+
+ISO_RE = re.compile(r"^\d{4}-\d{2}-\d{2}([T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?(Z|[+-]\d{2}:?\d{2})?$")
+
+# Settings the fast path knows how to honor; anything else goes to dateparser
+FAST_SETTINGS = {"RETURN_AS_TIMEZONE_AWARE", "PREFER_DATES_FROM", "TIMEZONE"}
+
+CACHE_SIZE = 2048
+
+
+def parse_datetime(text, settings=None):
+    """Drop-in replacement for dateparser.parse(text, settings=settings)."""
+    if not text:
+        return None
+    text = text.strip()
+    settings_key = tuple(sorted(settings.items())) if settings else ()
+    bucket = None if ISO_RE.match(text) else int(time.time() // 60)
+    return _parse_cached(text, settings_key, bucket)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _parse_cached(text, settings_key, bucket):
+    settings = dict(settings_key)
+    if bucket is None and set(settings) <= FAST_SETTINGS:
+        dt = _parse_iso(text, settings)
+        if dt is not None:
+            return dt
+
+    with span("dateparser"):
+        import dateparser
+        return dateparser.parse(text, settings=settings or None)
+
+
+def _parse_iso(text, settings):
+    try:
+        dt = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if dt.tzinfo is None and settings.get("RETURN_AS_TIMEZONE_AWARE"):
+        tz = settings.get("TIMEZONE")
+        # Like dateparser, naive input is read as local time unless a zone is given
+        dt = dt.replace(tzinfo=ZoneInfo(tz)) if tz and tz != "local" else dt.astimezone()
+    return dt
+
+
+def cache_info():
+    return _parse_cached.cache_info()
+
+
+def clear_cache():
+    _parse_cached.cache_clear()
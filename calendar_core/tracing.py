@@ -0,0 +1,161 @@
+"""
+Tracing — timing spans and histograms around every stage of a command.
+
+Wrap a stage in `span("gemini")` (labels optional, e.g.
+`span("calendar_api", method="events.list")`) and its latency lands in a
+histogram, labelled by stage, which `registry.render()` exposes in
+Prometheus text format at /metrics. Counters (Gemini tokens, say) go through
+`registry.inc()`.
+
+Inside a `trace()` block, every span that finishes in the same context (the
+thread, or the asyncio task and the tasks it starts) is also recorded with
+its start offset and duration, which gives one request's breakdown: how
+long went to Whisper, Gemini, dateparser and each Calendar call. A span
+yields a dict, and anything put in it (token counts, result sizes) is
+attached to that span's trace entry but not to the metric labels.
+"""
+
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+PREFIX = "calendar_agent"
+
+# Seconds; covers a cached lookup through a slow Gemini call
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HELP = {
+    "span_seconds": "Time spent in each traced stage.",
+    "gemini_tokens_total": "Gemini tokens used, by kind.",
+    "parse_cache_total": "Command parse cache lookups, by result.",
+}
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)      # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    def __init__(self, prefix=PREFIX):
+        self.prefix = prefix
+        self._histograms = {}       # (name, labels) -> Histogram
+        self._counters = {}         # (name, labels) -> value
+        self._lock = threading.Lock()
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def render(self):
+        """Every metric in Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name in sorted({name for name, _ in self._histograms}):
+                full = f"{self.prefix}_{name}"
+                lines += [f"# HELP {full} {HELP.get(name, name)}", f"# TYPE {full} histogram"]
+                for (metric, labels), histogram in sorted(self._histograms.items()):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(f"{full}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+                    lines.append(f"{full}_sum{_labels(labels)} {histogram.sum:.6f}")
+                    lines.append(f"{full}_count{_labels(labels)} {histogram.count}")
+            for name in sorted({name for name, _ in self._counters}):
+                full = f"{self.prefix}_{name}"
+                lines += [f"# HELP {full} {HELP.get(name, name)}", f"# TYPE {full} counter"]
+                for (metric, labels), value in sorted(self._counters.items()):
+                    if metric == name:
+                        lines.append(f"{full}{_labels(labels)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def render_counters(name, values, help=""):
+    """Prometheus lines for a flat {key: number} dict (e.g. scheduler_stats()) as one labelled family."""
+    full = f"{PREFIX}_{name}"
+    lines = [f"# HELP {full} {help or name}", f"# TYPE {full} counter"]
+    lines += [f"{full}{_labels((('kind', key),))} {_number(value)}" for key, value in sorted(values.items())]
+    return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+# (spans, started) for the enclosing trace(); a context variable rather than a
+# thread-local so concurrent requests on one event loop keep separate traces
+_current = contextvars.ContextVar("trace", default=None)
+
+
+@contextmanager
+def span(name, **labels):
+    """Time the block into the `span_seconds` histogram; yields a dict of extra trace fields."""
+    info = {}
+    start = time.perf_counter()
+    try:
+        yield info
+    finally:
+        elapsed = time.perf_counter() - start
+        registry.observe("span_seconds", elapsed, span=name, **labels)
+        current = _current.get()
+        if current is not None:
+            spans, started = current
+            spans.append(dict(info, name=name, **labels,
+                              start_ms=round((start - started) * 1000, 2),
+                              ms=round(elapsed * 1000, 2)))
+
+
+@contextmanager
+def trace():
+    """Collect spans finished in this context inside the block. Yields the list, in start order afterwards."""
+    spans = []
+    token = _current.set((spans, time.perf_counter()))
+    try:
+        yield spans
+    finally:
+        spans.sort(key=lambda entry: entry["start_ms"])
+        _current.reset(token)
+
+
+def traced_request_class(base):
+    """A googleapiclient HttpRequest subclass whose execute() is a span labelled with the API method.
+
+    Pass it as `requestBuilder` when building the service.
+    """
+    class TracedHttpRequest(base):
+        def execute(self, *args, **kwargs):
+            method = (self.methodId or "unknown").removeprefix("calendar.")
+            with span("calendar_api", method=method):
+                return super().execute(*args, **kwargs)
+
+    return TracedHttpRequest
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+
+def _number(value):
+    return f"{value:.6f}" if isinstance(value, float) else str(value)
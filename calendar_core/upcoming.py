@@ -0,0 +1,67 @@
+"""
+Upcoming events — what's next on each calendar, merged across calendars.
+
+Each calendar's upcoming entries (single events plus expanded series) are
+laid out once, sorted by start time, and reused until that store's version
+changes. As time passes, entries that have ended are dropped by advancing a
+cursor past them, so a read only touches the head of each calendar's queue.
+`next(n)` merges the heads across calendars with heapq.merge.
+
+Answering "what's next?" therefore costs neither a network call nor a scan
+of the whole store.
+"""
+
+import heapq
+import itertools
+import threading
+
+
+class _Queue:
+    __slots__ = ("version", "entries", "cursor", "until")
+
+    def __init__(self, version, entries, until):
+        self.version = version
+        self.entries = entries      # [(start_ts, end_ts, event)] sorted by start
+        self.cursor = 0
+        self.until = until          # rebuild by then, before series expansion runs out
+
+
+class UpcomingQueue:
+    def __init__(self):
+        self._queues = {}       # calendar id -> _Queue
+        self._lock = threading.Lock()
+
+    def _queue(self, store, now_ts):
+        queue = self._queues.get(store.calendar_id)
+        if queue is None or queue.version != store.version or now_ts >= queue.until:
+            # Open-ended reads expand series `horizon_days` ahead; rebuild halfway there
+            queue = _Queue(store.version, store.entries_between(now_ts),
+                           now_ts + store.horizon_days * 86400 / 2)
+            self._queues[store.calendar_id] = queue
+        entries = queue.entries
+        while queue.cursor < len(entries) and not _pending(*entries[queue.cursor][:2], now_ts):
+            queue.cursor += 1
+        return queue
+
+    def _heads(self, store, now_ts, n):
+        """Up to `n` (start_ts, event_id, calendar_id, event) not ended by `now_ts`."""
+        queue = self._queue(store, now_ts)
+        # Entries behind the head can already be over when the head is a long event
+        pending = ((start, event["id"], store.calendar_id, event)
+                   for start, end, event in itertools.islice(queue.entries, queue.cursor, None)
+                   if _pending(start, end, now_ts))
+        return list(itertools.islice(pending, n))
+
+    def next(self, stores, now_ts, n=1):
+        """The `n` earliest-starting events across `stores` that haven't ended by `now_ts`.
+
+        Returns [(calendar_id, start_ts, event)].
+        """
+        with self._lock:
+            heads = [self._heads(store, now_ts, n) for store in stores]
+        merged = heapq.merge(*heads, key=lambda head: head[:3])
+        return [(cal_id, start, event) for start, _, cal_id, event in itertools.islice(merged, n)]
+
+
+def _pending(start, end, now_ts):
+    return end > now_ts or (start == end and start >= now_ts)
@@ -0,0 +1,173 @@
+"""
+Push notification channels — events().watch subscriptions, one per calendar.
+
+Google POSTs to our webhook whenever anything on a watched calendar changes
+(the phone app, accepted invitations, other clients). The notification only
+names the channel, so this registry maps channel IDs back to calendars and
+checks the secret token we gave each channel. The webhook then syncs just
+that calendar's store with its syncToken, instead of every store being
+polled on a timer.
+
+Channels expire (a week at most), so `renew_steps()` re-registers any calendar
+whose channel is missing or within `renew_margin` seconds of expiring, and
+stops the channel it replaces. Registrations are persisted (through
+calendar_core.persist, off the caller's thread) so a restart keeps
+recognizing channels that are still live. Registering and renewing are
+calendar_core.steps routines, so the web server can run them on its event
+loop and a script can drive them with `steps.run()`.
+
+FakeNotifier stands in for Google locally: pass it as the service when
+registering, and `notify()` POSTs to the webhook the way Google would.
+"""
+
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+import uuid
+
+from calendar_core import persist
+
+
+class ChannelRegistry:
+    def __init__(self, path, address, ttl=604800, renew_margin=3600):
+        self.path = path
+        self.address = address
+        self.ttl = ttl
+        self.renew_margin = renew_margin
+        self.channels = {}      # calendar id -> {id, resource_id, token, expiration}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.channels = json.load(f)
+            except (OSError, ValueError):
+                self.channels = {}
+
+    def expiration(self, calendar_id):
+        """Epoch seconds the calendar's channel expires at (0 if it has none)."""
+        channel = self.channels.get(calendar_id)
+        return channel["expiration"] if channel else 0.0
+
+    def needs_renewal(self, calendar_id):
+        return self.expiration(calendar_id) - time.time() < self.renew_margin
+
+    def knows(self, channel_id):
+        return any(c["id"] == channel_id for c in self.channels.values())
+
+    def resolve(self, channel_id, token):
+        """Calendar ID for a notification's channel, or None if it isn't ours or the token is wrong."""
+        for calendar_id, channel in self.channels.items():
+            if channel["id"] == channel_id and hmac.compare_digest(channel["token"], token or ""):
+                return calendar_id
+        return None
+
+    def register_steps(self, service, calendar_id):
+        """Routine: open a new channel for `calendar_id`, then stop the one it replaces."""
+        token = secrets.token_urlsafe(24)
+        body = {
+            "id": str(uuid.uuid4()),
+            "type": "web_hook",
+            "address": self.address,
+            "token": token,
+            "params": {"ttl": str(int(self.ttl))},
+        }
+        result = yield service.events().watch(calendarId=calendar_id, body=body)
+        expiration = int(result.get("expiration") or (time.time() + self.ttl) * 1000) / 1000
+        with self._lock:
+            old = self.channels.get(calendar_id)
+            self.channels[calendar_id] = {
+                "id": result.get("id", body["id"]),
+                "resource_id": result["resourceId"],
+                "token": token,
+                "expiration": expiration,
+            }
+        self.save()
+        if old:
+            try:
+                yield stop_request(service, old["id"], old["resource_id"])
+            except Exception:
+                pass  # It expires on its own; its notifications no longer resolve
+        return self.channels[calendar_id]
+
+    def renew_steps(self, service, calendar_ids):
+        """Routine: register every calendar whose channel is missing or about to expire. Returns {calendar_id: error}."""
+        errors = {}
+        for calendar_id in calendar_ids:
+            if self.needs_renewal(calendar_id):
+                try:
+                    yield from self.register_steps(service, calendar_id)
+                except Exception as e:
+                    errors[calendar_id] = str(e)
+        return errors
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            snapshot = {calendar_id: dict(channel) for calendar_id, channel in self.channels.items()}
+        persist.write_later(self.path, snapshot)
+
+
+def stop_request(service, channel_id, resource_id):
+    return service.channels().stop(body={"id": channel_id, "resourceId": resource_id})
+
+
+class FakeNotifier:
+    """Local stand-in for Google's side of push notifications.
+
+    Acts as the `service` for ChannelRegistry (events().watch and
+    channels().stop). `notify()` sends the webhook the same headers Google
+    would, via `post(url, headers)`, e.g. a FastAPI TestClient's post.
+    """
+
+    def __init__(self, post):
+        self.post = post
+        self.watched = {}       # calendar id -> watch body + resourceId
+        self.messages = 0
+
+    def events(self):
+        return self
+
+    def channels(self):
+        return self
+
+    def watch(self, calendarId, body):
+        def execute():
+            channel = dict(body, resourceId=f"fake-{uuid.uuid4().hex[:12]}", calendarId=calendarId)
+            self.watched[calendarId] = channel
+            self.notify(calendarId, state="sync")
+            return {"id": body["id"], "resourceId": channel["resourceId"],
+                    "expiration": str(int((time.time() + int(body["params"]["ttl"])) * 1000))}
+        return _Request(execute)
+
+    def stop(self, body):
+        def execute():
+            for calendar_id, channel in list(self.watched.items()):
+                if channel["id"] == body["id"] and channel["resourceId"] == body["resourceId"]:
+                    del self.watched[calendar_id]
+            return ""
+        return _Request(execute)
+
+    def notify(self, calendar_id, state="exists"):
+        """POST a change notification for `calendar_id`'s channel to its webhook address."""
+        channel = self.watched[calendar_id]
+        self.messages += 1
+        headers = {
+            "X-Goog-Channel-ID": channel["id"],
+            "X-Goog-Channel-Token": channel["token"],
+            "X-Goog-Resource-ID": channel["resourceId"],
+            "X-Goog-Resource-State": state,
+            "X-Goog-Message-Number": str(self.messages),
+        }
+        return self.post(channel["address"], headers=headers)
+
+
+class _Request:
+    def __init__(self, fn):
+        self.execute = fn
+
+    async def execute_async(self):
+        return self.execute()
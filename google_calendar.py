@@ -1,14 +1,32 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+import functools
+import heapq
 import json
 import os
-import dateparser
 from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
+import google_auth_httplib2
+import httplib2
+import numpy as np
 import re
-from rapidfuzz import fuzz
+import threading
 import uuid
+from zoneinfo import ZoneInfo
+from calendar_core import freebusy, intervals, steps
+from calendar_core.async_http import AsyncTransport
+from calendar_core.calendar_list import CalendarListCache
+from calendar_core.event import Event
+from calendar_core.event_search import SummaryIndex, normalize, rank
+from calendar_core.event_store import EventStore, event_bounds
+from calendar_core.fanout import ParallelExecutor, execute_batched, execute_serial
+from calendar_core.fields import PROFILES as FIELD_PROFILES
+from calendar_core.scheduler import RequestScheduler
+from calendar_core.steps import FanOut
+from calendar_core.timeparse import parse_datetime
+from calendar_core.tracing import traced_request_class
+from calendar_core.upcoming import UpcomingQueue
+from calendar_core.upsert_index import UpsertIndex, content_hash, diff_fields
+from calendar_core.watch import ChannelRegistry, stop_request
 
 SCOPES = ["https://www.googleapis.com/auth/calendar"]
 
@@ -17,8 +35,38 @@ with open(os.path.join(os.path.dirname(__file__), "config.json")) as f:
     CONFIG = json.load(f)
 
 TIMEZONE = CONFIG["timezone"]
+WORKING_HOURS = CONFIG.get("working_hours", {})
+
+# Bundled copy of the Calendar v3 discovery document, so building the client
+# never fetches or looks one up at runtime
+DISCOVERY_DOC = os.path.join(os.path.dirname(__file__), "calendar_core", "discovery", "calendar.v3.json")
+
+# googleapiclient asks for gzip on every request (Accept-Encoding plus "(gzip)"
+# appended to this User-Agent), so responses come back compressed
+USER_AGENT = "google-calendar-agent"
+
+# Every request is paced, retried and counted here (see calendar_core.scheduler)
+SCHEDULER_CONFIG = CONFIG.get("scheduler", {})
+_scheduler = RequestScheduler(
+    rate=SCHEDULER_CONFIG.get("requests_per_second", 10),
+    burst=SCHEDULER_CONFIG.get("burst", 50),
+    max_retries=SCHEDULER_CONFIG.get("max_retries", 5),
+    base_delay=SCHEDULER_CONFIG.get("base_delay_seconds", 0.5),
+    max_delay=SCHEDULER_CONFIG.get("max_delay_seconds", 32),
+    deadline=SCHEDULER_CONFIG.get("deadline_seconds", 30),
+)
+
+_credentials = None
+_service = None
+_service_lock = threading.Lock()
 
 def init_service():
+    # Imported here rather than at module level: only the first call pays for them
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from googleapiclient.discovery import build_from_document
+    from googleapiclient.http import HttpRequest, build_http, set_user_agent
+
+    global _credentials
     creds = None
     if os.path.exists("token.json"):
         try:
@@ -33,9 +81,310 @@ def init_service():
             creds = flow.run_local_server(port=0)
         with open("token.json", "w") as token:
             token.write(creds.to_json())
-    return build("calendar", "v3", credentials=creds)
+    _credentials = creds
+    http = set_user_agent(google_auth_httplib2.AuthorizedHttp(creds, http=build_http()), USER_AGENT)
+    http = _scheduler.wrap(http)
+    with open(DISCOVERY_DOC) as f:
+        # Every execute() is timed per API method (see calendar_core.tracing)
+        return build_from_document(f.read(), http=http, requestBuilder=traced_request_class(HttpRequest))
+
+
+def get_service():
+    """Return the Calendar client, building it on first use (thread-safe)."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = init_service()
+    return _service
+
+
+def use_service(service):
+    """Swap in another Calendar client (e.g. calendar_core.fake_calendar.FakeCalendar).
+
+    Calendar metadata, event stores and the indexes built on them belong to
+    the old client, so they are dropped.
+    """
+    global _service, _summary_index, _upcoming, _primary_id
+    with _service_lock:
+        _service = service
+    invalidate_calendar_cache()
+    _event_stores.clear()
+    _primary_id = None
+    _summary_index = SummaryIndex()
+    _upcoming = UpcomingQueue()
+
+
+def scheduler_stats():
+    """Request, throttling and retry counters since startup."""
+    return _scheduler.stats()
+
+
+# --- Partial responses ---
+
+PARTIAL_RESPONSES = CONFIG.get("partial_responses", True)
+
+
+def _fields(profile):
+    """`fields=` mask for a read profile (see calendar_core.fields), or None for full resources."""
+    return FIELD_PROFILES[profile] if PARTIAL_RESPONSES else None
+
+
+# --- Multi-calendar fan-out (batched, parallel or serial) ---
+
+FETCH_CONFIG = CONFIG.get("fetch", {})
+
+
+def _authorized_http():
+    """A fresh authorized Http for one worker thread."""
+    from googleapiclient.http import set_user_agent
+
+    get_service()  # make sure credentials are loaded
+    http = set_user_agent(google_auth_httplib2.AuthorizedHttp(
+        _credentials, http=httplib2.Http(timeout=FETCH_CONFIG.get("deadline_seconds", 30))), USER_AGENT)
+    return _scheduler.wrap(http)
+
+
+_executor = ParallelExecutor(
+    _authorized_http,
+    max_workers=FETCH_CONFIG.get("max_workers", 8),
+    deadline=FETCH_CONFIG.get("deadline_seconds", 30),
+)
+
+
+def execute_batch(requests):
+    """Execute {key: HttpRequest} as batch calls, retrying throttled parts. Returns (results, errors)."""
+    return execute_batched(get_service(), requests, FETCH_CONFIG.get("batch_size", 50), scheduler=_scheduler)
+
 
-service = init_service()
+def fan_out(requests):
+    """Execute {key: HttpRequest} using the configured fetch mode. Returns (results, errors)."""
+    mode = FETCH_CONFIG.get("mode", "batch")
+    if len(requests) > 1:
+        if mode == "batch":
+            return execute_batch(requests)
+        if mode == "parallel":
+            return _executor.execute(requests)
+    return execute_serial(requests)
+
+
+# --- Blocking and async execution ---
+# Tools that touch the API are written once as calendar_core.steps routines:
+# generators that yield their requests (or a FanOut of several) and get the
+# results sent back. @_routine turns one into a blocking function, for the CLI
+# and every existing caller, with an async twin at `.aio` that awaits the same
+# requests over httpx (calendar_core.async_http), and the bare routine at
+# `.steps` for other routines to `yield from`.
+
+_async_transport = AsyncTransport(
+    lambda: _credentials,
+    scheduler=_scheduler,
+    user_agent=USER_AGENT,
+    timeout=FETCH_CONFIG.get("deadline_seconds", 30),
+    max_connections=FETCH_CONFIG.get("max_connections", 20),
+)
+
+
+def _fan_out_step(step):
+    """Blocking executor for a FanOut: "batch" and "parallel" force a strategy, else the configured one."""
+    if step.mode == "batch":
+        return execute_batch(step.requests)
+    if step.mode == "parallel":
+        return _executor.execute(step.requests) if len(step.requests) > 1 else execute_serial(step.requests)
+    return fan_out(step.requests)
+
+
+def _run(routine):
+    """Run a started routine to completion with blocking calls."""
+    return steps.run(routine, fan_out=_fan_out_step)
+
+
+def _routine(routine):
+    @functools.wraps(routine)
+    def blocking(*args, **kwargs):
+        return _run(routine(*args, **kwargs))
+
+    @functools.wraps(routine)
+    async def awaitable(*args, **kwargs):
+        # Requests in a FanOut go out concurrently, so there's no batch framing on this path
+        return await steps.run_async(routine(*args, **kwargs), _async_transport.execute,
+                                     _async_transport.fan_out)
+
+    blocking.aio = awaitable
+    blocking.steps = routine
+    return blocking
+
+
+# --- Calendar metadata cache (TTL + ETag revalidation) ---
+
+_calendar_list = CalendarListCache(ttl=CONFIG.get("calendar_list_ttl_seconds", 300),
+                                   fields=_fields("calendars"))
+
+
+@_routine
+def get_calendars():
+    """Return calendarList items, served from cache within the configured TTL."""
+    return (yield from _calendar_list.get_steps(get_service()))
+
+
+def invalidate_calendar_cache():
+    """Drop cached calendar metadata so the next read refetches it."""
+    _calendar_list.invalidate()
+
+
+# --- Local event store (incremental sync via syncTokens) ---
+
+EVENT_STORE_CONFIG = CONFIG.get("event_store", {})
+EVENT_STORE_ENABLED = EVENT_STORE_CONFIG.get("enabled", True)
+_event_stores = {}
+_primary_id = None
+
+
+def _store_id(calendar_id):
+    """The ID a calendar's store is kept under: "primary" is the calendar flagged primary, as the API treats it."""
+    global _primary_id
+    if calendar_id != "primary":
+        return calendar_id
+    for c in _calendar_list.items or ():
+        if c.get("primary"):
+            _primary_id = c["id"]
+    # Remembered across invalidate_calendar_cache(), so writes still land in the right store
+    return _primary_id or calendar_id
+
+
+def _event_store(calendar_id):
+    calendar_id = _store_id(calendar_id)
+    store = _event_stores.get(calendar_id)
+    if store is None:
+        store = _event_stores.setdefault(calendar_id, EventStore(
+            calendar_id,
+            path=os.path.join(os.path.dirname(__file__), EVENT_STORE_CONFIG.get("path", ".cache/events")),
+            tz=TIMEZONE,
+            past_days=EVENT_STORE_CONFIG.get("past_days", 30),
+            sync_interval=EVENT_STORE_CONFIG.get("sync_interval_seconds", 60),
+            fields=_fields("sync"),
+            horizon_days=EVENT_STORE_CONFIG.get("horizon_days", 365),
+        ))
+        if WATCH_ENABLED:
+            store.watched_until = _get_watch_registry().expiration(calendar_id)
+            store.watched_sync_interval = WATCH_CONFIG.get("fallback_sync_seconds", 3600)
+    return store
+
+
+def get_event_store(calendar_id):
+    """Return the synced local store for a calendar, syncing it if stale."""
+    if calendar_id == "primary":
+        get_calendars()
+    store = _event_store(calendar_id)
+    store.refresh(get_service())
+    return store
+
+
+@_routine
+def refresh_event_stores(calendar_ids):
+    """Sync every stale store in one fan-out. Returns {calendar_id: error} for failures."""
+    if "primary" in calendar_ids:
+        yield from get_calendars.steps()
+    stores = {store.calendar_id: store for store in map(_event_store, calendar_ids)}
+    # A store already syncing elsewhere serves its current copy rather than racing that sync,
+    # unless that is its first sync: then there is no copy yet, and sync_steps waits for it
+    stale = [store for store in stores.values()
+             if store.is_stale() and not (store.syncing and store.sync_token is not None)]
+    if not stale:
+        return {}
+    # First pages go out together; follow-up pages and 410 resets are handled per store
+    first = {store.calendar_id: store.sync_request(get_service()) for store in stale if not store.syncing}
+    results, _ = (yield FanOut(first)) if first else ({}, {})
+    errors = {}
+    for store in stale:
+        try:
+            yield from store.sync_steps(get_service(), first_page=results.get(store.calendar_id))
+        except Exception as e:
+            errors[store.calendar_id] = str(e)
+    return errors
+
+
+def _record_write(calendar_id, event=None, deleted_id=None):
+    """Mirror one of our own writes into the local store so reads see it immediately."""
+    store = _event_stores.get(_store_id(calendar_id))
+    if store is None:
+        return
+    if event is not None:
+        store.apply(event)
+    if deleted_id is not None:
+        store.remove(deleted_id)
+
+
+def _to_timestamp(dt):
+    """Epoch seconds for a datetime; naive values are taken as local (config) time."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=ZoneInfo(TIMEZONE))
+    return dt.timestamp()
+
+
+# --- Push notifications (watch channels) ---
+
+WATCH_CONFIG = CONFIG.get("watch", {})
+WATCH_ENABLED = WATCH_CONFIG.get("enabled", False)
+_watch_registry = None
+_watch_registry_lock = threading.Lock()
+
+
+def _get_watch_registry():
+    global _watch_registry
+    with _watch_registry_lock:
+        if _watch_registry is None:
+            _watch_registry = ChannelRegistry(
+                os.path.join(os.path.dirname(__file__), WATCH_CONFIG.get("path", ".cache/channels.json")),
+                address=WATCH_CONFIG.get("address"),
+                ttl=WATCH_CONFIG.get("ttl_seconds", 604800),
+                renew_margin=WATCH_CONFIG.get("renew_margin_seconds", 3600),
+            )
+    return _watch_registry
+
+
+@_routine
+def ensure_watch_channels(calendar_ids=None, service=None):
+    """Open or renew push channels so every calendar has a live one. Returns {calendar_id: error}.
+
+    `service` defaults to the Calendar client; pass a calendar_core.watch.FakeNotifier to test locally.
+    """
+    if calendar_ids is None:
+        calendar_ids = [c["id"] for c in (yield from get_calendars.steps())]
+    registry = _get_watch_registry()
+    errors = yield from registry.renew_steps(service or get_service(), calendar_ids)
+    for cal_id in calendar_ids:
+        store = _event_store(cal_id)
+        store.watched_until = registry.expiration(cal_id)
+        store.watched_sync_interval = WATCH_CONFIG.get("fallback_sync_seconds", 3600)
+    return errors
+
+
+def watched_calendar(channel_id, token):
+    """Calendar a push notification is for, or None if the channel or token isn't ours."""
+    return _get_watch_registry().resolve(channel_id, token)
+
+
+def is_watch_channel(channel_id):
+    return _get_watch_registry().knows(channel_id)
+
+
+@_routine
+def stop_watch_channel(channel_id, resource_id, service=None):
+    """Best-effort stop of a channel we no longer track. Returns whether it worked."""
+    try:
+        yield stop_request(service or get_service(), channel_id, resource_id)
+        return True
+    except Exception:
+        return False
+
+
+@_routine
+def sync_event_store(calendar_id):
+    """Incrementally sync one calendar's store now, however recently it synced. Returns the change count."""
+    if calendar_id == "primary":
+        yield from get_calendars.steps()
+    return (yield from _event_store(calendar_id).sync_steps(get_service()))
 
 
 def normalize_event_time(start_str, end_str=None, all_day=False, tz=None):
@@ -43,21 +392,21 @@ def normalize_event_time(start_str, end_str=None, all_day=False, tz=None):
         tz = TIMEZONE
 
     if all_day:
-        start_date = dateparser.parse(start_str).date()
+        start_date = parse_datetime(start_str).date()
         if not end_str:
             end_date = start_date + timedelta(days=1)
         else:
-            end_date = dateparser.parse(end_str).date()
+            end_date = parse_datetime(end_str).date()
         return (
             {"date": start_date.isoformat()},
             {"date": end_date.isoformat()}
         )
 
-    start_dt = dateparser.parse(start_str, settings={"RETURN_AS_TIMEZONE_AWARE": True})
+    start_dt = parse_datetime(start_str, settings={"RETURN_AS_TIMEZONE_AWARE": True})
     if not end_str:
         end_dt = start_dt + timedelta(hours=1)
     else:
-        end_dt = dateparser.parse(end_str, settings={"RETURN_AS_TIMEZONE_AWARE": True})
+        end_dt = parse_datetime(end_str, settings={"RETURN_AS_TIMEZONE_AWARE": True})
 
     return (
         {"dateTime": start_dt.isoformat(), "timeZone": tz},
@@ -65,197 +414,412 @@ def normalize_event_time(start_str, end_str=None, all_day=False, tz=None):
     )
 
 
-def get_next_event():
-    calendars = service.calendarList().list().execute().get("items", [])
-    now = datetime.utcnow().isoformat() + 'Z'
-    next_event, next_start = None, None
-    for calendar in calendars:
-        event = service.events().list(
-            calendarId=calendar['id'],
-            timeMin=now,
-            maxResults=1,
-            singleEvents=True,
-            orderBy='startTime'
-        ).execute().get('items', [])
+# --- Upcoming events ---
 
-        if event:
-            start_str = event[0]["start"].get("dateTime", event[0]["start"].get("date"))
-            start_dt = datetime.fromisoformat(start_str.replace("Z", "+00:00"))
-            if next_start is None or start_dt < next_start:
-                next_start = start_dt
-                next_event = {
-                    "calendar": calendar.get("summary"),
-                    "summary": event[0].get("summary"),
-                    "start": start_str,
-                    "id": event[0]["id"]
-                }
+_upcoming = UpcomingQueue()
 
-    return next_event
+
+@_routine
+def get_next_events(n=5):
+    """The next `n` events across all calendars, soonest first."""
+    calendars = yield from get_calendars.steps()
+    names = {c['id']: c.get('summary') for c in calendars}
+    now_ts = datetime.now(timezone.utc).timestamp()
+    if EVENT_STORE_ENABLED:
+        yield from refresh_event_stores.steps(list(names))
+        hits = _upcoming.next([_event_store(cal_id) for cal_id in names], now_ts, n)
+    else:
+        results, _ = yield FanOut({cal_id: get_service().events().list(
+            calendarId=cal_id,
+            timeMin=datetime.fromtimestamp(now_ts, timezone.utc).isoformat(),
+            maxResults=n,
+            singleEvents=True,
+            orderBy='startTime',
+            fields=_fields("bounds"),
+        ) for cal_id in names})
+        # Compare epoch seconds, since all-day and timed starts don't compare as strings or datetimes
+        hits = sorted(((cal_id, event_bounds(event, TIMEZONE)[0], event)
+                       for cal_id, r in results.items() for event in r.get('items', [])),
+                      key=lambda hit: (hit[1], hit[2]['id']))[:n]
+
+    return [{
+        "calendar": names.get(cal_id),
+        "summary": event.get("summary"),
+        "start": event["start"].get("dateTime", event["start"].get("date")),
+        "id": event["id"],
+    } for cal_id, _, event in hits]
+
+
+@_routine
+def get_next_event():
+    events = yield from get_next_events.steps(1)
+    return events[0] if events else None
 
 
 # --- Free/busy and slot finding ---
 
-def find_free_slots(start_str, end_str, duration_minutes=60):
-    """Find free time slots in a date range across all calendars."""
-    start_dt = dateparser.parse(start_str, settings={"RETURN_AS_TIMEZONE_AWARE": True})
-    end_dt = dateparser.parse(end_str, settings={"RETURN_AS_TIMEZONE_AWARE": True})
+FREEBUSY_CONFIG = CONFIG.get("freebusy", {})
+
+
+@_routine
+def query_busy(calendar_ids, lo, hi):
+    """Busy periods across calendars in [lo, hi) epoch seconds.
+
+    The query is split into chunks that fit the FreeBusy API's limits on
+    calendars per request and window length, and the chunks run concurrently.
+    Returns (busy, errors); raises if any chunk fails, since a partial busy
+    list would report taken time as free.
+    """
+    chunks = freebusy.plan(calendar_ids, lo, hi,
+                           max_calendars=FREEBUSY_CONFIG.get("max_calendars", 50),
+                           max_window_days=FREEBUSY_CONFIG.get("max_window_days", 60))
+    requests = freebusy.build_requests(get_service(), chunks, fields=_fields("freebusy"))
+    results, failed = yield FanOut(requests, "parallel")
+    if failed:
+        raise next(iter(failed.values()))
+    return freebusy.collect_busy(results.values())
+
+
+@_routine
+def find_free_slots(start_str, end_str, duration_minutes=60, working_hours_only=False):
+    """Find free time slots in a date range across all calendars.
+
+    With working_hours_only, time outside the configured working hours counts as busy.
+    """
+    start_dt = parse_datetime(start_str, settings={"RETURN_AS_TIMEZONE_AWARE": True})
+    end_dt = parse_datetime(end_str, settings={"RETURN_AS_TIMEZONE_AWARE": True})
 
     if not start_dt or not end_dt:
         return {"success": False, "error": "Could not parse date range"}
 
-    # Get all calendar IDs
-    calendars = service.calendarList().list().execute().get("items", [])
-    calendar_ids = [{"id": c["id"]} for c in calendars]
-
-    # Query FreeBusy API
-    body = {
-        "timeMin": start_dt.isoformat(),
-        "timeMax": end_dt.isoformat(),
-        "items": calendar_ids,
-    }
+    lo, hi = int(start_dt.timestamp()), int(end_dt.timestamp())
     try:
-        freebusy = service.freebusy().query(body=body).execute()
+        calendars = yield from get_calendars.steps()
+        busy, errors = yield from query_busy.steps([c["id"] for c in calendars], lo, hi)
     except Exception as e:
         return {"success": False, "error": str(e)}
 
-    # Merge all busy periods across calendars
-    busy_periods = []
-    for cal_id, cal_data in freebusy.get("calendars", {}).items():
-        for busy in cal_data.get("busy", []):
-            busy_start = datetime.fromisoformat(busy["start"].replace("Z", "+00:00"))
-            busy_end = datetime.fromisoformat(busy["end"].replace("Z", "+00:00"))
-            busy_periods.append((busy_start, busy_end))
-
-    # Sort and merge overlapping busy periods
-    busy_periods.sort(key=lambda x: x[0])
-    merged = []
-    for start, end in busy_periods:
-        if merged and start <= merged[-1][1]:
-            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
-        else:
-            merged.append((start, end))
-
-    # Find gaps that fit the requested duration
-    slot_duration = timedelta(minutes=duration_minutes)
-    free_slots = []
-
-    current = start_dt
-    for busy_start, busy_end in merged:
-        if current + slot_duration <= busy_start:
-            free_slots.append({
-                "start": current.isoformat(),
-                "end": busy_start.isoformat(),
-                "duration_minutes": int((busy_start - current).total_seconds() / 60),
-            })
-        current = max(current, busy_end)
-
-    # Check gap after last busy period
-    if current + slot_duration <= end_dt:
-        free_slots.append({
-            "start": current.isoformat(),
-            "end": end_dt.isoformat(),
-            "duration_minutes": int((end_dt - current).total_seconds() / 60),
+    blocked = None
+    if working_hours_only:
+        blocked = intervals.off_hours(lo, hi, TIMEZONE, WORKING_HOURS.get("start", 8), WORKING_HOURS.get("end", 21))
+    starts, ends = intervals.free_intervals(*intervals.to_arrays(busy), lo, hi,
+                                            min_seconds=duration_minutes * 60, blocked=blocked)
+
+    free_slots = [{
+        "start": datetime.fromtimestamp(slot_start, start_dt.tzinfo).isoformat(),
+        "end": datetime.fromtimestamp(slot_end, start_dt.tzinfo).isoformat(),
+        "duration_minutes": (slot_end - slot_start) // 60,
+    } for slot_start, slot_end in zip(starts.tolist(), ends.tolist())]
+
+    response = {"success": True, "free_slots": free_slots, "count": len(free_slots)}
+    if errors:
+        response["errors"] = errors
+    return response
+
+
+# Growing search windows (hours from the search start); past the last one the
+# search keeps stepping by that size until SLOT_SEARCH_HORIZON_DAYS
+SLOT_SEARCH_WINDOWS_HOURS = (4, 24, 72, 336)
+SLOT_SEARCH_HORIZON_DAYS = CONFIG.get("slot_search_horizon_days", 60)
+WEEKDAY_NAMES = ("mo", "tu", "we", "th", "fr", "sa", "su")
+
+
+def _search_windows(start_ts, weekdays=None):
+    """Yield (lo, hi, blocked) for each successive search window, `blocked` being its off-hours."""
+    horizon = start_ts + SLOT_SEARCH_HORIZON_DAYS * 86400
+    day_start, day_end = WORKING_HOURS.get("start", 8), WORKING_HOURS.get("end", 21)
+
+    bounds = [start_ts + h * 3600 for h in SLOT_SEARCH_WINDOWS_HOURS]
+    while bounds[-1] < horizon:
+        bounds.append(bounds[-1] + SLOT_SEARCH_WINDOWS_HOURS[-1] * 3600)
+
+    lo = start_ts
+    for hi in bounds:
+        hi = min(hi, horizon)
+        yield lo, hi, intervals.off_hours(lo, hi, TIMEZONE, day_start, day_end, weekdays)
+        if hi >= horizon:
+            return
+        lo = hi
+
+
+def _window_slots(calendar_ids, lo, hi, blocked, carry, duration_minutes, buffer_minutes=0):
+    """The working-hours free slots in one search window, as (slots, carry).
+
+    Each window queries only its own stretch of time. A free gap that runs
+    into the end of a window but is still too short comes back as `carry`,
+    to be joined with a gap that continues from the start of the next window.
+    """
+    if not len(intervals.free_intervals(*blocked, lo, hi)[0]):
+        # Entirely outside working hours — nothing to ask the API
+        return [], None
+    need = duration_minutes * 60
+    pad = buffer_minutes * 60
+    busy, _ = yield from query_busy.steps(calendar_ids, lo - pad, hi + pad)
+    busy_starts, busy_ends = intervals.to_arrays(busy)
+    starts, ends = intervals.free_intervals(busy_starts - pad, busy_ends + pad, lo, hi, blocked=blocked)
+
+    # A gap only carries on if it reaches the end of this window; a fully busy window ends it
+    prior, carry = carry, None
+    slots = []
+    for slot_start, slot_end in zip(starts.tolist(), ends.tolist()):
+        if prior is not None and slot_start == lo:
+            slot_start = prior
+        prior = None
+        if slot_end - slot_start < need:
+            if slot_end == hi:
+                carry = slot_start
+            continue
+        slots.append({
+            "start": datetime.fromtimestamp(slot_start, ZoneInfo(TIMEZONE)).isoformat(),
+            "end": datetime.fromtimestamp(slot_end, ZoneInfo(TIMEZONE)).isoformat(),
+            "duration_minutes": (slot_end - slot_start) // 60,
         })
+    return slots, carry
+
+
+def iter_free_slots(start_str, duration_minutes=60, buffer_minutes=0, weekdays=None):
+    """Lazily yield free working-hours slots from `start_str` onward.
+
+    Windows are only queried as the caller keeps iterating, so stopping at
+    the first slot costs a single small FreeBusy query in the common case.
+    """
+    start_dt = parse_datetime(start_str, settings={"RETURN_AS_TIMEZONE_AWARE": True})
+    if not start_dt:
+        return
+    calendar_ids = [c["id"] for c in get_calendars()]
+    carry = None
+    for lo, hi, blocked in _search_windows(int(start_dt.timestamp()), _parse_weekdays(weekdays)):
+        slots, carry = _run(_window_slots(calendar_ids, lo, hi, blocked, carry, duration_minutes, buffer_minutes))
+        yield from slots
 
-    return {"success": True, "free_slots": free_slots, "count": len(free_slots)}
 
+def _parse_weekdays(weekdays):
+    """Accept weekday numbers (Mon=0) or names ("mon", "TU", ...); None means every day."""
+    if weekdays is None:
+        weekdays = WORKING_HOURS.get("weekdays")
+    if weekdays is None:
+        return None
+    return {d if isinstance(d, int) else WEEKDAY_NAMES.index(d.strip().lower()[:2]) for d in weekdays}
 
-def suggest_next_free_slot(start_str, duration_minutes=60):
+
+@_routine
+def suggest_next_free_slot(start_str, duration_minutes=60, buffer_minutes=0, weekdays=None):
     """Find the next available slot starting from a given time."""
-    start_dt = dateparser.parse(start_str, settings={"RETURN_AS_TIMEZONE_AWARE": True})
+    start_dt = parse_datetime(start_str, settings={"RETURN_AS_TIMEZONE_AWARE": True})
     if not start_dt:
         return {"success": False, "error": "Could not parse start time"}
 
-    # Search the next 7 days
-    end_dt = start_dt + timedelta(days=7)
-    result = find_free_slots(start_dt.isoformat(), end_dt.isoformat(), duration_minutes)
-
-    if not result.get("success"):
-        return result
-
-    # Filter to slots during reasonable hours (8am-9pm)
-    reasonable_slots = []
-    for slot in result["free_slots"]:
-        slot_start = datetime.fromisoformat(slot["start"])
-        hour = slot_start.hour
-        if 8 <= hour <= 21 and slot["duration_minutes"] >= duration_minutes:
-            reasonable_slots.append(slot)
-
-    if reasonable_slots:
-        return {"success": True, "suggested_slot": reasonable_slots[0], "all_slots": reasonable_slots[:5]}
-    elif result["free_slots"]:
-        return {"success": True, "suggested_slot": result["free_slots"][0], "all_slots": result["free_slots"][:5]}
-    else:
-        return {"success": False, "error": "No free slots found in the next 7 days"}
+    try:
+        allowed_days = _parse_weekdays(weekdays)
+    except ValueError:
+        return {"success": False, "error": f"Could not parse weekdays: {weekdays}"}
+
+    try:
+        calendar_ids = [c["id"] for c in (yield from get_calendars.steps())]
+        carry = None
+        for lo, hi, blocked in _search_windows(int(start_dt.timestamp()), allowed_days):
+            slots, carry = yield from _window_slots(calendar_ids, lo, hi, blocked, carry,
+                                                    duration_minutes, buffer_minutes)
+            if slots:
+                # Stop at the first window with a match; its other slots come for free
+                return {"success": True, "suggested_slot": slots[0], "all_slots": slots[:5]}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+    return {"success": False, "error": f"No free slots found in the next {SLOT_SEARCH_HORIZON_DAYS} days"}
 
 
 # --- List events by date range ---
 
+EVENT_PAGE_SIZE = 250
+
+
+def _list_request(calendar_id, time_min, time_max, page_token=None):
+    kwargs = {
+        "calendarId": calendar_id,
+        "timeMin": time_min,
+        "timeMax": time_max,
+        "maxResults": EVENT_PAGE_SIZE,
+        "singleEvents": True,
+        "orderBy": "startTime",
+        "fields": _fields("records"),
+    }
+    if page_token:
+        kwargs["pageToken"] = page_token
+    return get_service().events().list(**kwargs)
+
+
+def _page_records(calendar_id, page, seq=0):
+    """[(start_ts, seq, Event)] for one events().list page, numbering on from `seq`."""
+    records = []
+    for event in page.get("items", []):
+        seq += 1
+        record = Event.from_resource(calendar_id, event, TIMEZONE)
+        records.append((record.start_ts, seq, record))
+    return records
+
+
+def _iter_store(calendar_id, start_ts, end_ts):
+    for seq, (event_start, event_end, event) in enumerate(_event_store(calendar_id).entries_between(start_ts, end_ts)):
+        yield event_start, seq, Event(calendar_id, event, event_start, event_end)
+
+
+class _EventMerge:
+    """Start-ordered merge of per-calendar streams of (start_ts, seq, Event).
+
+    A stream backed by events().list carries its next page token, and that
+    page is only fetched once the merge has used up the one before it. Ties
+    go to the stream added first, as with heapq.merge.
+    """
+
+    def __init__(self, time_min, time_max, errors):
+        self.time_min, self.time_max = time_min, time_max
+        self.errors = errors
+        self.streams = []       # [calendar_id, iterator, head, page_token]
+        self.heap = []
+        self.last = None        # stream whose head was handed out and not yet replaced
+
+    def add(self, calendar_id, records, page_token=None):
+        records = iter(records)
+        self.streams.append([calendar_id, records, next(records, None), page_token])
+        self._push(len(self.streams) - 1)
+
+    def _push(self, i):
+        head = self.streams[i][2]
+        if head is not None:
+            heapq.heappush(self.heap, (head[:2], i))
+
+    def next_steps(self):
+        """Routine: the next Event in start order, or None once every stream is used up."""
+        if self.last is not None:
+            # Like heapq.merge, a stream only moves on when the record after its last one is asked for
+            i, self.last = self.last, None
+            yield from self._advance_steps(i)
+        if not self.heap:
+            return None
+        _, self.last = heapq.heappop(self.heap)
+        return self.streams[self.last][2][2]
+
+    def _advance_steps(self, i):
+        stream = self.streams[i]
+        calendar_id, records, (_, seq, _), page_token = stream
+        head = next(records, None)
+        while head is None and page_token:
+            try:
+                page = yield _list_request(calendar_id, self.time_min, self.time_max, page_token)
+            except Exception as e:
+                self.errors[calendar_id] = str(e)
+                break
+            records = iter(_page_records(calendar_id, page, seq))
+            head, page_token = next(records, None), page.get("nextPageToken")
+        stream[1:] = [records, head, page_token]
+        self._push(i)
+
+
+def _open_merge(calendar_ids, start, end, errors):
+    """Routine: an _EventMerge over `calendar_ids` for [start, end) (default: now to 7 days out).
+
+    Streams come from the local stores, or else from events().list, with the
+    first page for every calendar sent as one fan-out. Per-calendar failures
+    are written into `errors`.
+    """
+    if calendar_ids is None:
+        calendar_ids = [c["id"] for c in (yield from get_calendars.steps())]
+    start_dt = _coerce_datetime(start) or datetime.now(timezone.utc)
+    end_dt = _coerce_datetime(end) or start_dt + timedelta(days=7)
+    time_min, time_max = start_dt.isoformat(), end_dt.isoformat()
+    merge = _EventMerge(time_min, time_max, errors)
+
+    if EVENT_STORE_ENABLED:
+        errors.update((yield from refresh_event_stores.steps(calendar_ids)))
+        start_ts, end_ts = _to_timestamp(start_dt), _to_timestamp(end_dt)
+        # A calendar whose sync failed still serves its last synced copy
+        for cal_id in calendar_ids:
+            merge.add(cal_id, _iter_store(cal_id, start_ts, end_ts))
+        return merge
+
+    first_pages, failed = yield FanOut({cal_id: _list_request(cal_id, time_min, time_max)
+                                        for cal_id in calendar_ids})
+    errors.update({cal_id: str(e) for cal_id, e in failed.items()})
+    for cal_id, page in first_pages.items():
+        merge.add(cal_id, _page_records(cal_id, page), page.get("nextPageToken"))
+    return merge
+
+
+@_routine
+def merged_events(calendar_ids=None, start=None, end=None, errors=None, limit=None):
+    """The first `limit` Events (all, if None) from many calendars, in start-time order.
+
+    `start`/`end` are datetimes or strings (default: now to 7 days out).
+    Later pages are fetched only when the merge reaches them, so a small
+    `limit` never pays for the rest. Per-calendar failures are written into
+    `errors` if a dict is passed.
+    """
+    merge = yield from _open_merge(calendar_ids, start, end, {} if errors is None else errors)
+    records = []
+    while limit is None or len(records) < limit:
+        record = yield from merge.next_steps()
+        if record is None:
+            break
+        records.append(record)
+    return records
+
+
+def iter_events(calendar_ids=None, start=None, end=None, errors=None):
+    """merged_events as a blocking generator, for callers that stop once they've seen enough."""
+    merge = _run(_open_merge(calendar_ids, start, end, {} if errors is None else errors))
+    while True:
+        record = _run(merge.next_steps())
+        if record is None:
+            return
+        yield record
+
+
+def _coerce_datetime(value):
+    if value is None or isinstance(value, datetime):
+        return value
+    return parse_datetime(value, settings={"RETURN_AS_TIMEZONE_AWARE": True})
+
+
+@_routine
 def list_events(calendar_id=None, start_str=None, end_str=None, max_results=50):
-    """List events in a date range. If no calendar_id, searches all calendars."""
+    """List the first `max_results` events in a date range. If no calendar_id, searches all calendars."""
     if not start_str:
-        time_min = datetime.utcnow().isoformat() + "Z"
+        start_dt = datetime.now(timezone.utc)
     else:
-        dt = dateparser.parse(start_str, settings={"RETURN_AS_TIMEZONE_AWARE": True})
-        time_min = dt.isoformat()
+        start_dt = parse_datetime(start_str, settings={"RETURN_AS_TIMEZONE_AWARE": True})
 
     if not end_str:
         # Default to end of the day if only start given, or 7 days out if nothing given
         if start_str:
-            dt = dateparser.parse(start_str, settings={"RETURN_AS_TIMEZONE_AWARE": True})
-            time_max = (dt.replace(hour=23, minute=59, second=59)).isoformat()
+            end_dt = start_dt.replace(hour=23, minute=59, second=59)
         else:
-            time_max = (datetime.utcnow() + timedelta(days=7)).isoformat() + "Z"
+            end_dt = start_dt + timedelta(days=7)
     else:
-        dt_end = dateparser.parse(end_str, settings={"RETURN_AS_TIMEZONE_AWARE": True})
-        time_max = dt_end.isoformat()
+        end_dt = parse_datetime(end_str, settings={"RETURN_AS_TIMEZONE_AWARE": True})
 
-    calendar_ids = []
-    if calendar_id:
-        calendar_ids = [calendar_id]
-    else:
-        calendars = service.calendarList().list().execute().get("items", [])
-        calendar_ids = [c["id"] for c in calendars]
+    errors = {}
+    calendar_ids = [calendar_id] if calendar_id else None
+    records = yield from merged_events.steps(calendar_ids, start_dt, end_dt, errors, max_results)
+    all_events = [event.to_dict() for event in records]
 
-    all_events = []
-    for cal_id in calendar_ids:
-        try:
-            events_result = service.events().list(
-                calendarId=cal_id,
-                timeMin=time_min,
-                timeMax=time_max,
-                maxResults=max_results,
-                singleEvents=True,
-                orderBy="startTime"
-            ).execute()
-            for event in events_result.get("items", []):
-                all_events.append({
-                    "id": event["id"],
-                    "calendar_id": cal_id,
-                    "summary": event.get("summary", "(No title)"),
-                    "start": event["start"].get("dateTime", event["start"].get("date")),
-                    "end": event["end"].get("dateTime", event["end"].get("date")),
-                    "location": event.get("location", ""),
-                    "description": event.get("description", ""),
-                    "attendees": [a.get("email") for a in event.get("attendees", [])],
-                    "recurrence": event.get("recurrence", []),
-                    "hangoutLink": event.get("hangoutLink", ""),
-                })
-        except Exception:
-            continue
-
-    all_events.sort(key=lambda e: e["start"])
-    return {"success": True, "events": all_events, "count": len(all_events)}
+    response = {"success": True, "events": all_events, "count": len(all_events)}
+    if errors:
+        response["errors"] = errors
+    return response
 
 
 def get_calendar_id(name_or_id):
     if name_or_id.lower() == "primary":
         return "primary"
 
-    calendars = service.calendarList().list().execute().get("items", [])
-    for cal in calendars:
-        if cal["id"] == name_or_id or cal["summary"].lower() == name_or_id.lower():
-            return cal["id"]
+    for refresh in (False, True):
+        if refresh:
+            # Maybe the calendar was added since the list was cached
+            invalidate_calendar_cache()
+        calendars = get_calendars()
+        for cal in calendars:
+            if cal["id"] == name_or_id or cal["summary"].lower() == name_or_id.lower():
+                return cal["id"]
     raise ValueError(f"Calendar '{name_or_id}' not found. Available: {[c['summary'] for c in calendars]}")
 
 
@@ -263,49 +827,79 @@ def events_overlap(start1, end1, start2, end2):
     return max(start1, start2) < min(end1, end2)
 
 
-# --- Step 6: Enhanced create_new_event with location, recurrence, reminders, color, Meet ---
+@_routine
+def find_conflicts(start_ts, end_ts, calendar_ids):
+    """[(calendar_id, event), ...] from the local stores overlapping [start_ts, end_ts)."""
+    yield from refresh_event_stores.steps(calendar_ids)
+    conflicts = []
+    for cal_id in calendar_ids:
+        for event_start, event_end, event in _event_store(cal_id).entries_between(start_ts, end_ts):
+            if events_overlap(start_ts, end_ts, event_start, event_end):
+                conflicts.append((cal_id, event))
+    return conflicts
 
-def create_new_event(calendar_id, summary, start_str, end_str=None, description=None,
-                     attendees=None, all_day=False, ignore_conflict=False,
-                     location=None, recurrence=None, reminders=None,
-                     color_id=None, add_video_call=False):
-    if not calendar_id:
-        calendar_id = "primary"
 
-    start, end = normalize_event_time(start_str, end_str, all_day)
+def _conflict_response(calendar_id, event):
+    return {"success": False, "error": "Event conflict detected", "conflict": {
+        "calendar_id": calendar_id,
+        "summary": event.get("summary"),
+        "start": event["start"].get("dateTime", event["start"].get("date")),
+        "end": event["end"].get("dateTime", event["end"].get("date")),
+    }}
 
-    if all_day:
-        start_dt = dateparser.parse(start_str)
-        end_dt = dateparser.parse(end_str) if end_str else start_dt + timedelta(days=1)
-    else:
-        start_dt = dateparser.parse(start_str)
-        end_dt = dateparser.parse(end_str) if end_str else start_dt + timedelta(hours=1)
 
-    if not ignore_conflict and not all_day:
-        time_min = (start_dt - timedelta(minutes=5)).isoformat() + "Z"
-        time_max = (end_dt + timedelta(minutes=5)).isoformat() + "Z"
-        try:
-            events_result = service.events().list(
+# --- Step 6: Enhanced create_new_event with location, recurrence, reminders, color, Meet ---
+
+def _check_conflict(calendar_id, start_dt, end_dt, check_all_calendars=False):
+    """Return a conflict response if [start_dt, end_dt) overlaps an existing event, else None."""
+    try:
+        if EVENT_STORE_ENABLED:
+            scope = [c["id"] for c in (yield from get_calendars.steps())] if check_all_calendars else [calendar_id]
+            conflicts = yield from find_conflicts.steps(_to_timestamp(start_dt), _to_timestamp(end_dt), scope)
+            if conflicts:
+                return _conflict_response(*conflicts[0])
+        else:
+            time_min = (start_dt - timedelta(minutes=5)).isoformat() + "Z"
+            time_max = (end_dt + timedelta(minutes=5)).isoformat() + "Z"
+            events_result = yield get_service().events().list(
                 calendarId=calendar_id,
                 timeMin=time_min,
                 timeMax=time_max,
                 singleEvents=True,
-                orderBy="startTime"
-            ).execute()
+                orderBy="startTime",
+                fields=_fields("bounds"),
+            )
             events = events_result.get("items", [])
             for event in events:
-                ev_start = event["start"].get("dateTime", event["start"].get("date"))
-                ev_end = event["end"].get("dateTime", event["end"].get("date"))
-                ev_start_dt = dateparser.parse(ev_start)
-                ev_end_dt = dateparser.parse(ev_end)
+                ev_start_dt = parse_datetime(event["start"].get("dateTime", event["start"].get("date")))
+                ev_end_dt = parse_datetime(event["end"].get("dateTime", event["end"].get("date")))
                 if ev_start_dt and ev_end_dt and events_overlap(start_dt, end_dt, ev_start_dt, ev_end_dt):
-                    return {"success": False, "error": "Event conflict detected", "conflict": {
-                        "summary": event.get("summary"),
-                        "start": ev_start,
-                        "end": ev_end,
-                    }}
-        except Exception:
-            pass  # If conflict check fails, proceed with creation
+                    return _conflict_response(calendar_id, event)
+    except Exception:
+        pass  # If conflict check fails, proceed with creation
+    return None
+
+
+def _prepare_event(summary, start_str, end_str=None, description=None, attendees=None,
+                   all_day=False, location=None, recurrence=None, reminders=None,
+                   color_id=None, add_video_call=False):
+    """Validate and normalize one event locally, without touching the API.
+
+    Returns (body, conference_data_version, start_dt, end_dt).
+    """
+    if not start_str or parse_datetime(start_str) is None:
+        raise ValueError(f"Could not parse start time: {start_str!r}")
+    if end_str and parse_datetime(end_str) is None:
+        raise ValueError(f"Could not parse end time: {end_str!r}")
+
+    start, end = normalize_event_time(start_str, end_str, all_day)
+
+    if all_day:
+        start_dt = parse_datetime(start_str)
+        end_dt = parse_datetime(end_str) if end_str else start_dt + timedelta(days=1)
+    else:
+        start_dt = parse_datetime(start_str)
+        end_dt = parse_datetime(end_str) if end_str else start_dt + timedelta(hours=1)
 
     event = {
         "summary": summary,
@@ -355,32 +949,280 @@ def create_new_event(calendar_id, summary, start_str, end_str=None, description=
         }
         conference_data_version = 1
 
+    return event, conference_data_version, start_dt, end_dt
+
+
+def _insert_response(result):
+    response = {
+        "success": True,
+        "eventId": result["id"],
+        "link": result.get("htmlLink"),
+    }
+    if result.get("hangoutLink"):
+        response["meetLink"] = result["hangoutLink"]
+    return response
+
+
+@_routine
+def create_new_event(calendar_id, summary, start_str, end_str=None, description=None,
+                     attendees=None, all_day=False, ignore_conflict=False,
+                     location=None, recurrence=None, reminders=None,
+                     color_id=None, add_video_call=False, check_all_calendars=False):
+    if not calendar_id:
+        calendar_id = "primary"
+
+    try:
+        event, conference_data_version, start_dt, end_dt = _prepare_event(
+            summary, start_str, end_str, description, attendees, all_day,
+            location, recurrence, reminders, color_id, add_video_call)
+    except ValueError as e:
+        return {"success": False, "error": str(e)}
+
+    if not ignore_conflict and not all_day:
+        conflict = yield from _check_conflict(calendar_id, start_dt, end_dt, check_all_calendars)
+        if conflict:
+            return conflict
+
     try:
-        result = service.events().insert(
+        result = yield get_service().events().insert(
             calendarId=calendar_id,
             body=event,
             conferenceDataVersion=conference_data_version
-        ).execute()
-        response = {
-            "success": True,
-            "eventId": result["id"],
-            "link": result.get("htmlLink"),
-        }
-        if result.get("hangoutLink"):
-            response["meetLink"] = result["hangoutLink"]
-        return response
+        )
+        _record_write(calendar_id, event=result)
+        return _insert_response(result)
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 
+@_routine
+def create_events_bulk(events, calendar_id=None):
+    """Create many events with batched inserts.
+
+    Each item in `events` takes the same keyword arguments as create_new_event;
+    `calendar_id` is the default for items that don't name their own. Items are
+    validated locally first, so a bad one fails on its own without an API call.
+    Returns per-item results in input order.
+    """
+    results = [None] * len(events)
+    requests, targets = {}, {}
+    for idx, spec in enumerate(events):
+        spec = dict(spec)
+        cal_id = spec.pop("calendar_id", None) or calendar_id or "primary"
+        ignore_conflict = spec.pop("ignore_conflict", False)
+        check_all_calendars = spec.pop("check_all_calendars", False)
+        try:
+            event, conference_data_version, start_dt, end_dt = _prepare_event(**spec)
+        except Exception as e:
+            results[idx] = {"success": False, "error": str(e)}
+            continue
+        if not ignore_conflict and not spec.get("all_day"):
+            conflict = yield from _check_conflict(cal_id, start_dt, end_dt, check_all_calendars)
+            if conflict:
+                results[idx] = conflict
+                continue
+        requests[idx] = get_service().events().insert(
+            calendarId=cal_id,
+            body=event,
+            conferenceDataVersion=conference_data_version
+        )
+        targets[idx] = cal_id
+
+    inserted, failed = yield FanOut(requests, "batch")
+    for idx, result in inserted.items():
+        _record_write(targets[idx], event=result)
+        results[idx] = _insert_response(result)
+    for idx, error in failed.items():
+        results[idx] = {"success": False, "error": str(error)}
+
+    created = sum(1 for r in results if r.get("success"))
+    return {"success": created == len(results), "results": results,
+            "created": created, "failed": len(results) - created}
+
+
+# --- Idempotent upserts keyed by external IDs ---
+
+EXTERNAL_ID_PROPERTY = "agentExternalId"
+CONTENT_HASH_PROPERTY = "agentContentHash"
+_upsert_index = None
+_upsert_index_lock = threading.Lock()
+
+
+def _get_upsert_index():
+    global _upsert_index
+    with _upsert_index_lock:
+        if _upsert_index is None:
+            _upsert_index = UpsertIndex(os.path.join(
+                os.path.dirname(__file__), CONFIG.get("upsert_index_path", ".cache/upserts.json")))
+    return _upsert_index
+
+
+@_routine
+def upsert_events_bulk(events, calendar_id=None):
+    """Create or update events keyed by a stable `external_id`, in batches.
+
+    Each item takes create_new_event keyword arguments plus `external_id`.
+    The ID is stored on the event in extendedProperties.private. Items whose
+    content hasn't changed since the last upsert are skipped without an API
+    call; changed ones are patched with only the fields that differ; new ones
+    are inserted. Returns per-item results (with an "action") in input order.
+    """
+    index = _get_upsert_index()
+    results = [None] * len(events)
+    plans = {}
+    for idx, spec in enumerate(events):
+        spec = dict(spec)
+        cal_id = spec.pop("calendar_id", None) or calendar_id or "primary"
+        external_id = spec.pop("external_id", None)
+        spec.pop("ignore_conflict", None)
+        spec.pop("check_all_calendars", None)
+        if not external_id:
+            results[idx] = {"success": False, "error": "Missing external_id"}
+            continue
+        try:
+            body, conference_data_version, _, _ = _prepare_event(**spec)
+        except Exception as e:
+            results[idx] = {"success": False, "error": str(e)}
+            continue
+
+        # conferenceData carries a random requestId, so it stays out of the hash
+        fields = {k: v for k, v in body.items() if k != "conferenceData"}
+        digest = content_hash(fields)
+        body["extendedProperties"] = {"private": {EXTERNAL_ID_PROPERTY: external_id, CONTENT_HASH_PROPERTY: digest}}
+        known = index.get(cal_id, external_id)
+        if known and known["hash"] == digest:
+            results[idx] = {"success": True, "action": "unchanged", "eventId": known["event_id"]}
+            continue
+        plans[idx] = (cal_id, external_id, body, fields, digest, conference_data_version, known)
+
+    # Keys we've never written from here may still exist remotely (another machine, lost cache)
+    lookups = {idx: get_service().events().list(
+        calendarId=plan[0],
+        privateExtendedProperty=f"{EXTERNAL_ID_PROPERTY}={plan[1]}",
+        maxResults=1,
+        fields=_fields("external_id"),
+    ) for idx, plan in plans.items() if plan[6] is None}
+    found, _ = yield FanOut(lookups)
+
+    writes, actions = {}, {}
+    for idx, (cal_id, external_id, body, fields, digest, conference_data_version, known) in plans.items():
+        remote = (found.get(idx, {}).get("items") or [None])[0]
+        if known:
+            patch = diff_fields(known["fields"], fields)
+            patch["extendedProperties"] = body["extendedProperties"]
+            if "conferenceData" in body:
+                patch["conferenceData"] = body["conferenceData"]
+            writes[idx] = get_service().events().patch(
+                calendarId=cal_id, eventId=known["event_id"], body=patch,
+                conferenceDataVersion=conference_data_version)
+            actions[idx] = "updated"
+        elif remote:
+            remote_hash = remote.get("extendedProperties", {}).get("private", {}).get(CONTENT_HASH_PROPERTY)
+            if remote_hash == digest:
+                index.put(cal_id, external_id, remote["id"], fields)
+                results[idx] = {"success": True, "action": "unchanged", "eventId": remote["id"]}
+                continue
+            writes[idx] = get_service().events().patch(
+                calendarId=cal_id, eventId=remote["id"], body=body,
+                conferenceDataVersion=conference_data_version)
+            actions[idx] = "updated"
+        else:
+            writes[idx] = get_service().events().insert(
+                calendarId=cal_id, body=body, conferenceDataVersion=conference_data_version)
+            actions[idx] = "created"
+
+    done, failed = yield FanOut(writes, "batch")
+    for idx, result in done.items():
+        cal_id, external_id, _, fields = plans[idx][:4]
+        index.put(cal_id, external_id, result["id"], fields)
+        _record_write(cal_id, event=result)
+        results[idx] = {**_insert_response(result), "action": actions[idx]}
+    for idx, error in failed.items():
+        cal_id, external_id = plans[idx][:2]
+        # The event was deleted on Google's side; the next upsert recreates it
+        if getattr(getattr(error, "resp", None), "status", None) in (404, 410):
+            index.forget(cal_id, external_id)
+        results[idx] = {"success": False, "error": str(error)}
+    index.save()
+
+    counts = {}
+    for result in results:
+        key = result.get("action", "failed") if result.get("success") else "failed"
+        counts[key] = counts.get(key, 0) + 1
+    return {"success": "failed" not in counts, "results": results, "counts": counts}
+
+
+@_routine
+def upsert_event(calendar_id, external_id, summary, start_str, **kwargs):
+    """Create or update a single event keyed by `external_id` (see upsert_events_bulk)."""
+    response = yield from upsert_events_bulk.steps([dict(kwargs, calendar_id=calendar_id, external_id=external_id,
+                                                         summary=summary, start_str=start_str)])
+    return response["results"][0]
+
+
+# --- Fuzzy event lookup across calendars ---
+
+_summary_index = SummaryIndex()
+
+
+@_routine
+def search_events(query, calendar_ids=None, start_ts=None, end_ts=None, near_ts=None, limit=None):
+    """Ranked [(calendar_id, event, score)] whose summary fuzzy-matches `query`.
+
+    Only events overlapping [start_ts, end_ts) are considered; ranking favors
+    events starting close to `near_ts`. Searches every calendar by default.
+    """
+    if calendar_ids is None:
+        calendar_ids = [c["id"] for c in (yield from get_calendars.steps())]
+    yield from refresh_event_stores.steps(calendar_ids)
+    _summary_index.refresh(list(_event_stores.values()))
+    return _summary_index.search(query, [_store_id(cal_id) for cal_id in calendar_ids],
+                                 start_ts, end_ts, near_ts, limit)
+
+
+def _other_calendar_ids(calendar_id):
+    """Every calendar except `calendar_id` ("primary" is matched by flag, not ID)."""
+    return [c["id"] for c in (yield from get_calendars.steps())
+            if c["id"] != calendar_id and not (calendar_id == "primary" and c.get("primary"))]
+
+
+def _find_events(calendar_id, query, start_ts, end_ts, near_ts, search_others=False):
+    """Ranked [(calendar_id, event)] matching `query`, best first.
+
+    Looks in `calendar_id` first. With `search_others` (for when the caller
+    only defaulted to primary rather than naming a calendar) the user's other
+    calendars are searched too if nothing there matches.
+    """
+    if EVENT_STORE_ENABLED:
+        matches = yield from search_events.steps(query, [calendar_id], start_ts, end_ts, near_ts)
+        if not matches and query and search_others:
+            others = yield from _other_calendar_ids(calendar_id)
+            matches = yield from search_events.steps(query, others, start_ts, end_ts, near_ts)
+        return [(cal_id, event) for cal_id, event, _ in matches]
+
+    time_min = datetime.fromtimestamp(start_ts, timezone.utc).isoformat()
+    time_max = datetime.fromtimestamp(end_ts, timezone.utc).isoformat() if end_ts is not None else None
+    kwargs = {"calendarId": calendar_id, "timeMin": time_min, "singleEvents": True,
+              "orderBy": "startTime", "maxResults": EVENT_PAGE_SIZE, "fields": _fields("records")}
+    if time_max:
+        kwargs["timeMax"] = time_max
+    events = (yield get_service().events().list(**kwargs)).get("items", [])
+    starts = np.array([event_bounds(ev, TIMEZONE)[0] for ev in events], dtype=np.float64)
+    order, _ = rank(query, [normalize(ev.get("summary")) for ev in events], starts, near_ts=near_ts)
+    return [(calendar_id, events[i]) for i in order]
+
+
 # --- Step 5: Update/edit existing events ---
 
-def update_event(calendar_id, event_id=None, summary_search=None, start_str_search=None,
+@_routine
+def update_event(calendar_id=None, event_id=None, summary_search=None, start_str_search=None,
                  new_summary=None, new_start_str=None, new_end_str=None,
                  new_description=None, new_location=None, new_attendees=None,
                  new_recurrence=None, new_reminders=None, new_color_id=None,
                  add_video_call=False):
     """Update an existing event. Find by event_id or by fuzzy-matching summary + time."""
+    # Only a defaulted calendar widens the search; a named one is taken at its word
+    search_others = not calendar_id
     if not calendar_id:
         calendar_id = "primary"
 
@@ -388,44 +1230,23 @@ def update_event(calendar_id, event_id=None, summary_search=None, start_str_sear
     event = None
     if event_id:
         try:
-            event = service.events().get(calendarId=calendar_id, eventId=event_id).execute()
+            event = yield get_service().events().get(calendarId=calendar_id, eventId=event_id)
         except Exception as e:
             return {"success": False, "error": f"Event not found: {str(e)}"}
     elif summary_search:
-        # Fuzzy search for the event
-        now = datetime.utcnow().isoformat() + "Z"
-        time_min = now
-        time_max = None
+        # Fuzzy search across the calendar's events, preferring ones near the given time
+        now_ts = datetime.now(timezone.utc).timestamp()
+        window, near_ts = (now_ts, None), now_ts
         if start_str_search:
-            dt = dateparser.parse(start_str_search)
+            dt = parse_datetime(start_str_search)
             if dt:
-                time_min = (dt - timedelta(hours=12)).isoformat() + "Z"
-                time_max = (dt + timedelta(hours=12)).isoformat() + "Z"
+                near_ts = _to_timestamp(dt)
+                window = (near_ts - 12 * 3600, near_ts + 12 * 3600)
 
         try:
-            kwargs = {
-                "calendarId": calendar_id,
-                "timeMin": time_min,
-                "singleEvents": True,
-                "orderBy": "startTime",
-                "maxResults": 50,
-            }
-            if time_max:
-                kwargs["timeMax"] = time_max
-            events_result = service.events().list(**kwargs).execute()
-            events = events_result.get("items", [])
-
-            best_match = None
-            best_score = 0
-            for ev in events:
-                ev_summary = ev.get("summary", "")
-                score = fuzz.partial_ratio(ev_summary.lower(), summary_search.lower())
-                if score > best_score and score > 60:
-                    best_score = score
-                    best_match = ev
-
-            if best_match:
-                event = best_match
+            matches = yield from _find_events(calendar_id, summary_search, *window, near_ts, search_others)
+            if matches:
+                calendar_id, event = matches[0]
             else:
                 return {"success": False, "error": f"No event matching '{summary_search}' found"}
         except Exception as e:
@@ -433,38 +1254,40 @@ def update_event(calendar_id, event_id=None, summary_search=None, start_str_sear
     else:
         return {"success": False, "error": "Provide event_id or summary_search to find the event"}
 
-    # Apply updates
+    # Send only what changes: a stored copy may be a partial resource (see
+    # calendar_core.fields), and a full update would wipe the fields it lacks
+    changes = {}
     if new_summary:
-        event["summary"] = new_summary
+        changes["summary"] = new_summary
     if new_start_str or new_end_str:
         is_all_day = "date" in event.get("start", {})
         start_s = new_start_str or event["start"].get("dateTime", event["start"].get("date"))
         end_s = new_end_str or event["end"].get("dateTime", event["end"].get("date"))
         new_start, new_end = normalize_event_time(start_s, end_s, all_day=is_all_day)
-        event["start"] = new_start
-        event["end"] = new_end
+        changes["start"] = new_start
+        changes["end"] = new_end
     if new_description is not None:
-        event["description"] = new_description
+        changes["description"] = new_description
     if new_location is not None:
-        event["location"] = new_location
+        changes["location"] = new_location
     if new_attendees is not None:
-        event["attendees"] = [{"email": a} for a in new_attendees]
+        changes["attendees"] = [{"email": a} for a in new_attendees]
     if new_recurrence is not None:
         if isinstance(new_recurrence, str):
-            event["recurrence"] = [new_recurrence]
+            changes["recurrence"] = [new_recurrence]
         else:
-            event["recurrence"] = new_recurrence
+            changes["recurrence"] = new_recurrence
     if new_reminders is not None:
-        event["reminders"] = {
+        changes["reminders"] = {
             "useDefault": False,
             "overrides": new_reminders
         }
     if new_color_id is not None:
-        event["colorId"] = str(new_color_id)
+        changes["colorId"] = str(new_color_id)
 
     conference_data_version = 0
     if add_video_call and not event.get("hangoutLink"):
-        event["conferenceData"] = {
+        changes["conferenceData"] = {
             "createRequest": {
                 "requestId": str(uuid.uuid4()),
                 "conferenceSolutionKey": {"type": "hangoutsMeet"}
@@ -473,15 +1296,17 @@ def update_event(calendar_id, event_id=None, summary_search=None, start_str_sear
         conference_data_version = 1
 
     try:
-        result = service.events().update(
+        result = yield get_service().events().patch(
             calendarId=calendar_id,
             eventId=event["id"],
-            body=event,
+            body=changes,
             conferenceDataVersion=conference_data_version
-        ).execute()
+        )
+        _record_write(calendar_id, event=result)
         response = {
             "success": True,
             "eventId": result["id"],
+            "calendar_id": calendar_id,
             "link": result.get("htmlLink"),
             "updated_summary": result.get("summary"),
         }
@@ -492,13 +1317,15 @@ def update_event(calendar_id, event_id=None, summary_search=None, start_str_sear
         return {"success": False, "error": str(e)}
 
 
-def delete_event(calendar_id, summary=None, start_str=None, end_str=None):
+@_routine
+def delete_event(calendar_id=None, summary=None, start_str=None, end_str=None):
+    search_others = not calendar_id
     if not calendar_id:
         calendar_id = "primary"
 
     def extract_summary_and_time(text):
         cleaned = re.sub(r'on [^ ]+ calendar', '', text, flags=re.IGNORECASE)
-        dt = dateparser.parse(cleaned, settings={'PREFER_DATES_FROM': 'future'})
+        dt = parse_datetime(cleaned, settings={'PREFER_DATES_FROM': 'future'})
         summary = re.sub(r'at \d{1,2}(:\d{2})?\s*(am|pm)?', '', cleaned, flags=re.IGNORECASE)
         summary = re.sub(r'tomorrow|today|on \d{1,2}/\d{1,2}/\d{2,4}', '', summary, flags=re.IGNORECASE)
         summary = summary.strip()
@@ -509,44 +1336,175 @@ def delete_event(calendar_id, summary=None, start_str=None, end_str=None):
         if dt:
             start_str = dt.isoformat()
 
-    now = datetime.utcnow().isoformat() + "Z"
-    time_min = now
-    time_max = None
+    now_ts = datetime.now(timezone.utc).timestamp()
+    window, near_ts = (now_ts, None), now_ts
     if start_str:
-        start_dt = dateparser.parse(start_str)
+        start_dt = parse_datetime(start_str)
         if not end_str:
             end_dt = start_dt + timedelta(hours=1)
         else:
-            end_dt = dateparser.parse(end_str)
-        time_min = start_dt.isoformat() + "Z"
-        time_max = (end_dt + timedelta(hours=1)).isoformat() + "Z"
+            end_dt = parse_datetime(end_str)
+        near_ts = _to_timestamp(start_dt)
+        window = (near_ts, _to_timestamp(end_dt + timedelta(hours=1)))
 
     try:
-        events_result = service.events().list(
-            calendarId=calendar_id,
-            timeMin=time_min,
-            timeMax=time_max,
-            singleEvents=True,
-            orderBy="startTime"
-        ).execute()
-        events = events_result.get("items", [])
-
-        matching_events = []
-        for event in events:
-            ev_summary = event.get("summary", "").strip().lower()
-            if summary:
-                if fuzz.partial_ratio(ev_summary, summary.lower()) > 60:
-                    matching_events.append(event)
-            else:
-                matching_events.append(event)
-
-        if not matching_events:
+        matches = yield from _find_events(calendar_id, summary, *window, near_ts, search_others)
+        if not matches:
             return {"success": False, "error": "No matching events found"}
 
-        for event in matching_events:
-            service.events().delete(calendarId=calendar_id, eventId=event["id"]).execute()
-            return {"success": True, "deleted": event.get("summary")}
+        calendar_id, event = matches[0]
+        yield get_service().events().delete(calendarId=calendar_id, eventId=event["id"])
+        _record_write(calendar_id, deleted_id=event["id"])
+        return {"success": True, "deleted": event.get("summary"), "calendar_id": calendar_id}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+# --- Bulk delete and bulk update ---
+
+def _select_events(calendar_id, summary, start_str, end_str):
+    """Events in a range whose summary fuzzy-matches `summary`, in start order.
+
+    With no `calendar_id` every calendar is searched; with no `summary` every
+    event in the range matches. Returns (records, errors).
+    """
+    start_dt = _coerce_datetime(start_str) or datetime.now(timezone.utc)
+    end_dt = _coerce_datetime(end_str) or start_dt + timedelta(days=7)
+    errors = {}
+    records = yield from merged_events.steps([calendar_id] if calendar_id else None, start_dt, end_dt, errors)
+    if summary:
+        order, _ = rank(summary, [normalize(r.summary) for r in records], np.zeros(len(records)))
+        records = [records[i] for i in sorted(order)]
+    return records, errors
+
+
+def _shift_time(value, minutes):
+    """Shift a start/end string by `minutes`; all-day dates only move by whole days."""
+    if "T" in value:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00")) + timedelta(minutes=minutes)
+        return {"dateTime": dt.isoformat()}
+    if minutes % 1440:
+        raise ValueError("All-day events can only be shifted by whole days")
+    return {"date": (datetime.fromisoformat(value) + timedelta(minutes=minutes)).date().isoformat()}
+
+
+def _bulk_item(record, **status):
+    return {"id": record.id, "calendar_id": record.calendar_id, "summary": record.summary,
+            "start": record.start, **status}
+
+
+def _bulk_response(matches, results, errors, key):
+    done = sum(1 for r in results if r.get("success"))
+    response = {"success": done == len(results), "matched": len(matches), key: done,
+                "failed": len(results) - done, "results": results}
+    if errors:
+        response["errors"] = errors
+    return response
 
-        return {"success": False, "error": "No matching events found"}
+
+@_routine
+def delete_events_bulk(calendar_id=None, summary=None, start_str=None, end_str=None, dry_run=False):
+    """Delete every event matching `summary` in a range, as batched deletes.
+
+    The range defaults to the next 7 days. `dry_run` returns what would be
+    deleted without touching anything. Returns per-event status.
+    """
+    if not calendar_id and not summary:
+        return {"success": False, "error": "Provide a calendar_id or a summary to match"}
+    try:
+        matches, errors = yield from _select_events(calendar_id, summary, start_str, end_str)
     except Exception as e:
         return {"success": False, "error": str(e)}
+
+    if dry_run:
+        return {"success": True, "dry_run": True, "matched": len(matches),
+                "results": [_bulk_item(r) for r in matches], **({"errors": errors} if errors else {})}
+
+    requests = {idx: get_service().events().delete(calendarId=r.calendar_id, eventId=r.id)
+                for idx, r in enumerate(matches)}
+    _, failed = yield FanOut(requests, "batch")
+    results = []
+    for idx, record in enumerate(matches):
+        if idx in failed:
+            results.append(_bulk_item(record, success=False, error=str(failed[idx])))
+        else:
+            _record_write(record.calendar_id, deleted_id=record.id)
+            results.append(_bulk_item(record, success=True))
+    return _bulk_response(matches, results, errors, "deleted")
+
+
+@_routine
+def update_events_bulk(calendar_id=None, summary=None, start_str=None, end_str=None,
+                       shift_minutes=0, new_summary=None, new_location=None, new_color_id=None,
+                       dry_run=False):
+    """Patch every event matching `summary` in a range, as batched patches.
+
+    `shift_minutes` moves each event (start and end) by that much; the other
+    fields are set on every match. `dry_run` returns the planned changes
+    without touching anything. Returns per-event status.
+    """
+    if not calendar_id and not summary:
+        return {"success": False, "error": "Provide a calendar_id or a summary to match"}
+    fields = {"summary": new_summary, "location": new_location, "colorId": new_color_id}
+    fields = {key: value for key, value in fields.items() if value is not None}
+    if not shift_minutes and not fields:
+        return {"success": False, "error": "Nothing to change"}
+    try:
+        matches, errors = yield from _select_events(calendar_id, summary, start_str, end_str)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+    results = [None] * len(matches)
+    requests, patches = {}, {}
+    for idx, record in enumerate(matches):
+        patch = dict(fields)
+        try:
+            if shift_minutes:
+                patch["start"] = _shift_time(record.start, shift_minutes)
+                patch["end"] = _shift_time(record.end, shift_minutes)
+        except ValueError as e:
+            results[idx] = _bulk_item(record, success=False, error=str(e))
+            continue
+        patches[idx] = patch
+        if not dry_run:
+            requests[idx] = get_service().events().patch(
+                calendarId=record.calendar_id, eventId=record.id, body=patch)
+
+    if dry_run:
+        for idx, patch in patches.items():
+            results[idx] = _bulk_item(matches[idx], changes=patch)
+        return {"success": True, "dry_run": True, "matched": len(matches),
+                "results": results, **({"errors": errors} if errors else {})}
+
+    patched, failed = yield FanOut(requests, "batch")
+    for idx, event in patched.items():
+        _record_write(matches[idx].calendar_id, event=event)
+        results[idx] = _bulk_item(matches[idx], success=True, changes=patches[idx])
+    for idx, error in failed.items():
+        results[idx] = _bulk_item(matches[idx], success=False, error=str(error))
+    return _bulk_response(matches, results, errors, "updated")
+
+
+# --- Async API ---
+# The same tools for async callers (the web server): identical behaviour, but
+# Calendar requests are awaited over httpx instead of blocking a thread.
+
+create_new_event_async = create_new_event.aio
+update_event_async = update_event.aio
+delete_event_async = delete_event.aio
+list_events_async = list_events.aio
+get_next_event_async = get_next_event.aio
+get_next_events_async = get_next_events.aio
+find_free_slots_async = find_free_slots.aio
+suggest_next_free_slot_async = suggest_next_free_slot.aio
+delete_events_bulk_async = delete_events_bulk.aio
+update_events_bulk_async = update_events_bulk.aio
+upsert_events_bulk_async = upsert_events_bulk.aio
+sync_event_store_async = sync_event_store.aio
+ensure_watch_channels_async = ensure_watch_channels.aio
+stop_watch_channel_async = stop_watch_channel.aio
+
+
+async def close_async_transport():
+    """Close the pooled httpx connections (on server shutdown)."""
+    await _async_transport.aclose()
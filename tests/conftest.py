@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GOOGLE_API_KEY", "test")
+
+from calendar_core.fake_calendar import FakeCalendar  # noqa: E402
+
+
+def timed(event_id, start, end, summary=None, **extra):
+    """A timed event resource; `start`/`end` are ISO strings with offsets."""
+    return dict({"id": event_id, "summary": summary or event_id, "status": "confirmed",
+                 "start": {"dateTime": start}, "end": {"dateTime": end}}, **extra)
+
+
+@pytest.fixture
+def calendar(tmp_path, monkeypatch):
+    """google_calendar wired to an empty FakeCalendar, with stores and indexes under tmp_path."""
+    import google_calendar
+    from calendar_core.upsert_index import UpsertIndex
+
+    monkeypatch.setitem(google_calendar.EVENT_STORE_CONFIG, "path", str(tmp_path / "events"))
+    monkeypatch.setattr(google_calendar, "_upsert_index", UpsertIndex(str(tmp_path / "upserts.json")))
+    fake = FakeCalendar(tz=google_calendar.TIMEZONE)
+    fake.add_calendar({"id": "owner@example.com", "summary": "Personal", "primary": True})
+    fake.add_calendar({"id": "work@group.calendar.google.com", "summary": "Work"})
+    google_calendar.use_service(fake)
+    yield fake
+    google_calendar.use_service(None)
@@ -0,0 +1,40 @@
+import pytest
+
+pytest.importorskip("uvicorn")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import google_calendar as gc  # noqa: E402
+from conftest import timed  # noqa: E402
+
+
+@pytest.fixture
+def client(calendar, monkeypatch):
+    import voice_mcp
+
+    for i in range(3):
+        calendar.events().insert(calendarId="primary", body=timed(
+            None, f"2030-01-0{i + 7}T17:00:00+00:00", f"2030-01-0{i + 7}T18:00:00+00:00", summary="Gym")).execute()
+
+    async def parse(command_text):
+        return "delete_events_bulk", {"summary": "gym", "start_str": "2030-01-07", "end_str": "2030-01-14"}
+
+    monkeypatch.setattr(voice_mcp, "gemini_parse_async", parse)
+    with TestClient(voice_mcp.app) as client:
+        yield client
+
+
+def gym_count():
+    return len(gc.list_events("primary", "2030-01-07", "2030-01-14")["events"])
+
+
+def test_bulk_delete_is_previewed_until_confirmed(client):
+    preview = client.post("/command", json={"command": "delete all my gym sessions"}).json()
+    assert preview["status"] == "confirm"
+    assert preview["result"]["dry_run"] and preview["result"]["matched"] == 3
+    assert gym_count() == 3
+
+    applied = client.post("/command", json={"command": "delete all my gym sessions", "confirm": True}).json()
+    assert applied["status"] == "ok"
+    assert applied["result"]["deleted"] == 3
+    assert gym_count() == 0
@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta, timezone
+
+from calendar_core import persist
+from calendar_core.event_store import EventStore
+from calendar_core.fake_calendar import FakeCalendar
+
+from conftest import timed
+
+CAL = "owner@example.com"
+
+
+def soon(hours):
+    return (datetime.now(timezone.utc) + timedelta(hours=hours)).replace(microsecond=0).isoformat()
+
+
+def make_fake():
+    fake = FakeCalendar()
+    fake.add_calendar({"id": CAL, "primary": True, "events": [
+        timed("a", soon(1), soon(2)),
+        timed("b", soon(3), soon(4)),
+    ]})
+    return fake
+
+
+def stored_ids(store):
+    return [event["id"] for _, _, event in store.entries()]
+
+
+def test_initial_then_incremental_sync(tmp_path):
+    fake = make_fake()
+    store = EventStore(CAL, str(tmp_path))
+    assert store.sync(fake) == 2
+    assert stored_ids(store) == ["a", "b"]
+
+    fake.events().delete(calendarId=CAL, eventId="a").execute()
+    created = fake.events().insert(calendarId=CAL, body=timed("c", soon(5), soon(6))).execute()
+    assert store.sync(fake) == 2        # one tombstone, one new event
+    assert stored_ids(store) == ["b", created["id"]]
+
+
+def test_expired_sync_token_falls_back_to_full_sync(tmp_path):
+    fake = make_fake()
+    store = EventStore(CAL, str(tmp_path))
+    store.sync(fake)
+    store.sync_token = "bogus"
+    store.sync(fake)
+    assert stored_ids(store) == ["a", "b"]
+    assert store.sync_token.startswith(CAL)
+
+
+def test_store_persists_and_reloads(tmp_path):
+    fake = make_fake()
+    EventStore(CAL, str(tmp_path)).sync(fake)
+    persist.flush()
+    reloaded = EventStore(CAL, str(tmp_path))
+    assert stored_ids(reloaded) == ["a", "b"]
+    assert reloaded.sync_token is not None
+
+
+def test_recurring_master_is_expanded_with_exceptions(tmp_path):
+    start = (datetime.now(timezone.utc) + timedelta(days=1)).replace(hour=15, minute=0, second=0, microsecond=0)
+    fake = FakeCalendar()
+    fake.add_calendar({"id": CAL, "primary": True, "events": [
+        timed("daily", start.isoformat(), (start + timedelta(hours=1)).isoformat(),
+              recurrence=["RRULE:FREQ=DAILY;COUNT=3"]),
+    ]})
+    store = EventStore(CAL, str(tmp_path))
+    store.sync(fake)
+    second = f"daily_{(start + timedelta(days=1)).strftime('%Y%m%dT%H%M%SZ')}"
+    fake.events().delete(calendarId=CAL, eventId=second).execute()
+    store.sync(fake)
+    ids = stored_ids(store)
+    assert len(ids) == 2 and second not in ids
+
+
+def test_sync_while_another_is_in_flight_defers_to_it(tmp_path):
+    fake = make_fake()
+    store = EventStore(CAL, str(tmp_path))
+    store.sync(fake)
+
+    running = store.sync_steps(fake)
+    request = next(running)
+    assert store.sync(fake) == 0        # doesn't race the running sync
+    created = fake.events().insert(calendarId=CAL, body=timed("c", soon(5), soon(6))).execute()
+    try:
+        while True:
+            request = running.send(request.execute())
+    except StopIteration as done:
+        changed = done.value
+    # The running sync went round again and picked up the change behind the second request
+    assert changed == 1
+    assert created["id"] in stored_ids(store)
+    assert not store.syncing
@@ -0,0 +1,52 @@
+import asyncio
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import google_calendar as gc
+from conftest import timed
+
+
+def at(days, hour):
+    return (datetime.now() + timedelta(days=days)).replace(hour=hour, minute=0, second=0, microsecond=0).isoformat()
+
+
+def zoned(days, hour):
+    return datetime.fromisoformat(at(days, hour)).replace(tzinfo=ZoneInfo(gc.TIMEZONE)).isoformat()
+
+
+def test_primary_alias_shares_the_real_calendars_store(calendar):
+    gc.list_events("owner@example.com", at(1, 0), at(2, 0))
+    created = gc.create_new_event("primary", "Dentist", at(1, 10), at(1, 11))
+    assert created["success"]
+    assert set(gc._event_stores) == {"owner@example.com"}
+
+    listed = gc.list_events("primary", at(1, 0), at(2, 0))
+    assert [event["summary"] for event in listed["events"]] == ["Dentist"]
+    store = gc.get_event_store("primary")
+    assert store is gc._event_stores["owner@example.com"]
+
+
+def test_primary_write_is_mirrored_without_a_resync(calendar):
+    gc.list_events("primary", at(1, 0), at(2, 0))
+    gc.create_new_event("owner@example.com", "Standup", at(1, 9), at(1, 10))
+    entries = gc._event_stores["owner@example.com"].entries()
+    assert [event["summary"] for _, _, event in entries] == ["Standup"]
+    assert "primary" not in gc._event_stores
+
+
+def test_conflict_check_waits_for_a_first_sync_already_in_flight(calendar):
+    calendar.events().insert(calendarId="owner@example.com", body=timed(
+        None, zoned(1, 10), zoned(1, 11), summary="Dentist")).execute()
+    calendar.latency = 0.05
+
+    async def race():
+        listing = asyncio.create_task(gc.list_events_async("primary", at(1, 0), at(2, 0)))
+        while not getattr(gc._event_stores.get("owner@example.com"), "syncing", False):
+            await asyncio.sleep(0.005)      # until the listing's first sync is in flight
+        created = await gc.create_new_event_async("primary", "Standup", at(1, 10), at(1, 11))
+        return await listing, created
+
+    listed, created = asyncio.run(race())
+    assert [event["summary"] for event in listed["events"]] == ["Dentist"]
+    assert created["error"] == "Event conflict detected"
+    assert calendar.calls["events.insert"] == 1
@@ -0,0 +1,35 @@
+import pytest
+from googleapiclient.errors import HttpError
+
+from calendar_core.fake_calendar import FakeCalendar, synthetic
+
+from conftest import timed
+
+
+def test_primary_alias_resolves_to_flagged_calendar():
+    fake = FakeCalendar.from_fixture(synthetic(2, 10, seed=1))
+    primary = next(c["id"] for c in fake.calendars.values() if c.get("primary"))
+    assert primary != "primary"
+    created = fake.events().insert(calendarId="primary",
+                                   body=timed("x", "2030-01-01T10:00:00Z", "2030-01-01T11:00:00Z")).execute()
+    assert created["id"] in fake.resources[primary]
+    busy = fake.freebusy().query(body={"timeMin": "2030-01-01T00:00:00Z", "timeMax": "2030-01-02T00:00:00Z",
+                                       "items": [{"id": "primary"}]}).execute()
+    assert busy["calendars"]["primary"]["busy"] == [{"start": "2030-01-01T10:00:00Z", "end": "2030-01-01T11:00:00Z"}]
+
+
+def test_unknown_sync_token_is_410():
+    fake = FakeCalendar([{"id": "c", "primary": True}])
+    with pytest.raises(HttpError) as error:
+        fake.events().list(calendarId="c", syncToken="bogus").execute()
+    assert error.value.resp.status == 410
+
+
+def test_calendar_list_revalidates_with_etag():
+    fake = FakeCalendar([{"id": "c"}])
+    first = fake.calendarList().list().execute()
+    request = fake.calendarList().list()
+    request.headers["If-None-Match"] = first["etag"]
+    with pytest.raises(HttpError) as error:
+        request.execute()
+    assert error.value.resp.status == 304
@@ -0,0 +1,34 @@
+import pytest
+
+import google_calendar as gc
+from conftest import timed
+
+WORK = "work@group.calendar.google.com"
+START = "2030-01-07T10:00:00+00:00"
+
+
+@pytest.fixture
+def dentist_on_work(calendar):
+    return calendar.events().insert(calendarId=WORK, body=timed(
+        None, START, "2030-01-07T11:00:00+00:00", summary="Dentist")).execute()
+
+
+def test_named_calendar_is_not_widened(dentist_on_work):
+    assert gc.delete_event("primary", "Dentist", START)["success"] is False
+    assert gc.update_event("primary", summary_search="Dentist", start_str_search=START,
+                           new_summary="Orthodontist")["success"] is False
+
+
+def test_defaulted_calendar_falls_back_to_the_others(calendar, dentist_on_work):
+    updated = gc.update_event(summary_search="Dentist", start_str_search=START, new_summary="Orthodontist")
+    assert updated["success"] and updated["calendar_id"] == WORK
+
+    deleted = gc.delete_event(None, "Orthodontist", START)
+    assert deleted == {"success": True, "deleted": "Orthodontist", "calendar_id": WORK}
+    assert calendar.resources[WORK][dentist_on_work["id"]]["status"] == "cancelled"
+
+
+def test_response_names_the_calendar_it_was_found_on(calendar):
+    calendar.events().insert(calendarId="primary", body=timed(
+        None, START, "2030-01-07T11:00:00+00:00", summary="Standup")).execute()
+    assert gc.delete_event("primary", "Standup", START)["calendar_id"] == "owner@example.com"
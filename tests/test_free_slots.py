@@ -0,0 +1,47 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+import google_calendar as gc
+from conftest import timed
+
+MONDAY = "2030-01-07"
+
+
+@pytest.fixture
+def working_day(calendar, monkeypatch):
+    monkeypatch.setattr(gc, "WORKING_HOURS", {"start": 8, "end": 21})
+    return calendar
+
+
+def local(day, hhmm):
+    return datetime.fromisoformat(f"{day}T{hhmm}").replace(tzinfo=ZoneInfo(gc.TIMEZONE)).isoformat()
+
+
+def busy(fake, day, start, end):
+    fake.events().insert(calendarId="primary", body=timed(None, local(day, start), local(day, end))).execute()
+
+
+def test_short_gap_is_not_joined_across_a_fully_busy_window(working_day):
+    busy(working_day, MONDAY, "08:00", "11:30")
+    busy(working_day, MONDAY, "12:00", "21:00")
+    result = gc.suggest_next_free_slot(local(MONDAY, "08:00"), 60)
+    assert result["success"]
+    assert result["suggested_slot"]["start"] == local("2030-01-08", "08:00")
+    assert result["suggested_slot"]["duration_minutes"] == 13 * 60
+
+
+def test_gap_spanning_a_window_boundary_is_joined(working_day):
+    busy(working_day, MONDAY, "08:00", "11:30")
+    busy(working_day, MONDAY, "12:45", "21:00")
+    result = gc.suggest_next_free_slot(local(MONDAY, "08:00"), 60)
+    assert result["suggested_slot"]["start"] == local(MONDAY, "11:30")
+    assert result["suggested_slot"]["end"] == local(MONDAY, "12:45")
+
+
+def test_iter_free_slots_skips_busy_stretches(working_day):
+    busy(working_day, MONDAY, "08:00", "20:00")
+    slots = gc.iter_free_slots(local(MONDAY, "08:00"), 60)
+    assert next(slots)["start"] == local(MONDAY, "20:00")
+    assert next(slots)["start"] == local("2030-01-08", "08:00")
@@ -0,0 +1,37 @@
+import numpy as np
+
+from calendar_core import intervals
+
+
+def arrays(pairs):
+    return intervals.to_arrays(pairs)
+
+
+def test_merge_joins_overlapping_and_touching():
+    starts, ends = intervals.merge(*arrays([(50, 60), (0, 10), (10, 20), (15, 30)]))
+    assert starts.tolist() == [0, 50]
+    assert ends.tolist() == [30, 60]
+
+
+def test_free_intervals_respects_minimum_length():
+    starts, ends = intervals.free_intervals(*arrays([(10, 20), (25, 40)]), 0, 100, min_seconds=10)
+    assert list(zip(starts.tolist(), ends.tolist())) == [(0, 10), (40, 100)]
+
+
+def test_free_intervals_with_nothing_busy_is_the_whole_range():
+    starts, ends = intervals.free_intervals(np.empty(0, np.int64), np.empty(0, np.int64), 0, 100)
+    assert list(zip(starts.tolist(), ends.tolist())) == [(0, 100)]
+
+
+def test_off_hours_blocks_outside_the_working_day():
+    # 2030-01-07 is a Monday; midnight to midnight UTC
+    lo = 1893974400
+    blocked = intervals.off_hours(lo, lo + 86400, "UTC", 8, 21)
+    starts, ends = intervals.free_intervals(*blocked, lo, lo + 86400)
+    assert list(zip(starts.tolist(), ends.tolist())) == [(lo + 8 * 3600, lo + 21 * 3600)]
+
+
+def test_off_hours_blocks_excluded_weekdays_entirely():
+    lo = 1893974400
+    blocked = intervals.off_hours(lo, lo + 86400, "UTC", 8, 21, weekdays={1, 2, 3, 4})
+    assert len(intervals.free_intervals(*blocked, lo, lo + 86400)[0]) == 0
@@ -0,0 +1,40 @@
+from datetime import datetime, timedelta, timezone
+import itertools
+
+import pytest
+
+import google_calendar as gc
+from conftest import timed
+
+START = datetime(2030, 1, 7, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def two_calendars(calendar):
+    for i in range(12):
+        cal_id = "primary" if i % 2 else "work@group.calendar.google.com"
+        begin = START + timedelta(hours=i)
+        calendar.events().insert(calendarId=cal_id, body=timed(
+            None, begin.isoformat(), (begin + timedelta(minutes=30)).isoformat(), summary=f"e{i:02d}")).execute()
+    return calendar
+
+
+@pytest.mark.parametrize("store", [True, False])
+def test_iter_events_merges_calendars_in_start_order(two_calendars, monkeypatch, store):
+    monkeypatch.setattr(gc, "EVENT_STORE_ENABLED", store)
+    records = list(gc.iter_events(None, START, START + timedelta(days=1)))
+    assert [record.summary for record in records] == [f"e{i:02d}" for i in range(12)]
+    assert [event.summary for event in gc.merged_events(None, START, START + timedelta(days=1), limit=5)] == \
+        [f"e{i:02d}" for i in range(5)]
+
+
+def test_iter_events_fetches_later_pages_only_when_reached(two_calendars, monkeypatch):
+    monkeypatch.setattr(gc, "EVENT_STORE_ENABLED", False)
+    monkeypatch.setattr(gc, "EVENT_PAGE_SIZE", 2)
+    calendar_ids = ["owner@example.com", "work@group.calendar.google.com"]
+    events = gc.iter_events(calendar_ids, START, START + timedelta(days=1))
+    assert next(events).summary == "e00"
+    before = two_calendars.round_trips
+    assert [record.summary for record in itertools.islice(events, 3)] == ["e01", "e02", "e03"]
+    assert two_calendars.round_trips == before + 1
+    assert len(list(events)) == 8
@@ -0,0 +1,34 @@
+from datetime import datetime, timedelta
+
+from calendar_core import persist
+from calendar_core.parse_cache import ParseCache, near_clock
+
+NOW = datetime(2030, 1, 7, 9, 15)
+HOURS = 3 * 3600
+
+
+def test_clock_relative_phrasing_is_never_keyed():
+    assert ParseCache.key("Remind me in 20 minutes", "ctx") is None
+    assert ParseCache.key("What do I have tomorrow?", "ctx") == ParseCache.key("what do i have  tomorrow", "ctx")
+
+
+def test_times_near_now_pin_a_parse_to_the_clock():
+    assert near_clock({"start_str": (NOW + timedelta(minutes=5)).isoformat()}, NOW, HOURS)
+    assert near_clock({"start_str": "2030-01-08T09:00:00", "end_str": "2030-01-07T11:00:00"}, NOW, HOURS)
+    assert near_clock({"start_str_search": "2030-01-07T08:00:00"}, NOW, HOURS)
+    assert near_clock({"new_start_str": "2030-01-07T10:30:00"}, NOW, HOURS)
+
+
+def test_times_away_from_now_are_cacheable():
+    assert not near_clock({"start_str": "2030-01-08T09:00:00", "end_str": "2030-01-08T23:59:59"}, NOW, HOURS)
+    assert not near_clock({"summary": "Standup at 9:30", "calendar_id": "primary"}, NOW, HOURS)
+    assert not near_clock({}, NOW, HOURS)
+
+
+def test_put_get_round_trip_and_expiry(tmp_path):
+    cache = ParseCache(str(tmp_path / "parses.json"), ttl=60)
+    key = cache.key("what's on tomorrow", "ctx")
+    cache.put(key, "list_events", {"start_str": "2030-01-08"})
+    persist.flush()
+    assert ParseCache(str(tmp_path / "parses.json"), ttl=60).get(key) == ("list_events", {"start_str": "2030-01-08"})
+    assert ParseCache(str(tmp_path / "parses.json"), ttl=0).get(key) is None
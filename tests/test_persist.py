@@ -0,0 +1,25 @@
+import json
+import threading
+
+from calendar_core import persist
+
+
+def test_write_later_returns_before_writing_and_keeps_the_newest(tmp_path, monkeypatch):
+    path = str(tmp_path / "data" / "state.json")
+    release = threading.Event()
+    write_json = persist.write_json
+
+    def slow_write(*args):
+        release.wait(5)
+        write_json(*args)
+
+    monkeypatch.setattr(persist, "write_json", slow_write)
+    persist.write_later(str(tmp_path / "blocker.json"), {})     # occupies the writer
+    persist.write_later(path, {"n": 1})
+    persist.write_later(path, {"n": 2})
+    assert not (tmp_path / "data").exists()
+
+    release.set()
+    persist.flush()
+    with open(path) as f:
+        assert json.load(f) == {"n": 2}
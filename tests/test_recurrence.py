@@ -0,0 +1,45 @@
+from datetime import datetime, timezone
+
+from calendar_core.recurrence import Series
+
+
+def ts(text):
+    return datetime.fromisoformat(text).timestamp()
+
+
+def weekly(**extra):
+    return dict({"id": "gym", "summary": "Gym",
+                 "start": {"dateTime": "2030-01-07T09:00:00-06:00", "timeZone": "America/Chicago"},
+                 "end": {"dateTime": "2030-01-07T10:00:00-06:00", "timeZone": "America/Chicago"},
+                 "recurrence": ["RRULE:FREQ=WEEKLY;COUNT=4"]}, **extra)
+
+
+def test_expands_instances_in_window():
+    hits = Series(weekly(), "America/Chicago").between(ts("2030-01-01T00:00:00+00:00"), ts("2030-02-01T00:00:00+00:00"))
+    assert [instance["id"] for _, _, instance in hits] == [
+        "gym_20300107T150000Z", "gym_20300114T150000Z", "gym_20300121T150000Z", "gym_20300128T150000Z"]
+    start_ts, end_ts, instance = hits[0]
+    assert end_ts - start_ts == 3600
+    assert instance["recurringEventId"] == "gym"
+
+
+def test_skip_drops_replaced_occurrences():
+    series = Series(weekly(), "America/Chicago")
+    skip = {round(ts("2030-01-14T09:00:00-06:00"))}
+    hits = series.between(ts("2030-01-01T00:00:00+00:00"), ts("2030-02-01T00:00:00+00:00"), skip)
+    assert len(hits) == 3
+
+
+def test_exdate_with_tzid_is_honoured():
+    master = weekly(recurrence=["RRULE:FREQ=WEEKLY;COUNT=4", "EXDATE;TZID=America/Chicago:20300121T090000"])
+    hits = Series(master, "America/Chicago").between(ts("2030-01-01T00:00:00+00:00"), ts("2030-02-01T00:00:00+00:00"))
+    assert "gym_20300121T150000Z" not in [instance["id"] for _, _, instance in hits]
+    assert len(hits) == 3
+
+
+def test_first_after_skips_ended_occurrences():
+    series = Series(weekly(), "America/Chicago")
+    start_ts, _, _ = series.first_after(ts("2030-01-07T09:30:00-06:00"))
+    assert start_ts == ts("2030-01-07T09:00:00-06:00")
+    start_ts, _, _ = series.first_after(ts("2030-01-07T10:00:00-06:00"))
+    assert datetime.fromtimestamp(start_ts, timezone.utc).day == 14
@@ -0,0 +1,43 @@
+import pytest
+
+pytest.importorskip("uvicorn")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import google_calendar as gc  # noqa: E402
+from calendar_core.watch import FakeNotifier  # noqa: E402
+from conftest import timed  # noqa: E402
+
+WORK = "work@group.calendar.google.com"
+
+
+@pytest.fixture
+def client(calendar, tmp_path, monkeypatch):
+    import voice_mcp
+
+    monkeypatch.setitem(gc.WATCH_CONFIG, "path", str(tmp_path / "channels.json"))
+    monkeypatch.setitem(gc.WATCH_CONFIG, "address", "http://testserver/webhooks/calendar")
+    monkeypatch.setattr(gc, "_watch_registry", None)
+    with TestClient(voice_mcp.app) as client:
+        yield client
+
+
+def test_notification_syncs_the_changed_calendar(client, calendar):
+    notifier = FakeNotifier(client.post)
+    assert gc.ensure_watch_channels(["owner@example.com", WORK], service=notifier) == {}
+    gc.refresh_event_stores(["owner@example.com", WORK])
+
+    created = calendar.events().insert(calendarId=WORK, body=timed(
+        None, "2030-01-07T10:00:00+00:00", "2030-01-07T11:00:00+00:00", summary="Lunch")).execute()
+    response = notifier.notify(WORK)
+    assert response.json() == {"status": "ok", "calendar_id": WORK}
+    assert created["id"] in gc._event_stores[WORK].events
+
+
+def test_notification_with_a_bad_token_is_rejected(client):
+    notifier = FakeNotifier(client.post)
+    gc.ensure_watch_channels([WORK], service=notifier)
+    channel = notifier.watched[WORK]
+    response = client.post("/webhooks/calendar", headers={
+        "X-Goog-Channel-ID": channel["id"], "X-Goog-Channel-Token": "wrong", "X-Goog-Resource-State": "exists"})
+    assert response.status_code == 403
@@ -1,24 +1,30 @@
+import asyncio
 import threading
 import json
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import HTMLResponse
+from contextlib import asynccontextmanager
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Request
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import uvicorn
 from google.genai import Client, types
 from google_calendar import (
-    create_new_event, get_next_event, delete_event, list_events,
+    create_new_event, get_next_event, get_next_events, delete_event, list_events,
     update_event, find_free_slots, suggest_next_free_slot,
+    delete_events_bulk, update_events_bulk, WATCH_CONFIG, WATCH_ENABLED, ensure_watch_channels_async,
+    watched_calendar, is_watch_channel, stop_watch_channel_async, sync_event_store_async, scheduler_stats,
+    create_new_event_async, get_next_event_async, get_next_events_async, delete_event_async,
+    list_events_async, update_event_async, find_free_slots_async, suggest_next_free_slot_async,
+    upsert_events_bulk_async, delete_events_bulk_async, update_events_bulk_async, close_async_transport,
 )
 from dotenv import load_dotenv
+from calendar_core.parse_cache import ParseCache, fingerprint, near_clock
+from calendar_core.timeparse import parse_datetime
+from calendar_core.tracing import registry, render_counters, span, trace
 import os
 import re
-import dateparser
 from datetime import datetime, timedelta
-import whisper
-import sounddevice as sd
 import tempfile
-import soundfile as sf
 
 load_dotenv()
 
@@ -33,19 +39,38 @@ TIMEZONE = CONFIG["timezone"]
 DEFAULT_DURATION = CONFIG["default_event_duration_minutes"]
 DURATION_DEFAULTS = CONFIG.get("duration_defaults", {})
 CONTACTS = CONFIG.get("contacts", {})
-
-app = FastAPI(title="Calendar Voice Assistant", version="1.0.0")
+# Attach per-stage timings to every /command response (or pass "debug": true)
+DEBUG_TIMINGS = CONFIG.get("debug", False)
+
+@asynccontextmanager
+async def lifespan(app):
+    renewal = asyncio.create_task(renew_watch_channels()) if WATCH_ENABLED else None
+    yield
+    if renewal is not None:
+        renewal.cancel()
+    await close_async_transport()
+
+app = FastAPI(title="Calendar Voice Assistant", version="1.0.0", lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
 )
-model = whisper.load_model("base")
+_whisper_model = None
 
 
-def build_system_prompt():
-    now = datetime.now()
+def get_whisper_model():
+    """Load Whisper on first voice command; the web server never needs it."""
+    global _whisper_model
+    if _whisper_model is None:
+        import whisper
+        _whisper_model = whisper.load_model("base")
+    return _whisper_model
+
+
+def build_system_prompt(now=None):
+    now = now or datetime.now()
     calendars_str = "\n".join(f'  - "{alias}" -> {cal_id}' for alias, cal_id in CALENDAR_ALIASES.items())
     contacts_str = "\n".join(f'  - "{name}" -> {email}' for name, email in CONTACTS.items()) if CONTACTS else "  (none configured)"
     duration_str = "\n".join(f'  - {event_type}: {mins} minutes' for event_type, mins in DURATION_DEFAULTS.items())
@@ -71,15 +96,15 @@ def build_system_prompt():
 ## Rules
 1. Always convert relative dates ("tomorrow", "next Tuesday", "in 3 days") to absolute ISO 8601 datetime strings based on today's date and timezone above.
 2. When the user mentions a calendar by alias name, use the corresponding calendar ID from the list above.
-3. When the user doesn't specify a calendar, use the default calendar.
+3. When the user doesn't specify a calendar, use the default calendar. For update_event and delete_event, leave calendar_id out instead, so the user's other calendars are searched too if the default one has no match.
 4. When the user mentions a person by name and that name is in the contacts list, use their email address for attendees.
 5. When the user doesn't specify an end time, infer duration from the event type using the duration defaults above. If the event type isn't listed, use {DEFAULT_DURATION} minutes.
 6. For recurring events, generate proper RRULE strings (e.g., "RRULE:FREQ=WEEKLY;BYDAY=MO,WE,FR").
 7. For "every weekday" use BYDAY=MO,TU,WE,TH,FR. For "every day" use FREQ=DAILY.
 8. When the user asks to see/view/list events, use list_events with appropriate date range.
-9. When the user asks to move/change/update/edit/reschedule an event, use update_event.
-10. When the user asks to delete/remove/cancel an event, use delete_event.
-11. When the user asks "what's next" or "next event", use get_next_event.
+9. When the user asks to move/change/update/edit/reschedule an event, use update_event. To shift or change several events at once ("push all my gym sessions back 30 minutes"), use update_events_bulk.
+10. When the user asks to delete/remove/cancel an event, use delete_event. When they mean several events ("all", "every", a whole calendar or range), use delete_events_bulk.
+11. When the user asks "what's next" or "next event", use get_next_event. For several upcoming events ("my next 3 events"), use get_next_events.
 12. Set reminders when the user asks (e.g., "remind me 30 min before" -> {{"method": "popup", "minutes": 30}}).
 13. Set add_video_call=true when user mentions "video call", "Google Meet", "virtual meeting", or "zoom" (for Meet links).
 14. Always call a tool. Never respond with plain text — always make a function call.
@@ -95,19 +120,22 @@ def list_tools():
         "tools": [
             {"name": "create_new_event", "description": "Create a new calendar event"},
             {"name": "get_next_event", "description": "Get the next event"},
+            {"name": "get_next_events", "description": "Get the next few events"},
             {"name": "delete_event", "description": "Delete an existing calendar event"},
             {"name": "list_events", "description": "List events in a date range"},
             {"name": "update_event", "description": "Update an existing calendar event"},
+            {"name": "delete_events_bulk", "description": "Delete every matching event in a range"},
+            {"name": "update_events_bulk", "description": "Shift or edit every matching event in a range"},
         ]
     }
 
 @app.post('/invoke')
-def invoke_tool(call: ToolCall):
+async def invoke_tool(call: ToolCall):
     try:
-        fn = TOOL_DISPATCH.get(call.tool)
+        fn = TOOL_DISPATCH_ASYNC.get(call.tool)
         if not fn:
             raise HTTPException(status_code=400, detail=f"Unknown tool: {call.tool}")
-        return fn(**call.args)
+        return await fn(**call.args)
     except HTTPException:
         raise
     except Exception as e:
@@ -116,12 +144,28 @@ def invoke_tool(call: ToolCall):
 class CommandRequest(BaseModel):
     command: str
     ignore_conflict: bool = False
+    confirm: bool = False   # apply a bulk delete/update instead of previewing it
+    debug: bool = False
 
 @app.post('/command')
-def handle_command_api(req: CommandRequest):
+async def handle_command_api(req: CommandRequest):
     """Web-facing endpoint: takes natural language, returns structured result."""
+    with trace() as spans, span("command"):
+        response = await run_command(req)
+    if req.debug or DEBUG_TIMINGS:
+        response["timings"] = {"total_ms": spans[0]["ms"], "spans": spans}
+    return response
+
+@app.get('/metrics')
+def metrics():
+    """Prometheus scrape endpoint: stage latency histograms, Gemini tokens and API scheduler counters."""
+    body = registry.render() + render_counters(
+        "scheduler_events_total", scheduler_stats(), "Calendar API requests, throttling and retries, by kind.")
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+async def run_command(req: CommandRequest):
     try:
-        parsed = gemini_parse(req.command)
+        parsed = await gemini_parse_async(req.command)
         if not parsed:
             # Fallback to local parsing
             parsed_event = parse_natural_language_event(req.command)
@@ -134,8 +178,11 @@ def handle_command_api(req: CommandRequest):
 
         if req.ignore_conflict:
             args["ignore_conflict"] = True
+        if tool_name in BULK_TOOLS and not req.confirm:
+            # Bulk changes are only previewed until the client resends with "confirm": true
+            args["dry_run"] = True
 
-        tool_result = call_tool(tool_name, args)
+        tool_result = await call_tool_async(tool_name, args)
 
         # Build preview info
         cal_id = args.get("calendar_id", "primary")
@@ -159,10 +206,15 @@ def handle_command_api(req: CommandRequest):
                 and tool_result.get("success") is False
                 and tool_result.get("error") == "Event conflict detected"):
             response["status"] = "conflict"
-            suggested = suggest_next_free_slot(args.get("start_str", ""), DEFAULT_DURATION)
+            suggested = await suggest_next_free_slot_async(args.get("start_str", ""), DEFAULT_DURATION)
             if suggested.get("success") and suggested.get("suggested_slot"):
                 response["suggested_slot"] = suggested["suggested_slot"]
 
+        # A bulk preview that matched something waits for the user to confirm it
+        if (tool_name in BULK_TOOLS and not req.confirm
+                and isinstance(tool_result, dict) and tool_result.get("matched")):
+            response["status"] = "confirm"
+
         return response
     except Exception as e:
         return {"status": "error", "message": str(e)}
@@ -193,7 +245,7 @@ class SlackScanRequest(BaseModel):
     lookback_hours: int = 24
 
 @app.post('/integrations/prairietest')
-def sync_prairietest_api(req: PrairieTestRequest):
+async def sync_prairietest_api(req: PrairieTestRequest):
     """Sync PrairieTest exam reservations to a calendar."""
     try:
         # Resolve calendar alias to ID
@@ -202,76 +254,72 @@ def sync_prairietest_api(req: PrairieTestRequest):
         # Try to import the integration module
         try:
             from integrations.prairietest import fetch_exams
-            exams = fetch_exams(req.url)
+            with span("integration_fetch", source="prairietest"):
+                # The scrapers are blocking; keep them off the event loop
+                exams = await asyncio.to_thread(fetch_exams, req.url)
         except ImportError:
             return {
                 "success": False,
                 "error": "PrairieTest integration not yet configured. Add your session credentials to config.json and create integrations/prairietest.py"
             }
 
-        created = []
-        for exam in exams:
-            result = create_new_event(
-                calendar_id=cal_id,
-                summary=f"[EXAM] {exam['name']}",
-                start_str=exam["start"],
-                end_str=exam.get("end"),
-                location=exam.get("location", "CBTF"),
-                reminders=[
-                    {"method": "popup", "minutes": 1440},  # 1 day
-                    {"method": "popup", "minutes": 60},     # 1 hour
-                ],
-                ignore_conflict=True,
-            )
-            if result.get("success"):
-                created.append(exam)
-
-        return {"success": True, "exams": created, "count": len(created)}
+        sync = await upsert_events_bulk_async([{
+            "external_id": f"prairietest:{req.url.rstrip('/')}:{exam['name']}",
+            "summary": f"[EXAM] {exam['name']}",
+            "start_str": exam["start"],
+            "end_str": exam.get("end"),
+            "location": exam.get("location", "CBTF"),
+            "reminders": [
+                {"method": "popup", "minutes": 1440},  # 1 day
+                {"method": "popup", "minutes": 60},     # 1 hour
+            ],
+        } for exam in exams], calendar_id=cal_id)
+        synced = [exam for exam, result in zip(exams, sync["results"]) if result.get("success")]
+
+        return {"success": True, "exams": synced, "count": len(synced), "changes": sync["counts"]}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 @app.post('/integrations/prairielearn')
-def sync_prairielearn_api(req: PrairieLearnRequest):
+async def sync_prairielearn_api(req: PrairieLearnRequest):
     """Sync PrairieLearn deadlines to a calendar."""
     try:
         cal_id = CALENDAR_ALIASES.get(req.calendar, req.calendar)
 
         try:
             from integrations.prairielearn import fetch_deadlines
-            deadlines = fetch_deadlines(req.url)
+            with span("integration_fetch", source="prairielearn"):
+                deadlines = await asyncio.to_thread(fetch_deadlines, req.url)
         except ImportError:
             return {
                 "success": False,
                 "error": "PrairieLearn integration not yet configured. Add your session credentials to config.json and create integrations/prairielearn.py"
             }
 
-        created = []
-        for dl in deadlines:
-            result = create_new_event(
-                calendar_id=cal_id,
-                summary=f"[DUE] {dl['name']}",
-                start_str=dl["due_date"],
-                end_str=dl.get("due_date"),  # Point event at deadline
-                reminders=[
-                    {"method": "popup", "minutes": 1440},  # 1 day
-                    {"method": "popup", "minutes": 120},    # 2 hours
-                ],
-                ignore_conflict=True,
-            )
-            if result.get("success"):
-                created.append(dl)
-
-        return {"success": True, "deadlines": created, "count": len(created)}
+        sync = await upsert_events_bulk_async([{
+            "external_id": f"prairielearn:{req.url.rstrip('/')}:{dl['name']}",
+            "summary": f"[DUE] {dl['name']}",
+            "start_str": dl["due_date"],
+            "end_str": dl.get("due_date"),  # Point event at deadline
+            "reminders": [
+                {"method": "popup", "minutes": 1440},  # 1 day
+                {"method": "popup", "minutes": 120},    # 2 hours
+            ],
+        } for dl in deadlines], calendar_id=cal_id)
+        synced = [dl for dl, result in zip(deadlines, sync["results"]) if result.get("success")]
+
+        return {"success": True, "deadlines": synced, "count": len(synced), "changes": sync["counts"]}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 @app.post('/integrations/slack')
-def scan_slack_api(req: SlackScanRequest):
+async def scan_slack_api(req: SlackScanRequest):
     """Scan a Slack channel for scheduling messages."""
     try:
         try:
             from integrations.slack import scan_channel_for_events
-            events = scan_channel_for_events(req.channel, req.lookback_hours)
+            with span("integration_fetch", source="slack"):
+                events = await asyncio.to_thread(scan_channel_for_events, req.channel, req.lookback_hours)
         except ImportError:
             return {
                 "success": False,
@@ -283,6 +331,49 @@ def scan_slack_api(req: SlackScanRequest):
         return {"success": False, "error": str(e)}
 
 
+@app.post('/webhooks/calendar')
+async def calendar_webhook(request: Request, background_tasks: BackgroundTasks):
+    """Google Calendar push notifications: re-sync just the calendar that changed."""
+    headers = request.headers
+    channel_id = headers.get("x-goog-channel-id", "")
+    state = headers.get("x-goog-resource-state")
+    if state == "sync":
+        # Handshake sent when a channel opens; there's nothing to fetch yet
+        return {"status": "ok"}
+
+    calendar_id = watched_calendar(channel_id, headers.get("x-goog-channel-token"))
+    if calendar_id is None:
+        if is_watch_channel(channel_id):
+            raise HTTPException(status_code=403, detail="Bad channel token")
+        # Left over from an earlier registration; ask Google to stop sending it
+        background_tasks.add_task(stop_watch_channel_async, channel_id, headers.get("x-goog-resource-id"))
+        return {"status": "ignored"}
+
+    # Answer right away; Google retries slow webhooks
+    background_tasks.add_task(sync_after_notification, calendar_id)
+    return {"status": "ok", "calendar_id": calendar_id}
+
+
+async def sync_after_notification(calendar_id):
+    # On the event loop over the async transport, like every other request the server makes
+    try:
+        await sync_event_store_async(calendar_id)
+    except Exception as e:
+        print(f"⚠️ Sync after push notification failed for {calendar_id}: {e}")
+
+
+async def renew_watch_channels():
+    """Keep a live push channel on every calendar, renewing ahead of expiry."""
+    while True:
+        try:
+            errors = await ensure_watch_channels_async()
+            for cal_id, error in errors.items():
+                print(f"⚠️ Could not watch calendar {cal_id}: {error}")
+        except Exception as e:
+            print(f"⚠️ Watch channel renewal failed: {e}")
+        await asyncio.sleep(WATCH_CONFIG.get("check_interval_seconds", 600))
+
+
 def run_server():
     uvicorn.run(app, host="0.0.0.0", port=8000)
 
@@ -301,6 +392,9 @@ def extract_calendar_id(command_text: str):
     return default_id, command_text.strip()
 
 def listen_for_command():
+    import sounddevice as sd
+    import soundfile as sf
+
     print("Listening... (speak now)")
     duration = 10
     sample_rate = 16000
@@ -310,7 +404,8 @@ def listen_for_command():
         wav_path = f.name
         sf.write(wav_path, audio, sample_rate)
 
-    result = model.transcribe(wav_path)
+    with span("transcription"):
+        result = get_whisper_model().transcribe(wav_path)
     text = result["text"].strip()
     return text if text else None
 
@@ -348,7 +443,7 @@ def parse_natural_language_event(command_text):
     if "all day" in cleaned_text.lower():
         event_data["all_day"] = True
 
-    dt = dateparser.parse(cleaned_text, settings={'PREFER_DATES_FROM': 'future'})
+    dt = parse_datetime(cleaned_text, settings={'PREFER_DATES_FROM': 'future'})
     if dt:
         event_data["start_str"] = dt.isoformat()
         if not event_data["all_day"]:
@@ -366,6 +461,7 @@ def resolve_calendar_id(args):
     return args
 
 client = Client(api_key=os.getenv("GOOGLE_API_KEY"))
+GEMINI_MODEL = "gemini-2.5-flash"
 
 create_event_declaration = {
     "name": "create_new_event",
@@ -384,7 +480,8 @@ create_event_declaration = {
             "recurrence": {"type": "array", "items": {"type": "string"}, "description": "RRULE strings, e.g. ['RRULE:FREQ=WEEKLY;BYDAY=MO,WE,FR']"},
             "reminders": {"type": "array", "items": {"type": "object"}, "description": "Reminder overrides, e.g. [{'method': 'popup', 'minutes': 10}]"},
             "color_id": {"type": "string", "description": "Google Calendar color ID (1-11)"},
-            "add_video_call": {"type": "boolean", "description": "True to auto-create a Google Meet link"}
+            "add_video_call": {"type": "boolean", "description": "True to auto-create a Google Meet link"},
+            "check_all_calendars": {"type": "boolean", "description": "True to check for conflicts on every calendar, not just the target one"}
         },
         "required": ["calendar_id", "summary", "start_str"]
     }
@@ -396,18 +493,29 @@ get_next_event_declaration = {
     "parameters": {"type": "object", "properties": {}}
 }
 
+get_next_events_declaration = {
+    "name": "get_next_events",
+    "description": "Get the next few upcoming events across all calendars, soonest first.",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "n": {"type": "integer", "description": "How many events to return (default 5)"}
+        }
+    }
+}
+
 delete_event_declaration = {
     "name": "delete_event",
     "description": "Delete a Google Calendar event by ID or by searching with summary + start time.",
     "parameters": {
         "type": "object",
         "properties": {
-            "calendar_id": {"type": "string"},
+            "calendar_id": {"type": "string", "description": "Calendar ID or alias. Omit unless the user named a calendar."},
             "event_id": {"type": "string"},
             "summary": {"type": "string"},
             "start_str": {"type": "string"}
         },
-        "required": ["calendar_id"]
+        "required": []
     }
 }
 
@@ -432,7 +540,7 @@ update_event_declaration = {
     "parameters": {
         "type": "object",
         "properties": {
-            "calendar_id": {"type": "string"},
+            "calendar_id": {"type": "string", "description": "Calendar ID or alias. Omit unless the user named a calendar."},
             "event_id": {"type": "string", "description": "Event ID if known"},
             "summary_search": {"type": "string", "description": "Search for event by title (fuzzy match)"},
             "start_str_search": {"type": "string", "description": "Narrow search to events near this time"},
@@ -447,7 +555,41 @@ update_event_declaration = {
             "new_color_id": {"type": "string"},
             "add_video_call": {"type": "boolean"}
         },
-        "required": ["calendar_id"]
+        "required": []
+    }
+}
+
+bulk_match_properties = {
+    "calendar_id": {"type": "string", "description": "Calendar ID or alias. If omitted, matches on all calendars."},
+    "summary": {"type": "string", "description": "Only events whose title fuzzy-matches this"},
+    "start_str": {"type": "string", "description": "Start of range as ISO string (default now)"},
+    "end_str": {"type": "string", "description": "End of range as ISO string (default 7 days after start)"},
+    "dry_run": {"type": "boolean", "description": "True to only list what would change"},
+}
+
+delete_events_bulk_declaration = {
+    "name": "delete_events_bulk",
+    "description": "Delete every event matching a title and/or calendar in a date range, e.g. 'delete all cs374 events next week'.",
+    "parameters": {
+        "type": "object",
+        "properties": bulk_match_properties,
+        "required": []
+    }
+}
+
+update_events_bulk_declaration = {
+    "name": "update_events_bulk",
+    "description": "Shift or edit every event matching a title and/or calendar in a date range, e.g. 'push all gym events back 30 minutes'.",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            **bulk_match_properties,
+            "shift_minutes": {"type": "integer", "description": "Move each event by this many minutes (negative for earlier)"},
+            "new_summary": {"type": "string"},
+            "new_location": {"type": "string"},
+            "new_color_id": {"type": "string"}
+        },
+        "required": []
     }
 }
 
@@ -459,7 +601,8 @@ find_free_slots_declaration = {
         "properties": {
             "start_str": {"type": "string", "description": "Start of range as ISO string"},
             "end_str": {"type": "string", "description": "End of range as ISO string"},
-            "duration_minutes": {"type": "integer", "description": "Minimum slot duration in minutes (default 60)"}
+            "duration_minutes": {"type": "integer", "description": "Minimum slot duration in minutes (default 60)"},
+            "working_hours_only": {"type": "boolean", "description": "True to only return slots within working hours"}
         },
         "required": ["start_str", "end_str"]
     }
@@ -472,7 +615,9 @@ suggest_next_free_slot_declaration = {
         "type": "object",
         "properties": {
             "start_str": {"type": "string", "description": "Start searching from this time (ISO string)"},
-            "duration_minutes": {"type": "integer", "description": "Required slot duration in minutes (default 60)"}
+            "duration_minutes": {"type": "integer", "description": "Required slot duration in minutes (default 60)"},
+            "buffer_minutes": {"type": "integer", "description": "Free time to keep before and after other events"},
+            "weekdays": {"type": "array", "items": {"type": "string"}, "description": "Only search these days, e.g. ['mo', 'we', 'fr']"}
         },
         "required": ["start_str"]
     }
@@ -481,44 +626,98 @@ suggest_next_free_slot_declaration = {
 gemini_tools = types.Tool(function_declarations=[
     create_event_declaration,
     get_next_event_declaration,
+    get_next_events_declaration,
     delete_event_declaration,
     list_events_declaration,
     update_event_declaration,
+    delete_events_bulk_declaration,
+    update_events_bulk_declaration,
     find_free_slots_declaration,
     suggest_next_free_slot_declaration,
 ])
 
+# --- Parse cache (repeat commands skip Gemini) ---
+
+PARSE_CACHE_CONFIG = CONFIG.get("parse_cache", {})
+# Everything besides the date that shapes a parse: the prompt (rendered for a
+# fixed moment), the tool declarations and the model. Changing any of them
+# changes the fingerprint, so old parses simply stop matching.
+PROMPT_FINGERPRINT = fingerprint(build_system_prompt(datetime(2000, 1, 1)),
+                                 gemini_tools.model_dump(mode="json"), GEMINI_MODEL)
+_parse_cache = None
+if PARSE_CACHE_CONFIG.get("enabled", True):
+    _parse_cache_path = PARSE_CACHE_CONFIG.get("path", ".cache/parses.json")
+    _parse_cache = ParseCache(
+        path=os.path.join(os.path.dirname(__file__), _parse_cache_path) if _parse_cache_path else None,
+        ttl=PARSE_CACHE_CONFIG.get("ttl_seconds", 86400),
+        max_entries=PARSE_CACHE_CONFIG.get("max_entries", 1000),
+    )
+
 # --- Direct function dispatch (no more HTTP self-calls) ---
 
 TOOL_DISPATCH = {
     "create_new_event": create_new_event,
     "get_next_event": get_next_event,
+    "get_next_events": get_next_events,
     "delete_event": delete_event,
     "list_events": list_events,
     "update_event": update_event,
+    "delete_events_bulk": delete_events_bulk,
+    "update_events_bulk": update_events_bulk,
     "find_free_slots": find_free_slots,
     "suggest_next_free_slot": suggest_next_free_slot,
 }
 
+# Tools that change many events at once; they always get a preview and an explicit confirm
+BULK_TOOLS = {"delete_events_bulk", "update_events_bulk"}
+
+# Same tools for the web server's async request path
+TOOL_DISPATCH_ASYNC = {
+    "create_new_event": create_new_event_async,
+    "get_next_event": get_next_event_async,
+    "get_next_events": get_next_events_async,
+    "delete_event": delete_event_async,
+    "list_events": list_events_async,
+    "update_event": update_event_async,
+    "delete_events_bulk": delete_events_bulk_async,
+    "update_events_bulk": update_events_bulk_async,
+    "find_free_slots": find_free_slots_async,
+    "suggest_next_free_slot": suggest_next_free_slot_async,
+}
+
 def call_tool(tool_name, args):
     fn = TOOL_DISPATCH.get(tool_name)
     if not fn:
         return {"error": f"Unknown tool: {tool_name}"}
-    return fn(**args)
+    with span("tool", tool=tool_name):
+        return fn(**args)
 
-def gemini_parse(command_text):
-    """Send command to Gemini with full context. Returns (tool_name, args) or None."""
-    system_prompt = build_system_prompt()
+async def call_tool_async(tool_name, args):
+    fn = TOOL_DISPATCH_ASYNC.get(tool_name)
+    if not fn:
+        return {"error": f"Unknown tool: {tool_name}"}
+    with span("tool", tool=tool_name):
+        return await fn(**args)
+
+def _gemini_request(command_text, now):
+    """Keyword arguments for generate_content: the command plus the full system prompt and tools."""
+    with span("prompt_build"):
+        system_prompt = build_system_prompt(now)
     gemini_config = types.GenerateContentConfig(
         tools=[gemini_tools],
         system_instruction=system_prompt,
     )
     contents = [types.Content(role="user", parts=[types.Part(text=command_text)])]
-    response = client.models.generate_content(
-        model="gemini-2.5-flash",
-        contents=contents,
-        config=gemini_config,
-    )
+    return {"model": GEMINI_MODEL, "contents": contents, "config": gemini_config}
+
+def _record_usage(response, info):
+    usage = getattr(response, "usage_metadata", None)
+    for kind, attr in (("prompt", "prompt_token_count"), ("output", "candidates_token_count")):
+        tokens = getattr(usage, attr, None) or 0
+        registry.inc("gemini_tokens_total", tokens, kind=kind)
+        info[f"{kind}_tokens"] = tokens
+
+def _tool_call(response):
     if not response.candidates:
         return None
     candidate = response.candidates[0]
@@ -530,12 +729,64 @@ def gemini_parse(command_text):
         return func_call.name, args
     return None
 
+def _cached_parse(command_text, now):
+    """(cache key, cached parse) for a command; the key is None when the command can't be cached."""
+    if _parse_cache is None:
+        return None, None
+    # Relative dates resolve against the prompt's date, so it's part of the key
+    key = _parse_cache.key(command_text, f"{now.date().isoformat()}:{PROMPT_FINGERPRINT}")
+    if key is None:
+        return None, None
+    with span("parse_cache") as info:
+        parsed = _parse_cache.get(key)
+        info["hit"] = parsed is not None
+    registry.inc("parse_cache_total", result="hit" if parsed else "miss")
+    return key, parsed
+
+def _remember_parse(key, parsed, now):
+    if key is None or not parsed:
+        return
+    if near_clock(parsed[1], now, PARSE_CACHE_CONFIG.get("clock_window_hours", 3) * 3600):
+        return  # resolved from the time of day, so a repeat later today would be stale
+    _parse_cache.put(key, *parsed)
+
+def gemini_parse(command_text):
+    """Send command to Gemini with full context. Returns (tool_name, args) or None."""
+    now = datetime.now()
+    key, parsed = _cached_parse(command_text, now)
+    if parsed:
+        return parsed
+    request = _gemini_request(command_text, now)
+    with span("gemini") as info:
+        response = client.models.generate_content(**request)
+        _record_usage(response, info)
+    parsed = _tool_call(response)
+    _remember_parse(key, parsed, now)
+    return parsed
+
+async def gemini_parse_async(command_text):
+    """gemini_parse() for the web server: awaits Gemini instead of blocking on it."""
+    now = datetime.now()
+    key, parsed = _cached_parse(command_text, now)
+    if parsed:
+        return parsed
+    request = _gemini_request(command_text, now)
+    with span("gemini") as info:
+        response = await client.aio.models.generate_content(**request)
+        _record_usage(response, info)
+    parsed = _tool_call(response)
+    _remember_parse(key, parsed, now)
+    return parsed
+
 def agent_handle_command(command_text):
     """Gemini-first: all commands go through Gemini for parsing."""
     # Try Gemini first for all commands
     result = gemini_parse(command_text)
     if result:
         tool_name, args = result
+        if tool_name in BULK_TOOLS:
+            # No confirm step here, so bulk changes are only ever previewed
+            args["dry_run"] = True
         tool_result = call_tool(tool_name, args)
 
         # Handle conflict on create
@@ -561,13 +812,13 @@ def agent_handle_command(command_text):
             elif choice == "2" and suggested.get("success") and suggested.get("suggested_slot"):
                 slot = suggested["suggested_slot"]
                 args["start_str"] = slot["start"]
-                end_dt = dateparser.parse(slot["start"]) + timedelta(minutes=DEFAULT_DURATION)
+                end_dt = parse_datetime(slot["start"]) + timedelta(minutes=DEFAULT_DURATION)
                 args["end_str"] = end_dt.isoformat()
                 args["ignore_conflict"] = True
                 return call_tool("create_new_event", args)
             elif choice == "3":
                 new_time = input("New time: ")
-                dt = dateparser.parse(new_time, settings={"PREFER_DATES_FROM": "future"})
+                dt = parse_datetime(new_time, settings={"PREFER_DATES_FROM": "future"})
                 if dt:
                     args["start_str"] = dt.isoformat()
                     args["end_str"] = (dt + timedelta(minutes=DEFAULT_DURATION)).isoformat()
@@ -650,11 +901,35 @@ def format_event_preview(tool_name, args):
             lines.append(f"  Near time:  {args['start_str']}")
         return "\n".join(lines)
 
+    elif tool_name in ("delete_events_bulk", "update_events_bulk"):
+        # Run the operation as a dry run so the user sees exactly what will change
+        plan = call_tool(tool_name, {**args, "dry_run": True})
+        if not plan.get("success"):
+            return f"\n{plan.get('error', 'Could not match events.')}"
+        title = "🗑️ Bulk Delete Preview" if tool_name == "delete_events_bulk" else "✏️ Bulk Update Preview"
+        lines = ["", f"{title} ({plan['matched']} event(s)):"]
+        for item in plan["results"]:
+            line = f"  • {item['start']} — {item['summary']}"
+            if item.get("changes"):
+                line += f" -> {', '.join(f'{k}: {v}' for k, v in item['changes'].items())}"
+            elif item.get("error"):
+                line += f" (skipped: {item['error']})"
+            lines.append(line)
+        return "\n".join(lines)
+
     return ""
 
 
 def format_result(tool_name, result):
     """Format the result for display."""
+    if tool_name == "get_next_events" and isinstance(result, list):
+        if not result:
+            return "\n📭 Nothing coming up."
+        lines = [f"\n📌 Next {len(result)} event(s):\n"]
+        for event in result:
+            lines.append(f"  • {event.get('start', '?')} — {event.get('summary', '?')} ({event.get('calendar', '?')})")
+        return "\n".join(lines)
+
     if not isinstance(result, dict):
         return str(result)
 
@@ -684,6 +959,14 @@ def format_result(tool_name, result):
         slot = result.get("suggested_slot", {})
         return f"\n💡 Next free slot: {slot.get('start', '?')} ({slot.get('duration_minutes', '?')} min available)"
 
+    if tool_name in ("delete_events_bulk", "update_events_bulk") and "results" in result:
+        lines = [f"\n✅ {result.get('deleted', result.get('updated', 0))} of {result.get('matched', 0)} event(s) done:\n"]
+        for item in result["results"]:
+            mark = "•" if item.get("success") else "✗"
+            error = f" ({item['error']})" if item.get("error") else ""
+            lines.append(f"  {mark} {item['start']} — {item['summary']}{error}")
+        return "\n".join(lines)
+
     if tool_name == "get_next_event" and result:
         return f"\n📌 Next event: {result.get('summary', '?')} at {result.get('start', '?')} on {result.get('calendar', '?')}"
 
@@ -746,11 +1029,14 @@ def main():
             "what", "show", "list", "schedule", "next event", "free", "busy", "when am i",
         ])
         is_delete = any(word in lower for word in ["delete", "remove", "cancel"])
-        is_update = any(word in lower for word in ["move", "update", "change", "edit", "reschedule"])
+        is_update = any(word in lower for word in ["move", "update", "change", "edit", "reschedule", "shift"])
+
+        result = gemini_parse(command)
+        # However it was phrased, a bulk change goes through the preview and confirm below
+        is_bulk = bool(result) and result[0] in BULK_TOOLS and not result[1].get("dry_run")
 
-        if is_read_only:
+        if is_read_only and not is_bulk:
             # No confirmation needed for queries
-            result = gemini_parse(command)
             if result:
                 tool_name, args = result
                 tool_result = call_tool(tool_name, args)
@@ -760,7 +1046,6 @@ def main():
             continue
 
         # For write operations, parse first, preview, then confirm
-        result = gemini_parse(command)
         if not result:
             # Fall back to local parsing for simple creates
             parsed_event = parse_natural_language_event(command)
@@ -778,9 +1063,9 @@ def main():
             print(preview)
 
         # Confirmation
-        if is_delete:
+        if tool_name == "delete_events_bulk" or (is_delete and tool_name != "update_events_bulk"):
             confirm = input("\n⚠️ Confirm DELETE? (y/n): ")
-        elif is_update:
+        elif is_update or tool_name == "update_events_bulk":
             confirm = input("\nConfirm UPDATE? (y/n): ")
         else:
             confirm = input("\nConfirm CREATE? (y/n): ")
@@ -811,13 +1096,13 @@ def main():
             elif choice == "2" and suggested.get("success") and suggested.get("suggested_slot"):
                 slot = suggested["suggested_slot"]
                 args["start_str"] = slot["start"]
-                end_dt = dateparser.parse(slot["start"]) + timedelta(minutes=DEFAULT_DURATION)
+                end_dt = parse_datetime(slot["start"]) + timedelta(minutes=DEFAULT_DURATION)
                 args["end_str"] = end_dt.isoformat()
                 args["ignore_conflict"] = True
                 tool_result = call_tool("create_new_event", args)
             elif choice == "3":
                 new_time = input("New time: ")
-                dt = dateparser.parse(new_time, settings={"PREFER_DATES_FROM": "future"})
+                dt = parse_datetime(new_time, settings={"PREFER_DATES_FROM": "future"})
                 if dt:
                     args["start_str"] = dt.isoformat()
                     args["end_str"] = (dt + timedelta(minutes=DEFAULT_DURATION)).isoformat()